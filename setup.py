@@ -1,3 +1,12 @@
 from setuptools import setup
 
-setup(name="covid_19_mobility", version="0.0.1")
+setup(
+    name="covid_19_mobility",
+    version="0.0.1",
+    entry_points={
+        "pytask": [
+            "instrumentation = src.library.instrumentation",
+            "parallel = src.library.parallel",
+        ]
+    },
+)
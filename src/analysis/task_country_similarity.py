@@ -0,0 +1,80 @@
+"""
+This task compares the mobility trajectories of all pairs of countries (and of all
+pairs of German states) instead of a hand-picked set.
+
+For every mobility metric it stores an entity x entity matrix of correlations and of
+dynamic time warping distances of the standardized 7-day averages. Pairs whose
+trajectories differ by more than MAX_DTW_DISTANCE per day (in standard deviations)
+are pruned by their lower bound and get an infinite distance.
+
+"""
+import numpy as np
+import pytask
+
+from src.config import BLD
+from src.config import N_WORKERS
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import slice_panel
+from src.library.parallel import granted_workers
+from src.library.similarity import correlation_matrix
+from src.library.similarity import dtw_matrix
+from src.library.similarity import standardize_series
+
+varlist_moving_avg = [
+    "retail_and_recreation_avg_7d",
+    "grocery_and_pharmacy_avg_7d",
+    "workplaces_avg_7d",
+    "parks_avg_7d",
+    "residential_avg_7d",
+    "transit_stations_avg_7d",
+]
+
+# Half width of the warping band in days and maximal root mean squared difference
+DTW_WINDOW = 7
+MAX_DTW_DISTANCE = 1.0
+
+panels = ["eu_country_level", "german_states"]
+
+
+@pytask.mark.resources(cpus=N_WORKERS)
+@pytask.mark.parametrize(
+    "depends_on, produces",
+    [
+        (
+            {
+                "values": BLD / "data" / "panels" / f"{name}.npy",
+                "index": BLD / "data" / "panels" / f"{name}.json",
+            },
+            BLD / "analysis" / f"similarity_{name}.npz",
+        )
+        for name in panels
+    ],
+)
+def task_country_similarity(depends_on, produces):
+    panel = slice_panel(
+        load_dense_panel(depends_on["values"]), metrics=varlist_moving_avg
+    )
+    values = np.asarray(panel["values"])
+    max_distance = MAX_DTW_DISTANCE * np.sqrt(len(panel["dates"]))
+
+    correlations = []
+    dtw_distances = []
+    for i in range(len(varlist_moving_avg)):
+        correlations.append(correlation_matrix(values[:, :, i]))
+        dtw_distances.append(
+            dtw_matrix(
+                standardize_series(values[:, :, i]),
+                window=DTW_WINDOW,
+                max_distance=max_distance,
+                n_workers=granted_workers(N_WORKERS),
+            )
+        )
+
+    produces.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        produces,
+        entities=np.array(panel["entities"], dtype=str),
+        metrics=np.array(varlist_moving_avg, dtype=str),
+        correlation=np.stack(correlations),
+        dtw=np.stack(dtw_distances),
+    )
@@ -0,0 +1,149 @@
+"""
+This task estimates event studies of the lockdowns for all countries of the panel.
+
+Instead of a level dummy and a linear duration every lockdown gets one indicator per
+day relative to its start, see *src/model_specs/regression_specifications.ini* for the
+lockdowns and the window. Days before and after the window are binned into its first
+and last day. The start of a lockdown is the start which
+:mod:`src.model_code.task_detect_lockdowns` detected for each country, so the
+lockdowns start on different days and countries without a detected lockdown of a kind
+are controls for it.
+
+With one fixed effect per country and one per day the coefficients are the change of
+the 7-day average mobility of the countries in a lockdown relative to the day before
+its start, net of the change which all countries share on the same calendar days. The
+coefficients of the first and last day are the averages of all days beyond them. The
+design matrix is sparse and solved with sparse least squares.
+
+"""
+import numpy as np
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.config import SRC
+from src.library.event_study import event_time_design
+from src.library.event_study import fit_event_study
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import slice_panel
+from src.library.specifications import read_specifications
+
+REFERENCE_DAY = -1
+
+
+def event_start_days(entities, dates, detected_lockdowns, events):
+
+    """
+    Computes the day of the panel on which each entity starts each lockdown
+    Input:
+    entities (list): entities of the panel
+    dates (pd.DatetimeIndex): days of the panel
+    detected_lockdowns (dict): dictionary with entities as keys and dictionaries of
+    lockdowns and their start and end dates as values, see task_detect_lockdowns
+    events (list): lockdowns whose start is an event
+    Output:
+    event_starts (dict): events as keys and arrays with the day of the start per entity
+    as values, -1 if the lockdown of an entity was not detected
+    """
+    event_starts = {}
+    for event in events:
+        starts = np.full(len(entities), -1)
+        for i, entity in enumerate(entities):
+            period = detected_lockdowns.get(entity, {}).get(event)
+            if period is not None:
+                starts[i] = (pd.Timestamp(period[0]) - dates[0]).days
+        event_starts[event] = starts
+    return event_starts
+
+
+def event_study_regressions(panel, depvars, detected_lockdowns, events, leads, lags):
+
+    """
+    Estimates event studies of the starts of lockdowns for several dependent variables
+    Input:
+    panel (dict): dense panel, see src.library.panel_store.load_dense_panel
+    depvars (list): dependent variables, metrics of the panel
+    detected_lockdowns (dict): dictionary with entities as keys and dictionaries of
+    lockdowns and their start and end dates as values, see task_detect_lockdowns
+    events (list): lockdowns whose start is an event
+    leads (int): days before the start with an indicator, earlier days are binned
+    lags (int): days after the start with an indicator, later days are binned
+    Output:
+    event_study (dict): "params" and "bse" as arrays of shape (depvar, event, relative
+    day) which are zero on the reference day, "relative_days" and "nobs"
+    """
+    dates = pd.DatetimeIndex(panel["dates"])
+    n_entities, n_days = len(panel["entities"]), len(dates)
+    event_starts = event_start_days(
+        panel["entities"], dates, detected_lockdowns, events
+    )
+    design, names = event_time_design(
+        n_entities,
+        n_days,
+        event_starts,
+        leads,
+        lags,
+        reference=REFERENCE_DAY,
+        bin_endpoints=True,
+        day_effects=True,
+    )
+
+    relative_days = np.arange(-leads, lags + 1)
+    shape = (len(depvars), len(events), len(relative_days))
+    params, bse = np.zeros(shape), np.zeros(shape)
+    nobs = np.zeros(len(depvars))
+    for i, depvar in enumerate(depvars):
+        # Rows of the design are ordered by entity and day like the panel
+        outcome = np.asarray(
+            slice_panel(panel, metrics=[depvar])["values"][:, :, 0]
+        ).ravel()
+        result = fit_event_study(design, outcome)
+        for column, (event, day) in enumerate(names):
+            if event in events:
+                position = (i, events.index(event), day + leads)
+                params[position] = result["params"][column]
+                bse[position] = result["bse"][column]
+        nobs[i] = result["nobs"]
+
+    return {
+        "params": params,
+        "bse": bse,
+        "relative_days": relative_days,
+        "nobs": nobs,
+    }
+
+
+@pytask.mark.depends_on(
+    {
+        "values": BLD / "data" / "panels" / "eu_country_level.npy",
+        "index": BLD / "data" / "panels" / "eu_country_level.json",
+        "detected_lockdowns": BLD / "data" / "detected_lockdowns.pkl",
+        "regression_specifications": SRC
+        / "model_specs"
+        / "regression_specifications.ini",
+    }
+)
+@pytask.mark.produces(BLD / "analysis" / "event_study.npz")
+def task_event_study(depends_on, produces):
+    panel = load_dense_panel(depends_on["values"])
+    detected_lockdowns = pd.read_pickle(depends_on["detected_lockdowns"])
+    specifications = read_specifications(depends_on["regression_specifications"])
+    depvars = specifications["dependent_variables"]
+    settings = specifications["event_study"]
+
+    event_study = event_study_regressions(
+        panel,
+        depvars,
+        detected_lockdowns,
+        settings["events"],
+        settings["leads"],
+        settings["lags"],
+    )
+
+    np.savez_compressed(
+        produces,
+        outcomes=np.array(depvars, dtype=str),
+        events=np.array(settings["events"], dtype=str),
+        entities=np.array(panel["entities"], dtype=str),
+        **event_study,
+    )
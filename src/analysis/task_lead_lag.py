@@ -0,0 +1,123 @@
+"""
+This task finds at which lag the mobility of every country responds to the stringency
+index and to the infection numbers.
+
+The 7-day averages of all mobility categories and drivers are aligned on one grid of
+countries and days. For every country, category and driver the cross-correlation
+function is computed for lags from -MAX_LAG to MAX_LAG days, where a positive lag
+means that mobility follows the driver. The peak is the lag from 0 to MAX_LAG with the
+largest absolute correlation. The functions and peaks are stored in
+bld/analysis/lead_lag.npz and the peaks of every driver as table for the paper.
+
+"""
+import numpy as np
+import pandas as pd
+import pytask
+from utils import create_moving_average
+
+from src.config import BLD
+from src.config import SRC
+from src.library.alignment import align_sources
+from src.library.cross_correlation import cross_correlation
+from src.library.cross_correlation import peak_lags
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import panel_to_frame
+from src.library.panel_store import slice_panel
+
+varlist_moving_avg = [
+    "retail_and_recreation_avg_7d",
+    "grocery_and_pharmacy_avg_7d",
+    "workplaces_avg_7d",
+    "parks_avg_7d",
+    "residential_avg_7d",
+    "transit_stations_avg_7d",
+]
+drivers = ["stringency_index_avg_7d", "new_cases_avg_7d"]
+
+# Largest lag in days and minimal number of common days of a correlation
+MAX_LAG = 28
+MIN_OBS = 28
+
+
+def lead_lag_table(entities, metrics, lag, correlation):
+
+    """
+    Formats the peak lags and correlations of one driver as table
+    Input:
+    entities (list): entities, rows of the table
+    metrics (list): mobility categories, columns of the table
+    lag (np.ndarray): peak lags of shape (entity, metric)
+    correlation (np.ndarray): correlations at the peak of shape (entity, metric)
+    Output:
+    table (df): cells "lag (correlation)", empty if there is no peak
+    """
+    cells = np.where(
+        np.isnan(lag),
+        "",
+        np.char.add(
+            np.char.add(np.nan_to_num(lag).astype(int).astype(str), " ("),
+            np.char.add(np.char.mod("%.2f", correlation), ")"),
+        ),
+    )
+    columns = [metric.replace("_avg_7d", "").replace("_", " ") for metric in metrics]
+    return pd.DataFrame(cells, index=entities, columns=columns)
+
+
+@pytask.mark.depends_on(
+    {
+        "values": BLD / "data" / "panels" / "eu_country_level.npy",
+        "index": BLD / "data" / "panels" / "eu_country_level.json",
+        "stringency": SRC / "original_data" / "stringency_index_data.csv",
+    }
+)
+@pytask.mark.produces(
+    {
+        "lead_lag": BLD / "analysis" / "lead_lag.npz",
+        **{driver: BLD / "tables" / f"lead_lag_{driver}.tex" for driver in drivers},
+    }
+)
+def task_lead_lag(depends_on, produces):
+    panel = load_dense_panel(depends_on["values"])
+    mobility = panel_to_frame(
+        slice_panel(panel, metrics=[*varlist_moving_avg, "new_cases_avg_7d"])
+    )
+
+    # Stringency index of the countries of the panel, averaged like mobility
+    stringency = pd.read_csv(
+        depends_on["stringency"], usecols=["country", "date", "stringency_index"]
+    )
+    stringency = stringency.loc[stringency["country"].isin(panel["entities"])]
+    stringency["date"] = pd.to_datetime(stringency["date"], format="%Y-%m-%d")
+    stringency = stringency.set_index(["country", "date"]).sort_index()
+    stringency = create_moving_average(
+        stringency, ["stringency_index"], "country", kind="forward"
+    )
+
+    aligned = align_sources(
+        [mobility, stringency[["stringency_index_avg_7d"]]], entity="country"
+    )
+    correlation = cross_correlation(
+        slice_panel(aligned, metrics=varlist_moving_avg)["values"],
+        slice_panel(aligned, metrics=drivers)["values"],
+        max_lag=MAX_LAG,
+        min_obs=MIN_OBS,
+    )
+    lag, peak = peak_lags(correlation, max_lag=MAX_LAG, min_lag=0)
+
+    produces["lead_lag"].parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        produces["lead_lag"],
+        entities=np.array(aligned["entities"], dtype=str),
+        metrics=np.array(varlist_moving_avg, dtype=str),
+        drivers=np.array(drivers, dtype=str),
+        lags=np.arange(-MAX_LAG, MAX_LAG + 1),
+        correlation=correlation,
+        peak_lag=lag,
+        peak_correlation=peak,
+    )
+
+    for i, driver in enumerate(drivers):
+        table = lead_lag_table(
+            aligned["entities"], varlist_moving_avg, lag[:, :, i], peak[:, :, i]
+        )
+        table.to_latex(produces[driver])
@@ -0,0 +1,61 @@
+"""
+This task predicts mobility under counterfactual lockdown policies.
+
+A scenario is a lockdown of a given duration (in days) at a given 7-day average
+stringency index. The grid of all combinations is evaluated for every dependent
+variable and specification at once from the stored estimates, together with 95%
+confidence bands. The scenarios are set during the second lockdown, all other lockdown
+indicators are off and the remaining covariates are fixed at their mean during the
+second lockdown.
+
+"""
+import numpy as np
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.library.results_store import load_regression_results
+from src.library.scenarios import predict_scenarios
+from src.library.scenarios import scenario_grid
+
+stringency_levels = np.arange(0, 101)
+lockdown_durations = np.arange(1, 121)
+
+
+@pytask.mark.depends_on(
+    {
+        "regression_results": BLD / "tables" / "regression_results.npz",
+        "regression_data": BLD / "data" / "regression_data.pkl",
+    }
+)
+@pytask.mark.produces(BLD / "analysis" / "policy_scenarios.npz")
+def task_predict_policy_scenarios(depends_on, produces):
+    regression_results = load_regression_results(depends_on["regression_results"])
+    regression_data = pd.read_pickle(depends_on["regression_data"])
+
+    scenarios = scenario_grid(
+        stringency_index_avg_7d=stringency_levels,
+        second_lockdown_7days_moving_average_duration=lockdown_durations,
+    )
+    scenarios["second_lockdown_7days_moving_average"] = 1
+    for lockdown in ["first_lockdown", "light_lockdown"]:
+        scenarios[f"{lockdown}_7days_moving_average"] = 0
+        scenarios[f"{lockdown}_7days_moving_average_duration"] = 0
+
+    second_lockdown = regression_data["second_lockdown_7days_moving_average"] == 1
+    baseline = regression_data.loc[second_lockdown].mean(numeric_only=True)
+
+    predictions = predict_scenarios(
+        regression_results, scenarios, baseline=baseline.to_dict()
+    )
+
+    produces.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        produces,
+        outcomes=np.array(predictions["outcomes"], dtype=str),
+        stringency_index_avg_7d=scenarios["stringency_index_avg_7d"].to_numpy(),
+        lockdown_duration=scenarios[
+            "second_lockdown_7days_moving_average_duration"
+        ].to_numpy(),
+        **{name: predictions[name] for name in ["mean", "se", "lower", "upper"]},
+    )
@@ -1,183 +1,267 @@
 """
 This task runs the regressions to identify lockdown fatigue.
-"""
-import pickle
 
+All specifications of a dependent variable are estimated on the same days, the days
+on which the variables of every specification are observed. E.g. the growth rate of
+cases is undefined on days without cases, so the columns of a table would otherwise
+compare models estimated on different samples.
+"""
 import numpy as np
 import pandas as pd
 import pytask
-import statsmodels.formula.api as smf
-from ordered_set import OrderedSet
-from stargazer.stargazer import Stargazer
 
 from src.config import BLD
 from src.config import SRC
+from src.library.regression_tables import regression_results_from_fits
+from src.library.regression_tables import render_regression_tables
+from src.library.results_store import load_regression_results
+from src.library.results_store import save_regression_results
+from src.library.results_store import stack_regression_results
+from src.library.specifications import model_key
+from src.library.specifications import read_specifications
+from src.library.specifications import sample_formula
 
 # Dummy for circumventing pre-commit hook issues
 dummy = np.mean([1, 2])
 
+# Contemporaneous covariates of the distributed-lag models, see the section
+# "distributed_lags" of regression_specifications.ini for the lags
+lag_controls = [
+    "first_lockdown_7days_moving_average",
+    "second_lockdown_7days_moving_average",
+    "light_lockdown_7days_moving_average",
+]
 
-def ols_regression_formatted(
-    data, specifications, as_latex=False, covariates_names=None, covariates_order=None
-):
+
+def common_sample(data, depvar, sample):
 
     """
-    Creates formatted tables for different dependent variables and specifications
+    Selects the rows on which a dependent variable and its covariates are observed
+    Input:
+    data (df): Dataframe containing all necessary variables for OLS regression
+    depvar (str): dependent variable
+    sample (str): right hand side of a formula whose variables are the covariates, see
+    sample_formula in src.library.specifications
+    Output:
+    data (df): rows of data without missing values in depvar and the covariates
+    """
+    from patsy import dmatrices
+
+    _, covariates = dmatrices(depvar + " ~ " + sample, data, return_type="dataframe")
+    return data.loc[data.index.isin(covariates.index)]
+
+
+def ols_regressions(data, specifications, sample=None):
+
+    """
+    Estimates OLS regressions for different dependent variables and specifications
     Input:
     data (df): Dataframe containing all necessary variables for OLS regression
     specifications (dictionary): dependent variables as keys and list of specifications
     as values
-    as_latex (bool): specify whether Output as table or Latex code
-    covariate_names (dict): dictionary with covariate names as in "data" as keys and new
-    covariate names as values
+    sample (str): right hand side of a formula whose complete cases are the sample of
+    all specifications, see common_sample. Defaults to None, then every specification
+    is estimated on its own complete cases
     Output:
-    list_of_tables (list of stargazer tables): list of formatted tables
+    dict_regression_results (dict): dependent variables as keys and estimates of all
+    specifications as arrays (see regression_results_from_fits) as values
     """
+    # Estimation dependencies are heavy, import them only when needed
+    import statsmodels.formula.api as smf
 
-    # Create dictionary which connects dependent variables with formatted tables
-    dict_regression_tables = {}
+    # Create dictionary which connects dependent variables with estimates
+    dict_regression_results = {}
 
     # Generate regressions
     for depvar in specifications.keys():
 
         regression_list = []
         specification_list = specifications[depvar]
-        list_all_covariates = []
+        depvar_data = data if sample is None else common_sample(data, depvar, sample)
 
         for specification in specification_list:
 
             estimation_equation = depvar + " ~ " + specification
-            regression = smf.ols(data=data, formula=estimation_equation).fit()
+            regression = smf.ols(data=depvar_data, formula=estimation_equation).fit()
             regression_list.append(regression)
 
-            # Create set of all variables for this dependent variable
-            list_all_covariates = list(
-                set(list_all_covariates + regression.params.index.values.tolist())
-            )
-
-        # Format table with stargazer
-        formatted_table = Stargazer(regression_list)
+        dict_regression_results[depvar] = regression_results_from_fits(
+            regression_list, specification_list
+        )
 
-        # No dimension of freedoms and blank dependent variable
-        formatted_table.show_degrees_of_freedom(False)
-        formatted_table.dependent_variable_name("")
+    return dict_regression_results
 
-        # Optional: Change order of covariates
-        if covariates_order is not None:
 
-            covariates_order_depvar = list(
-                OrderedSet(covariates_order).intersection(list_all_covariates)
-            )
-            list_remaining_covariates = list(
-                OrderedSet(list_all_covariates).difference(
-                    OrderedSet(covariates_order_depvar)
-                )
-            )
-            covariates_sorted = list(
-                OrderedSet(covariates_order_depvar).union(list_remaining_covariates)
-            )
-            covariates_sorted.remove("Intercept")
-            covariates_sorted = covariates_sorted + ["Intercept"]
+def distributed_lag_regressions(data, depvars, variables, max_lag, controls):
 
-            formatted_table.covariate_order(covariates_sorted)
+    """
+    Estimates OLS regressions of dependent variables on distributed lags
+    Input:
+    data (df): Dataframe with the lags "{variable}_lag{k}" as columns, see
+    src.data_management.task_create_regression_data
+    depvars (list): dependent variables
+    variables (list): variables whose lags 0 to max_lag are covariates
+    max_lag (int): largest lag in days
+    controls (list): contemporaneous covariates
+    Output:
+    dict_regression_results (dict): dependent variables as keys and estimates (see
+    regression_results_from_fits) as values
+    """
+    import statsmodels.api as sm
 
-        # Optional: Change name of covariates
-        if covariates_names is not None:
+    lags = [f"{v}_lag{k}" for v in variables for k in range(max_lag + 1)]
+    exog = sm.add_constant(data[lags + controls])
+    exog = exog.rename(columns={"const": "Intercept"})
 
-            formatted_table.rename_covariates(covariates_names)
+    dict_regression_results = {}
+    for depvar in depvars:
+        regression = sm.OLS(data[depvar], exog, missing="drop").fit()
+        dict_regression_results[depvar] = regression_results_from_fits(
+            [regression], [f"distributed lags 0-{max_lag}"]
+        )
 
-        # Add table or latex code to dictionary
-        if as_latex is True:
+    return dict_regression_results
 
-            dict_regression_tables[depvar] = formatted_table.render_latex()
 
-            # Delete tabular environment around it
-            dict_regression_tables[depvar] = dict_regression_tables[depvar].replace(
-                "\\begin{table}[!htbp] \\centering\n", ""
-            )
-            dict_regression_tables[depvar] = dict_regression_tables[depvar].replace(
-                "\\end{table}", ""
-            )
+def remove_stale_models(directory, model_paths):
 
-        else:
-            dict_regression_tables[depvar] = formatted_table
+    """
+    Deletes the models of specifications or dependent variables which were removed
+    Input:
+    directory (Path): directory of the models, one subdirectory per dependent variable
+    model_paths (dict): dependent variables as keys and dictionaries with the paths of
+    the current models as values
+    Output:
+    stale (list): paths of the deleted models
+    """
+    current = {path for paths in model_paths.values() for path in paths.values()}
+    stale = [path for path in directory.glob("*/*.npz") if path not in current]
+    for path in stale:
+        path.unlink()
+    for subdirectory in directory.iterdir():
+        if subdirectory.is_dir() and not any(subdirectory.iterdir()):
+            subdirectory.rmdir()
+    return stale
+
+
+# Every (dependent variable, specification) pair is one product keyed by its formula
+regression_specifications = read_specifications(
+    SRC / "model_specs" / "regression_specifications.ini"
+)
+depvars = regression_specifications["dependent_variables"]
+specifications = regression_specifications["specifications"]
+sample = sample_formula(specifications.values())
+
+model_paths = {
+    depvar: {
+        name: BLD / "models" / depvar / f"{model_key(depvar, formula, sample)}.npz"
+        for name, formula in specifications.items()
+    }
+    for depvar in depvars
+}
+
+
+@pytask.mark.parametrize(
+    "depends_on, produces, depvar, specification",
+    [
+        (
+            BLD / "data" / "regression_data.pkl",
+            model_paths[depvar][name],
+            depvar,
+            formula,
+        )
+        for depvar in depvars
+        for name, formula in specifications.items()
+    ],
+)
+def task_run_regression(depends_on, produces, depvar, specification):
+    regression_data = pd.read_pickle(depends_on)
 
-    return dict_regression_tables
+    regression_results = ols_regressions(
+        data=regression_data, specifications={depvar: [specification]}, sample=sample
+    )
+    save_regression_results(regression_results, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "regression_data": BLD / "data" / "regression_data.pkl",
-        "regression_specifications": SRC / "model_specs" / "regression_models.pkl",
-        "regression_variable_names": SRC
-        / "model_specs"
-        / "regression_variable_names.pkl",
+        f"{depvar}_{name}": path
+        for depvar in depvars
+        for name, path in model_paths[depvar].items()
     }
 )
-@pytask.mark.produces(
-    {
-        "all_regression_tables": BLD / "tables" / "all_regression_tables.pkl",
-        "all_regression_tables_latex": BLD
-        / "tables"
-        / "all_regression_tables_latex.pkl",
+@pytask.mark.produces(BLD / "tables" / "regression_results.npz")
+def task_collect_regression_results(depends_on, produces):
+    all_regression_results = {
+        depvar: stack_regression_results(
+            [
+                load_regression_results(path)[depvar]
+                for path in model_paths[depvar].values()
+            ]
+        )
+        for depvar in depvars
     }
-)
-def task_run_regressions(depends_on, produces):
-    # Import data
-    regression_data = pd.read_pickle(depends_on["regression_data"])
-    regression_specifications = pd.read_pickle(depends_on["regression_specifications"])
-    regression_variable_names = pd.read_pickle(depends_on["regression_variable_names"])
+    save_regression_results(all_regression_results, produces)
+    remove_stale_models(BLD / "models", model_paths)
 
-    all_regression_tables = ols_regression_formatted(
-        data=regression_data,
-        specifications=regression_specifications,
-        as_latex=False,
-        covariates_names=regression_variable_names,
-        covariates_order=[*regression_variable_names],
-    )
-    all_regression_tables_latex = ols_regression_formatted(
-        data=regression_data,
-        specifications=regression_specifications,
-        as_latex=True,
-        covariates_names=regression_variable_names,
-        covariates_order=[*regression_variable_names],
-    )
-
-    all_regression_tables_file = open(produces["all_regression_tables"], "wb")
-    pickle.dump(all_regression_tables, all_regression_tables_file)
 
-    all_regression_tables_latex_file = open(
-        produces["all_regression_tables_latex"], "wb"
-    )
-    pickle.dump(all_regression_tables_latex, all_regression_tables_latex_file)
-
-
-@pytask.mark.depends_on(BLD / "tables" / "all_regression_tables_latex.pkl")
-@pytask.mark.produces(
+@pytask.mark.depends_on(
     {
-        "workplaces_avg_7d": BLD / "tables" / "regression_table_workplaces_avg_7d.tex",
-        "retail_and_recreation_avg_7d": BLD
-        / "tables"
-        / "regression_table_retail_and_recreation_avg_7d.tex",
-        "residential_avg_7d": BLD
-        / "tables"
-        / "regression_table_residential_avg_7d.tex",
-        "grocery_and_pharmacy_avg_7d": BLD
-        / "tables"
-        / "regression_table_grocery_and_pharmacy_avg_7d.tex",
-        "transit_stations_avg_7d": BLD
-        / "tables"
-        / "regression_table_transit_stations_avg_7d.tex",
+        "regression_data": BLD / "data" / "regression_data.pkl",
+        "regression_specifications": SRC
+        / "model_specs"
+        / "regression_specifications.ini",
     }
 )
-def task_export_regression_tables(depends_on, produces):
+@pytask.mark.produces(BLD / "tables" / "distributed_lag_results.npz")
+def task_run_distributed_lag_regressions(depends_on, produces):
+    regression_data = pd.read_pickle(depends_on["regression_data"]).sort_index()
+    specifications = read_specifications(depends_on["regression_specifications"])
 
-    all_regression_tables_latex_file = open(depends_on, "rb")
-    all_regression_tables_latex = pickle.load(all_regression_tables_latex_file)
+    all_regression_results = distributed_lag_regressions(
+        data=regression_data,
+        depvars=specifications["dependent_variables"],
+        variables=specifications["distributed_lags"]["variables"],
+        max_lag=specifications["distributed_lags"]["max_lag"],
+        controls=lag_controls,
+    )
+    save_regression_results(all_regression_results, produces)
+
+
+@pytask.mark.parametrize(
+    "depends_on, produces, depvar",
+    [
+        (
+            {
+                "regression_variable_names": SRC
+                / "model_specs"
+                / "regression_variable_names.pkl",
+                **model_paths[depvar],
+            },
+            BLD / "tables" / f"regression_table_{depvar}.tex",
+            depvar,
+        )
+        for depvar in depvars
+    ],
+)
+def task_export_regression_table(depends_on, produces, depvar):
+    regression_variable_names = pd.read_pickle(depends_on["regression_variable_names"])
 
-    for produces_name in [*produces]:
-        dependent_variable = produces_name.replace("regression_table", "")
-        regression_table_latex_file = open(produces[produces_name], "wb")
-        regression_table_latex_file.write(
-            bytes(all_regression_tables_latex[dependent_variable], "utf-8")
+    # Read the models of this dependent variable in the order of the specifications
+    regression_results = {
+        depvar: stack_regression_results(
+            [
+                load_regression_results(depends_on[name])[depvar]
+                for name in specifications
+            ]
         )
+    }
+    regression_table_latex = render_regression_tables(
+        regression_results,
+        fmt="latex",
+        covariates_names=regression_variable_names,
+        covariates_order=[*regression_variable_names],
+    )[depvar]
+
+    with open(produces, "w") as regression_table_latex_file:
+        regression_table_latex_file.write(regression_table_latex)
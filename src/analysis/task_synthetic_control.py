@@ -0,0 +1,91 @@
+"""
+This task estimates the effect of the second German lockdown on mobility with a
+synthetic control from the other European countries.
+
+For every mobility category the counterfactual of Germany is the convex combination
+of the other countries which is closest to Germany before the start of the lockdown.
+All other countries are in turn fit as placebos on the pool of the remaining
+countries, in parallel. The p-value of a category is the share of countries whose
+ratio of root mean squared gaps during and before the lockdown is at least as large
+as the one of Germany.
+
+The fit uses backward 7-day averages of the mobility categories, so no day before the
+lockdown contains days of the lockdown. The second lockdown is the treatment since the
+mobility data starts only two weeks before the first one, too few days to fit weights
+for all other countries.
+
+"""
+import numpy as np
+import pandas as pd
+import pytask
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.config import BLD
+from src.config import N_WORKERS
+from src.config import SRC
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import slice_panel
+from src.library.parallel import granted_workers
+from src.library.synthetic_control import placebo_study
+
+varlist = [
+    "retail_and_recreation",
+    "grocery_and_pharmacy",
+    "workplaces",
+    "parks",
+    "residential",
+    "transit_stations",
+]
+
+TREATED = "Germany"
+LOCKDOWN = "second_lockdown"
+WINDOW = 7
+
+
+def backward_average(values, window):
+
+    """
+    Computes backward moving averages of all series of a panel
+    Input:
+    values (np.ndarray): panel of shape (entity, day, metric)
+    window (int): number of days of an average, the day itself and the days before
+    Output:
+    averages (np.ndarray): averages of shape (entity, day - window + 1, metric), the
+    first window - 1 days have no complete window and are dropped
+    """
+    return sliding_window_view(values, window, axis=1).mean(axis=-1)
+
+
+@pytask.mark.resources(cpus=N_WORKERS)
+@pytask.mark.depends_on(
+    {
+        "values": BLD / "data" / "panels" / "eu_country_level.npy",
+        "index": BLD / "data" / "panels" / "eu_country_level.json",
+        "dates_lockdowns": SRC / "model_specs" / "time_lockdowns.pkl",
+    }
+)
+@pytask.mark.produces(BLD / "analysis" / "synthetic_control.npz")
+def task_synthetic_control(depends_on, produces):
+    panel = slice_panel(load_dense_panel(depends_on["values"]), metrics=varlist)
+    values = backward_average(panel["values"], WINDOW)
+    dates = panel["dates"][WINDOW - 1 :]
+    start, end = pd.to_datetime(pd.read_pickle(depends_on["dates_lockdowns"])[LOCKDOWN])
+
+    study = placebo_study(
+        values,
+        treated=panel["entities"].index(TREATED),
+        pre_days=dates.searchsorted(start),
+        post_days=(end - start).days + 1,
+        n_workers=granted_workers(N_WORKERS),
+    )
+
+    produces.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        produces,
+        treated=TREATED,
+        entities=np.array(panel["entities"], dtype=str),
+        metrics=np.array([f"{metric}_avg_{WINDOW}d" for metric in varlist], dtype=str),
+        dates=np.asarray(dates, dtype="datetime64[D]"),
+        start=np.datetime64(start.date()),
+        **study,
+    )
@@ -1,5 +1,11 @@
+import os
 from pathlib import Path
 
 ROOT = Path(__file__).parent.parent
 SRC = Path(__file__).parent
 BLD = ROOT / "bld"
+
+# Number of processes of tasks which start a pool, defaults to all cores. If pytask runs
+# tasks in parallel, a task starts at most the workers which the scheduler grants it,
+# see src.library.parallel.granted_workers.
+N_WORKERS = int(os.environ.get("COVID_MOBILITY_WORKERS") or os.cpu_count() or 1)
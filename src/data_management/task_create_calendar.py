@@ -0,0 +1,26 @@
+"""Create the calendar of public holidays and summer school vacations of all regions.
+
+The holidays declared in *src/model_specs/holidays.csv* are expanded into a table of
+flags keyed by region code and integer day, which the preparation of the state and
+country data joins by lookup.
+
+"""
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.config import SRC
+from src.library.calendar_dimension import build_calendar
+from src.library.calendar_dimension import save_calendar
+
+# First and last day of the calendar, must cover the mobility data
+CALENDAR_START = "2020-01-01"
+CALENDAR_END = "2022-12-31"
+
+
+@pytask.mark.depends_on(SRC / "model_specs" / "holidays.csv")
+@pytask.mark.produces(BLD / "data" / "calendar.npz")
+def task_create_calendar(depends_on, produces):
+    holidays = pd.read_csv(depends_on, dtype=str)
+    calendar = build_calendar(holidays, CALENDAR_START, CALENDAR_END)
+    save_calendar(calendar, produces)
@@ -0,0 +1,42 @@
+"""Write the prepared data sets as dense memory-mapped panels.
+
+Plot and regression tasks map these panels and slice countries, states and date
+ranges from them instead of unpickling and re-indexing the long format data sets.
+
+"""
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.library.panel_store import write_dense_panel
+from src.library.partitions import read_partitions
+
+
+panels = {
+    "eu_country_level": ("eu_country_level/partitions.json", "country"),
+    "german_states": ("german_states_data.pkl", "state"),
+}
+
+
+@pytask.mark.parametrize(
+    "depends_on, produces, entity",
+    [
+        (
+            BLD / "data" / data_file,
+            {
+                "values": BLD / "data" / "panels" / f"{name}.npy",
+                "index": BLD / "data" / "panels" / f"{name}.json",
+            },
+            entity,
+        )
+        for name, (data_file, entity) in panels.items()
+    ],
+)
+def task_create_dense_panel(depends_on, produces, entity):
+    # Partitioned data sets are referenced by the json index of their partitions
+    if depends_on.suffix == ".json":
+        data = read_partitions(depends_on)
+    else:
+        data = pd.read_pickle(depends_on)
+    metrics = data.select_dtypes(include="number").columns.tolist()
+    write_dense_panel(data, entity=entity, metrics=metrics, path=produces["values"])
@@ -2,18 +2,26 @@
 This task creates the data necessary for regression of lockdown fatigue.
 
 """
-from datetime import datetime
-from datetime import timedelta
-
 import pandas as pd
 import pytask
 
 from src.config import BLD
 from src.config import SRC
+from src.library.alignment import align_sources
+from src.library.alignment import day_number
+from src.library.lags import distributed_lag_design
+from src.library.panel_store import panel_to_frame
+from src.library.partitions import read_partitions
+from src.library.specifications import read_specifications
 
 
 def prepare_regression_data(
-    data_composed, stringency_data, dates_lockdowns, first_last_day=None
+    data_composed,
+    stringency_data,
+    dates_lockdowns,
+    first_last_day=None,
+    infection_data=None,
+    distributed_lags=None,
 ):
     """
     Creates dataframe with all necessary variables (especially time variables) for
@@ -26,6 +34,10 @@ def prepare_regression_data(
     dates as values stored in a list
     first_last_day (list): list containing two dates (strings in "YYYY-MM-DD" format)
     for first/last day in regression sample
+    infection_data (df): dataframe containing the infection numbers of Germany by
+    date, needed for distributed lags
+    distributed_lags (dict): "variables" of the stringency or infection data whose lags
+    0 to "max_lag" are added as columns "{variable}_lag{k}". Defaults to None.
 
     Output:
     regression_data (df): dataframe which contains all variables necessary for
@@ -33,33 +45,19 @@ def prepare_regression_data(
 
     """
 
-    # Prepare datasets for merge
+    # Align mobility and infection numbers with the stringency index on integer days,
+    # keeping the days covered by both data sets
     germany_composed_country_level = data_composed.loc[
         data_composed["country"] == "Germany",
     ]
-    germany_composed_country_level = germany_composed_country_level.set_index("date")
-
-    stringency_data = stringency_data.reset_index(level=0)
-    stringency_data["date"] = stringency_data["date"].apply(lambda x: x.date())
-    stringency_data = stringency_data.set_index("date")
-
-    # Merge the two datasets
-    regression_data = pd.merge(
-        germany_composed_country_level,
-        stringency_data,
-        left_index=True,
-        right_index=True,
-    )
-
-    # Change the index to datetime format
-    regression_data.index = list(
-        map(lambda x: pd.to_datetime(x).date(), regression_data.index.values)
-    )
-
-    # Drop unnecessary variables
-    regression_data = regression_data.drop(
-        ["country", "country_region_code", "place_id"], axis=1
+    stringency_data = stringency_data.reset_index().assign(country="Germany")
+    panel = align_sources(
+        [germany_composed_country_level, stringency_data],
+        entity="country",
+        span="intersection",
     )
+    regression_data = panel_to_frame(panel, dropna=False).loc["Germany"]
+    days = day_number(regression_data.index)
 
     # Create necessary time variables
 
@@ -73,79 +71,74 @@ def prepare_regression_data(
             lockdown_7days_moving_average_name + "_duration"
         )
 
-        regression_data[lockdown] = (
-            (
-                regression_data.index
-                >= datetime.strptime(dates_lockdowns[lockdown][0], "%Y-%m-%d").date()
-            )
-            & (
-                regression_data.index
-                <= datetime.strptime(dates_lockdowns[lockdown][1], "%Y-%m-%d").date()
-            )
-        ).astype(int)
+        first_day, last_day = day_number(dates_lockdowns[lockdown])
+        regression_data[lockdown] = ((days >= first_day) & (days <= last_day)).astype(
+            int
+        )
         regression_data[lockdown_7days_moving_average_name] = (
-            (
-                regression_data.index
-                >= datetime.strptime(dates_lockdowns[lockdown][0], "%Y-%m-%d").date()
-            )
-            & (
-                regression_data.index
-                <= datetime.strptime(dates_lockdowns[lockdown][1], "%Y-%m-%d").date()
-                - timedelta(7)
-            )
+            (days >= first_day) & (days <= last_day - 7)
         ).astype(int)
 
-        regression_data[lockdown_duration_name] = 0
-        regression_data.loc[regression_data[lockdown] == 1, lockdown_duration_name] = (
-            regression_data.loc[regression_data[lockdown] == 1].reset_index().index + 1
+        # Days since the start of the lockdown, counting from 1
+        regression_data[lockdown_duration_name] = (
+            regression_data[lockdown].cumsum() * regression_data[lockdown]
+        )
+        regression_data[lockdown_7days_moving_average_duration_name] = (
+            regression_data[lockdown_7days_moving_average_name].cumsum()
+            * regression_data[lockdown_7days_moving_average_name]
+        )
+
+    # Lags are built on all days of the stringency and infection data, before the
+    # sample is restricted, so the first days of the sample have all lags
+    if distributed_lags is not None:
+        lag_panel = align_sources(
+            [stringency_data, infection_data.reset_index().assign(country="Germany")],
+            entity="country",
         )
-        regression_data[lockdown_7days_moving_average_duration_name] = 0
-        regression_data.loc[
-            regression_data[lockdown_7days_moving_average_name] == 1,
-            lockdown_7days_moving_average_duration_name,
-        ] = (
-            regression_data.loc[
-                regression_data[lockdown_7days_moving_average_name] == 1
-            ]
-            .reset_index()
-            .index
-            + 1
+        lag_data = panel_to_frame(lag_panel, dropna=False).loc["Germany"]
+        lags = distributed_lag_design(
+            lag_data.reset_index(),
+            distributed_lags["variables"],
+            distributed_lags["max_lag"],
         )
+        lags.index = lag_data.index
+        regression_data = regression_data.join(lags)
 
     if first_last_day is not None:
-        regression_data = regression_data.loc[
-            regression_data.index
-            >= datetime.strptime(first_last_day[0], "%Y-%m-%d").date(),
-        ]
-        regression_data = regression_data.loc[
-            regression_data.index
-            <= datetime.strptime(first_last_day[1], "%Y-%m-%d").date(),
-        ]
+        first_day, last_day = day_number(first_last_day)
+        regression_data = regression_data.loc[(days >= first_day) & (days <= last_day)]
 
     return regression_data
 
 
 @pytask.mark.depends_on(
     {
-        "eu_composed_data_country_level": BLD
-        / "data"
-        / "eu_composed_data_country_level.pkl",
+        "eu_country_level": BLD / "data" / "eu_country_level" / "partitions.json",
         "stringency_data": BLD / "data" / "german_stringency_data.pkl",
         "dates_lockdowns": SRC / "model_specs" / "time_lockdowns.pkl",
+        "infection_data": BLD / "data" / "infection_data.pkl",
+        "regression_specifications": SRC
+        / "model_specs"
+        / "regression_specifications.ini",
     }
 )
 @pytask.mark.produces(BLD / "data" / "regression_data.pkl")
 def task_create_regression_data(depends_on, produces):
-    eu_composed_country_level = pd.read_pickle(
-        depends_on["eu_composed_data_country_level"]
+    # Read the German partition only
+    germany_composed_country_level = read_partitions(
+        depends_on["eu_country_level"], keys=["Germany"]
     )
     stringency_data = pd.read_pickle(depends_on["stringency_data"])
     dates_lockdowns = pd.read_pickle(depends_on["dates_lockdowns"])
+    infection_data = pd.read_pickle(depends_on["infection_data"]).loc["Germany"]
+    specifications = read_specifications(depends_on["regression_specifications"])
     regression_data = prepare_regression_data(
-        data_composed=eu_composed_country_level,
+        data_composed=germany_composed_country_level,
         stringency_data=stringency_data,
         dates_lockdowns=dates_lockdowns,
         first_last_day=["2020-02-15", "2021-02-22"],
+        infection_data=infection_data[["new_cases_avg_7d"]],
+        distributed_lags=specifications["distributed_lags"],
     )
     regression_data.to_pickle(produces)
     # regression_data.to_csv(produces)
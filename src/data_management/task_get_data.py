@@ -4,37 +4,160 @@ The data collected here includes:\n
 1. Google mobility index\n
 2. Our World in Data (OWID) infection numbers\n
 3. Our World in Data (OWID) stringency index\n
+All sources are downloaded concurrently and streamed to disk. With GOOGLE_SOURCE set
+to "regional" the Google data is taken from the archive with one file per country, of
+which only the european countries are read.\n
+The Google and OWID data are stored as zstd compressed snapshots in
+original_data/snapshots, one per download with a distinct content, and the current
+version is published as google_data.csv.zst and owid_data.csv.zst. Only the
+KEEP_SNAPSHOTS most recent snapshots of a source are kept, up to MAX_SNAPSHOT_BYTES.
 """
 import re
+import tempfile
+import zipfile
 from datetime import datetime
 from datetime import timedelta
+from pathlib import Path
 
 import pandas as pd
 import pytask
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
 
 from src.config import SRC
+from src.library.downloads import concatenate_zip_members
+from src.library.downloads import download_all
+from src.library.downloads import regional_report_members
+from src.library.snapshots import apply_retention
+from src.library.snapshots import publish_snapshot
+from src.library.snapshots import write_snapshot
 
 google_url = "https://www.gstatic.com/covid19/mobility/Global_Mobility_Report.csv"
+google_regional_url = (
+    "https://www.gstatic.com/covid19/mobility/Region_Mobility_Report_CSVs.zip"
+)
 owid_url = "https://covid.ourworldindata.org/data/owid-covid-data.csv"
 
+# "global" downloads the global mobility report, "regional" the archive with one csv
+# file per country and year of which only the european countries are read
+GOOGLE_SOURCE = "global"
+
+# ISO 3166-1 alpha-2 codes of the european countries of the analysis
+european_country_codes = [
+    "AT",
+    "BA",
+    "BE",
+    "BG",
+    "BY",
+    "CH",
+    "CZ",
+    "DE",
+    "DK",
+    "ES",
+    "FI",
+    "FR",
+    "GB",
+    "GE",
+    "GR",
+    "HR",
+    "HU",
+    "IE",
+    "IT",
+    "LI",
+    "LT",
+    "LU",
+    "LV",
+    "MD",
+    "MK",
+    "MT",
+    "NL",
+    "NO",
+    "PL",
+    "PT",
+    "RO",
+    "RS",
+    "RU",
+    "SE",
+    "SI",
+    "SK",
+    "TR",
+    "UA",
+]
+
+# Retention policy of the snapshots of every source
+KEEP_SNAPSHOTS = 5
+MAX_SNAPSHOT_BYTES = 5 * 2**30
+
+original_data = SRC / "original_data"
+snapshots = original_data / "snapshots"
+sources = {
+    "google": (google_url, original_data / "google_data.csv.zst")
+    if GOOGLE_SOURCE == "global"
+    else (google_regional_url, original_data / "google_regional_data.zip"),
+    "owid": (owid_url, original_data / "owid_data.csv.zst"),
+    "stringency": (None, original_data / "stringency_index_data.json"),
+}
+
+
+def store_snapshot(path, current):
+    """Store a downloaded csv file as snapshot and publish it as current version
+
+    Args:
+        path (pathlib.Path): path of the downloaded file, e.g. "google_data.csv"
+        current (pathlib.Path): path of the current version, e.g. "google_data.csv.zst"
+    """
+    snapshot = write_snapshot(path, snapshots, suffix=current.suffix)
+    publish_snapshot(snapshot, current)
+    apply_retention(
+        snapshots,
+        path.name.split(".")[0],
+        keep=KEEP_SNAPSHOTS,
+        max_bytes=MAX_SNAPSHOT_BYTES,
+    )
 
-@pytask.mark.produces(SRC / "original_data" / "google_data.csv")
-def task_get_google_data(produces):
-    df = pd.read_csv(google_url)
-    df.to_csv(produces)
-
-
-@pytask.mark.produces(SRC / "original_data" / "owid_data.csv")
-def task_get_owid_data(produces):
-    df = pd.read_csv(owid_url)
-    df.to_csv(produces)
 
+@pytask.mark.resources(kind="io")
+@pytask.mark.produces({name: path for name, (_, path) in sources.items()})
+def task_download_sources(produces):
+    urls = {name: url for name, (url, _) in sources.items()}
+    urls["stringency"] = find_stringency_url()
+
+    # Compressed sources are downloaded to a temporary file and stored as snapshot
+    with tempfile.TemporaryDirectory(dir=original_data) as temporary:
+        downloads = {
+            name: Path(temporary) / produces[name].stem
+            if produces[name].suffix == ".zst"
+            else produces[name]
+            for name in urls
+        }
+        download_all({downloads[name]: url for name, url in urls.items()})
+        for name, path in downloads.items():
+            if path != produces[name]:
+                store_snapshot(path, produces[name])
+
+
+if GOOGLE_SOURCE == "regional":
+
+    @pytask.mark.depends_on(sources["google"][1])
+    @pytask.mark.produces(original_data / "google_data.csv.zst")
+    def task_extract_european_google_data(depends_on, produces):
+        with zipfile.ZipFile(depends_on) as archive:
+            names = archive.namelist()
+        members = regional_report_members(names, european_country_codes)
+        with tempfile.TemporaryDirectory(dir=original_data) as temporary:
+            path = Path(temporary) / produces.stem
+            concatenate_zip_members(depends_on, members, path)
+            store_snapshot(path, produces)
+
+
+def find_stringency_url():
+    """Find the url of the data behind the OWID stringency index chart
+
+    Returns:
+        str: url of the data of the chart
+    """
+    # Scraping dependencies are heavy, import them only when the task runs
+    from bs4 import BeautifulSoup
+    from selenium import webdriver
 
-@pytask.mark.produces(SRC / "original_data" / "stringency_index_data.csv")
-def task_get_stringency_index_data(produces):
     driver = webdriver.Firefox()
     driver.get("https://ourworldindata.org/grapher/covid-stringency-index")
     source_code = driver.page_source
@@ -47,11 +170,15 @@ def task_get_stringency_index_data(produces):
 
     link_csv = re.findall('href="(.*?)"', str(link_relevant))[0]
 
-    # Extract relevant data
     base_url = "https://ourworldindata.org"
-    csv_url = base_url + link_csv
-    stringency_response = requests.get(csv_url)
-    data_unformatted = stringency_response.content
+    return base_url + link_csv
+
+
+@pytask.mark.depends_on(sources["stringency"][1])
+@pytask.mark.produces(original_data / "stringency_index_data.csv")
+def task_get_stringency_index_data(depends_on, produces):
+    # Read the downloaded data
+    data_unformatted = depends_on.read_bytes()
 
     # Convert into string
     data_unformatted = data_unformatted.decode("UTF-8")
@@ -1,17 +1,26 @@
 """Clean and format the previously downloaded data sets for the analysis.
 
 """
-from datetime import datetime
-
 import numpy as np
 import pandas as pd
 import pytask
+from utils import clean_google_data
+from utils import create_moving_average
+from utils import prepare_country_level_data
+from utils import prepare_infection_data
 
 from src.config import BLD
+from src.config import N_WORKERS
 from src.config import SRC
-
-from utils import create_date
-from utils import create_moving_average
+from src.library.calendar_dimension import calendar_flags
+from src.library.calendar_dimension import load_calendar
+from src.library.epidemics import add_epidemic_metrics
+from src.library.parallel import granted_workers
+from src.library.partitions import partition_paths
+from src.library.partitions import write_partition_index
+from src.library.partitions import write_partitioned
+from src.library.sharding import map_shards
+from src.library.sharding import split_by_level
 
 
 # Take european countries list from google data
@@ -113,50 +122,38 @@ list_east_germany = [
 ]
 
 
-@pytask.mark.depends_on(SRC / "original_data" / "owid_data.csv")
+@pytask.mark.depends_on(SRC / "original_data" / "owid_data.csv.zst")
 @pytask.mark.produces(BLD / "data" / "infection_data.pkl")
 def task_prepare_owid_data(depends_on, produces):
     # Load in OWID data
     owid_data = pd.read_csv(depends_on)
 
     # Keep only european countries which are in the Google data
-    eu_infect_numbers = owid_data.query("location in @european_countries")
-
-    # Rename location to country
-    eu_infect_numbers = eu_infect_numbers.rename(columns={"location": "country"})
-
-    # Take only columns we need (so far)
-    eu_infect_numbers = eu_infect_numbers.loc[
-        :, ("country", "date", "total_cases", "new_cases")
-    ]
-
-    # Make date a datetime object
-    eu_infect_numbers["date"] = list(
-        map(lambda x: datetime.strptime(x, "%Y-%m-%d"), eu_infect_numbers["date"])
-    )
+    eu_owid_data = owid_data.query("location in @european_countries")
+    eu_infect_numbers = prepare_infection_data(eu_owid_data)
 
-    # Use MultiIndex for better overview
-    eu_infect_numbers = eu_infect_numbers.set_index(["country", "date"])
-
-    # Generate 7-day simple moving average
-    create_moving_average(
-        eu_infect_numbers, ["new_cases"], "country", kind="forward", time=7
-    )
+    # Add incidence, growth rate and reproduction number of all countries at once
+    population = eu_owid_data.groupby("location")["population"].last()
+    eu_infect_numbers = add_epidemic_metrics(eu_infect_numbers, population)
 
     # Save dataframe as pickle file
     eu_infect_numbers.to_pickle(produces)
 
 
+@pytask.mark.resources(cpus=N_WORKERS)
 @pytask.mark.depends_on(
     {
-        "google": SRC / "original_data" / "google_data.csv",
+        "google": SRC / "original_data" / "google_data.csv.zst",
         "infection": BLD / "data" / "infection_data.pkl",
+        "calendar": BLD / "data" / "calendar.npz",
     }
 )
 @pytask.mark.produces(
     {
         "german_states": BLD / "data" / "german_states_data.pkl",
-        "eu_country_level": BLD / "data" / "eu_composed_data_country_level.pkl",
+        "eu_country_level": BLD / "data" / "eu_country_level" / "partitions.json",
+        # One partition per country, so pytask rebuilds deleted or modified ones
+        **partition_paths(BLD / "data" / "eu_country_level", european_countries),
     }
 )
 def task_prepare_data(depends_on, produces):
@@ -166,36 +163,20 @@ def task_prepare_data(depends_on, produces):
     # Keep only european countries in the dataset
     eu_data = google_data.query("country_region in @european_countries")
 
-    # Replace NaN with "country" in "sub_region_1" column
-    eu_data["sub_region_1"] = eu_data["sub_region_1"].replace(np.nan, "country")
+    # Sort by country and date, so countries are selected without scanning the index
+    eu_data = clean_google_data(eu_data).sort_index()
 
-    # Drop census_fips_code (contains no information)
-    eu_data.drop("census_fips_code", axis=1)
-
-    # Rename variables
-    eu_data.columns = map(
-        lambda x: x.replace("_percent_change_from_baseline", ""), eu_data.columns
+    # Flag public holidays and summer vacations of states, or of the country for rows
+    # without state, by lookup in the calendar
+    calendar = load_calendar(depends_on["calendar"])
+    region_codes = eu_data["iso_3166_2_code"].where(
+        eu_data["iso_3166_2_code"] != "nan", eu_data["country_region_code"]
     )
-    eu_data.rename(columns={"country_region": "country"}, inplace=True)
-
-    # Drop census_fips_code because contains only NaN's
-    eu_data = eu_data.drop(["census_fips_code"], axis=1)
-
-    # Change datatypes of some columns to string
-    eu_data[
-        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code", "place_id"]
-    ] = eu_data[
-        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code", "place_id"]
-    ].astype(
-        str
+    flags = calendar_flags(
+        calendar, region_codes, eu_data.index.get_level_values("date")
     )
-
-    # Create date variables
-    eu_data = create_date(eu_data)
-
-    # Use MultiIndex for better overview
-    eu_data = eu_data.set_index(["country", "date"])
-    eu_data = eu_data.drop("date_str", axis=1)
+    for kind, values in flags.items():
+        eu_data[kind] = values
 
     # reate dataset for state-level comparison
     germany_state_level = eu_data.loc["Germany"]
@@ -205,7 +186,7 @@ def task_prepare_data(depends_on, produces):
     germany_state_level = germany_state_level.rename(columns={"sub_region_1": "state"})
 
     germany_state_level = germany_state_level.reset_index()
-    germany_state_level = germany_state_level.set_index(["state", "date"])
+    germany_state_level = germany_state_level.set_index(["state", "date"]).sort_index()
 
     germany_state_level.loc[list_city_states, "city_noncity"] = "city state"
     germany_state_level.loc[list_non_city_states, "city_noncity"] = "territorial state"
@@ -233,51 +214,35 @@ def task_prepare_data(depends_on, produces):
     )
     germany_state_level.to_pickle(produces["german_states"])
 
-    # Create dataset for comparison between different european countries
-    eu_country_level_data = eu_data[eu_data["sub_region_1"] == "country"]
-    eu_country_level_data = eu_country_level_data.loc[
-        eu_country_level_data["metro_area"] == "nan",
-    ]
-    eu_country_level_data = eu_country_level_data.drop(
-        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code"], axis=1
+    # Create dataset for comparison between different european countries, each
+    # country is prepared on its own shard of the process pool
+    eu_infect_numbers = pd.read_pickle(depends_on["infection"])
+    eu_composed_data_country_level = map_shards(
+        prepare_country_level_data,
+        split_by_level(eu_data, "country"),
+        n_workers=granted_workers(N_WORKERS),
+        infect_numbers=eu_infect_numbers,
     )
+    eu_composed_data_country_level = eu_composed_data_country_level.reset_index()
 
-    # Create moving average
-    eu_country_level_data = create_moving_average(
-        eu_country_level_data,
-        [
-            "retail_and_recreation",
-            "grocery_and_pharmacy",
-            "parks",
-            "transit_stations",
-            "workplaces",
-            "residential",
-        ],
-        "country",
-        kind="forward",
+    # Export the data with one pickle file per country
+    partitions = write_partitioned(
+        eu_composed_data_country_level,
+        column="country",
+        directory=produces["eu_country_level"].parent,
     )
-
-    # Load in infection numbers
-    eu_infect_numbers = pd.read_pickle(depends_on["infection"])
-    # eu_infect_numbers = eu_infect_numbers.set_index(["country", "date"])
-
-    # Join the two datasets
-    eu_composed_data_country_level = eu_country_level_data.join(eu_infect_numbers)
-    eu_composed_data_country_level = eu_composed_data_country_level.reset_index()
-    eu_composed_data_country_level = eu_composed_data_country_level.drop(
-        "Unnamed: 0", axis=1
+    write_partition_index(
+        partitions,
+        produces["eu_country_level"],
+        rows=eu_composed_data_country_level.groupby("country").size(),
     )
 
-    # Export the data to pickle format
-    eu_composed_data_country_level.to_pickle(produces["eu_country_level"])
-
 
 @pytask.mark.depends_on(SRC / "original_data" / "stringency_index_data.csv")
 @pytask.mark.produces(BLD / "data" / "german_stringency_data.pkl")
 def task_prepare_stringency_data(depends_on, produces):
     stringency_data = pd.read_csv(depends_on)
-    stringency_data = create_date(stringency_data, "date")
-    stringency_data["date"] = stringency_data["date"].apply(lambda x: x.date())
+    stringency_data["date"] = pd.to_datetime(stringency_data["date"], format="%Y-%m-%d")
     stringency_data = stringency_data.set_index(["country", "date"])
     stringency_data = stringency_data.sort_index()
 
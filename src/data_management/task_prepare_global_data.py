@@ -0,0 +1,140 @@
+"""Prepare the full global mobility report out of core.
+
+The global report is too large to be prepared in memory at once. It is therefore split
+into one partition per country, reading the csv file in chunks which fit into a fixed
+memory budget. Afterwards each country is prepared on its own: date variables, 7-day
+moving averages for the country and all of its sub-regions and the join with the OWID
+infection numbers. Peak memory is bounded by the largest country, not by the number of
+countries.
+
+OWID and Google name some countries differently. The OWID names are renamed to the
+Google names, and countries without OWID infection numbers raise a warning.
+
+"""
+import warnings
+
+import pandas as pd
+import pytask
+from utils import clean_google_data
+from utils import create_moving_average
+from utils import prepare_infection_data
+
+from src.config import BLD
+from src.config import SRC
+from src.library.partitions import partition_csv
+from src.library.partitions import partition_file_name
+from src.library.partitions import read_partition_index
+from src.library.partitions import write_partition_index
+
+# Memory budget in bytes for one chunk of the global mobility report
+MEMORY_BUDGET = 256 * 1024**2
+
+# Only empty fields are missing, e.g. "NA" is the code of Namibia
+NA_OPTIONS = {"keep_default_na": False, "na_values": [""]}
+
+# OWID locations whose name in the Google data differs
+owid_locations = {
+    "Cote d'Ivoire": "Côte d'Ivoire",
+    "Czech Republic": "Czechia",
+    "Myanmar": "Myanmar (Burma)",
+    "Bahamas": "The Bahamas",
+}
+
+mobility_variables = [
+    "retail_and_recreation",
+    "grocery_and_pharmacy",
+    "parks",
+    "transit_stations",
+    "workplaces",
+    "residential",
+]
+
+
+def prepare_country_partition(google_data, infect_numbers):
+    """Prepare the mobility data of one country and all of its sub-regions
+
+    Args:
+        google_data (pandas.DataFrame): Google mobility data of one country as
+        downloaded
+        infect_numbers (pandas.DataFrame): output of prepare_infection_data
+
+    Returns:
+        pandas.DataFrame: mobility data with moving averages and infection numbers,
+        sorted by region and date
+    """
+    data = clean_google_data(google_data).reset_index()
+
+    # Identify the country itself and each of its sub-regions
+    region_parts = data[["sub_region_1", "sub_region_2", "metro_area"]].replace(
+        {"country": "", "nan": ""}
+    )
+    data["region"] = (
+        region_parts["sub_region_1"]
+        .str.cat(region_parts[["sub_region_2", "metro_area"]], sep=", ")
+        .str.strip(", ")
+        .replace("", "country")
+    )
+
+    data = data.set_index(["region", "date"]).sort_index()
+    data = create_moving_average(data, mobility_variables, "region", kind="forward")
+
+    # Join infection numbers on country level
+    data = data.reset_index().merge(
+        infect_numbers.reset_index(), on=["country", "date"], how="left"
+    )
+
+    return data
+
+
+@pytask.mark.depends_on(SRC / "original_data" / "google_data.csv.zst")
+@pytask.mark.produces(BLD / "data" / "global" / "google_partitions.json")
+def task_partition_google_data(depends_on, produces):
+    partitions = partition_csv(
+        depends_on,
+        column="country_region",
+        directory=produces.parent / "google",
+        memory_budget=MEMORY_BUDGET,
+        **NA_OPTIONS,
+    )
+    write_partition_index(partitions, produces)
+
+
+@pytask.mark.depends_on(
+    {
+        "google_partitions": BLD / "data" / "global" / "google_partitions.json",
+        "owid": SRC / "original_data" / "owid_data.csv.zst",
+    }
+)
+@pytask.mark.produces(BLD / "data" / "global" / "mobility_partitions.json")
+def task_prepare_global_data(depends_on, produces):
+    # Infection numbers of all countries are small compared to the mobility report
+    owid_data = pd.read_csv(
+        depends_on["owid"], usecols=["location", "date", "total_cases", "new_cases"]
+    )
+    owid_data["location"] = owid_data["location"].replace(owid_locations)
+    infect_numbers = prepare_infection_data(owid_data)
+    owid_countries = set(infect_numbers.index.get_level_values("country"))
+
+    directory = produces.parent / "mobility"
+    directory.mkdir(parents=True, exist_ok=True)
+
+    prepared_partitions, rows = {}, {}
+    without_infections = []
+    for country, path in read_partition_index(depends_on["google_partitions"]).items():
+        google_data = pd.read_csv(path, low_memory=False, **NA_OPTIONS)
+        if country not in owid_countries:
+            without_infections.append(country)
+        country_data = prepare_country_partition(google_data, infect_numbers)
+
+        prepared_path = directory / partition_file_name(country, ".pkl")
+        country_data.to_pickle(prepared_path)
+        prepared_partitions[country] = prepared_path
+        rows[country] = len(country_data)
+
+    write_partition_index(prepared_partitions, produces, rows=rows)
+
+    if without_infections:
+        warnings.warn(
+            f"No OWID infection numbers for {without_infections}, their cases are "
+            "missing. Add their OWID names to owid_locations if OWID has them."
+        )
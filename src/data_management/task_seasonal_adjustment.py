@@ -0,0 +1,51 @@
+"""Seasonally adjust the mobility series of the dense panels.
+
+Mobility has a strong weekly cycle. As an alternative to the 7-day moving averages,
+the weekday profile of every series, e.g. "workplaces", is removed and stored as
+"workplaces_sa" in a separate dense panel with the same entities and days.
+
+"""
+import pytask
+
+from src.config import BLD
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import save_dense_panel
+from src.library.panel_store import slice_panel
+from src.library.seasonality import weekday_decomposition
+
+
+panels = ["eu_country_level", "german_states"]
+
+
+@pytask.mark.parametrize(
+    "depends_on, produces",
+    [
+        (
+            {
+                "values": BLD / "data" / "panels" / f"{name}.npy",
+                "index": BLD / "data" / "panels" / f"{name}.json",
+            },
+            {
+                "values": BLD / "data" / "panels" / f"{name}_sa.npy",
+                "index": BLD / "data" / "panels" / f"{name}_sa.json",
+            },
+        )
+        for name in panels
+    ],
+)
+def task_seasonal_adjustment(depends_on, produces):
+    panel = load_dense_panel(depends_on["values"])
+
+    # Adjust every series for which a 7-day moving average exists
+    metrics = [
+        metric for metric in panel["metrics"] if f"{metric}_avg_7d" in panel["metrics"]
+    ]
+    panel = slice_panel(panel, metrics=metrics)
+    decomposition = weekday_decomposition(panel["values"], panel["dates"])
+
+    adjusted_panel = {
+        **panel,
+        "values": decomposition["adjusted"],
+        "metrics": [f"{metric}_sa" for metric in metrics],
+    }
+    save_dense_panel(adjusted_panel, produces["values"])
@@ -0,0 +1,76 @@
+"""
+This task publishes the prepared data sets and the regression estimates to an SQLite
+database, bld/database/covid_mobility.sqlite, which can be queried with SQL without
+unpickling the data sets.
+
+The German states and the European countries are keyed by (state, date) and
+(country, date) and only days after the last exported day of every entity are
+written, together with a window of recent days whose moving averages or figures may
+have changed since the last export. The regression data depends on the
+specifications and the estimates are small, so their tables are replaced on every
+export.
+
+"""
+from contextlib import closing
+
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.library.database import connect
+from src.library.database import export_new_days
+from src.library.database import replace_table
+from src.library.partitions import read_partition_index
+from src.library.results_store import load_regression_results
+from src.library.results_store import regression_results_to_frames
+
+
+@pytask.mark.depends_on(
+    {
+        "german_states": BLD / "data" / "german_states_data.pkl",
+        "eu_country_level": BLD / "data" / "eu_country_level" / "partitions.json",
+        "regression_data": BLD / "data" / "regression_data.pkl",
+        "regression_results": BLD / "tables" / "regression_results.npz",
+    }
+)
+@pytask.mark.produces(BLD / "database" / "covid_mobility.sqlite")
+def task_export_database(depends_on, produces):
+    with closing(connect(produces)) as connection:
+        export_new_days(
+            connection,
+            "german_states",
+            pd.read_pickle(depends_on["german_states"]),
+            entity="state",
+        )
+        # One country at a time, so only one partition is held in memory
+        for path in read_partition_index(depends_on["eu_country_level"]).values():
+            export_new_days(
+                connection,
+                "eu_country_level",
+                pd.read_pickle(path),
+                entity="country",
+            )
+
+        regression_data = pd.read_pickle(depends_on["regression_data"])
+        replace_table(
+            connection,
+            "regression_data",
+            regression_data.rename_axis("date").reset_index(),
+            keys=["date"],
+        )
+
+        estimates, statistics = regression_results_to_frames(
+            load_regression_results(depends_on["regression_results"])
+        )
+        replace_table(
+            connection,
+            "regression_estimates",
+            estimates,
+            keys=["outcome", "specification", "term"],
+        )
+        replace_table(
+            connection,
+            "regression_statistics",
+            statistics,
+            keys=["outcome", "specification"],
+        )
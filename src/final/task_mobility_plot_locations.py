@@ -6,19 +6,16 @@ and Pharmacy", "Workplaces", "Parks", "Transit Stations" and "Residential"\n
 "City vs Territorial", "Former BRD vs DDR states" and "North-East-South-West comparison"
 \n
 """
-import matplotlib.pyplot as plt
 import pandas as pd
 import pytask
-import seaborn as sns
-from estimagic.visualization.colors import get_colors
 from utils import mobility_plot
 
 from src.config import BLD
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import panel_to_frame
+from src.library.panel_store import slice_panel
 
 
-# Function for plots
-colors = get_colors("categorical", 12)
-
 titles = [
     "Retail and Recreation (7d-average)",
     "Grocery and Pharmacy (7d-average)",
@@ -37,16 +34,24 @@ varlist_moving_avg = [
     "transit_stations_avg_7d",
 ]
 
-@pytask.mark.depends_on(BLD / "data" / "eu_composed_data_country_level.pkl")
+eu_panel = {
+    "values": BLD / "data" / "panels" / "eu_country_level.npy",
+    "index": BLD / "data" / "panels" / "eu_country_level.json",
+}
+
+
+@pytask.mark.depends_on(eu_panel)
 @pytask.mark.produces(
     BLD / "figures" / "German_Mobility" / "plot_overall_german_mobility.png"
 )
 def task_plot_german_mobility(depends_on, produces):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    # Load EU data and keep German data only
-    eu_country_level_data = pd.read_pickle(depends_on)
-    eu_country_level_data = eu_country_level_data.set_index(["country", "date"])
-    germany_country_level_data = eu_country_level_data.loc["Germany"]
+    # Map EU panel and keep German data only
+    germany_country_level_data = panel_to_frame(
+        slice_panel(load_dense_panel(depends_on["values"]), entities=["Germany"])
+    ).loc["Germany"]
 
     fig, ax = plt.subplots(figsize=(15, 8))
 
@@ -99,6 +104,11 @@ de_products = {
 @pytask.mark.depends_on(BLD / "data" / "german_states_data.pkl")
 @pytask.mark.produces(de_products)
 def task_plot_german_states_mobility(depends_on, produces):
+    import matplotlib.pyplot as plt
+    from estimagic.visualization.colors import get_colors
+
+    colors = get_colors("categorical", 12)
+
     # Load EU data and keep German data only
     germany_state_level = pd.read_pickle(depends_on)
     germany_state_level = germany_state_level.reset_index(0)
@@ -156,18 +166,24 @@ eu_products = {
 }
 
 
-@pytask.mark.depends_on(BLD / "data" / "eu_composed_data_country_level.pkl")
+@pytask.mark.depends_on(eu_panel)
 @pytask.mark.produces(eu_products)
 def task_plot_european_countries(depends_on, produces):
-    # Load in data
-    eu_complete_data = pd.read_pickle(depends_on)
-    eu_complete_data = eu_complete_data.set_index(["country", "date"])
+    import matplotlib.pyplot as plt
+    from estimagic.visualization.colors import get_colors
+
+    colors = get_colors("categorical", 12)
+
+    # Map EU panel
+    eu_panel_data = load_dense_panel(depends_on["values"])
 
     small = ["Germany", "Netherlands", "Austria", "Sweden", "Denmark"]
     large = ["Germany", "France", "United Kingdom", "Italy", "Spain"]
 
     mobility_plot(
-        data_set=eu_complete_data.loc[small].reset_index(0), 
+        data_set=panel_to_frame(
+            slice_panel(eu_panel_data, entities=small, metrics=varlist_moving_avg)
+        ).reset_index(0),
         var_list_moving_avg=varlist_moving_avg, 
         titles=titles, 
         colors=colors, 
@@ -176,7 +192,9 @@ def task_plot_european_countries(depends_on, produces):
     plt.savefig(produces["small"])
 
     mobility_plot(
-        data_set=eu_complete_data.loc[large].reset_index(0), 
+        data_set=panel_to_frame(
+            slice_panel(eu_panel_data, entities=large, metrics=varlist_moving_avg)
+        ).reset_index(0),
         var_list_moving_avg=varlist_moving_avg, 
         titles=titles, 
         colors=colors, 
@@ -0,0 +1,111 @@
+"""Align data sets of several sources on a dense (entity x day) grid.
+
+Days are identified by one canonical integer key, the number of days since 1970-01-01.
+Dates are converted to this key once, when a source enters the grid, whatever their
+representation (strings, datetime64 or datetime.date objects). Afterwards days are
+compared, shifted and joined as integers.
+
+The Google mobility data, the OWID infection numbers and the stringency index are
+aligned by computing the position of every row on the grid from its entity and day,
+position = entity * n_days + (day - first_day), and writing the metrics of all sources
+to these positions. The result is a panel in the format of
+:func:`src.library.panel_store.load_dense_panel`.
+
+"""
+import numpy as np
+import pandas as pd
+
+
+def day_number(dates):
+    """Number of days since 1970-01-01.
+
+    Args:
+        dates (array-like): dates
+
+    Returns:
+        numpy.ndarray: integer days
+    """
+    return np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").astype(np.int64)
+
+
+def day_dates(days):
+    """Dates of integer days.
+
+    Args:
+        days (array-like): integer days, see :func:`day_number`
+
+    Returns:
+        pandas.DatetimeIndex: dates
+    """
+    return pd.DatetimeIndex(np.asarray(days, dtype="datetime64[D]"))
+
+
+def align_sources(sources, entity, date="date", span="union"):
+    """Align the numeric variables of several sources on one dense grid.
+
+    Args:
+        sources (list): long format data frames, entity and date may be columns or
+            index levels. All numeric variables except entity and date are metrics,
+            their names must differ between the sources.
+        entity (str): name of the entity variable, e.g. "country"
+        date (str): name of the date variable. Defaults to "date".
+        span (str): "union" for the days from the first to the last day of any source
+            or "intersection" for the days which are covered by all sources. Defaults
+            to "union".
+
+    Returns:
+        dict: panel with "values" of shape (entity, day, metric), missing if a source
+        has no row for an entity and day, "entity", "entities", "dates" and "metrics"
+    """
+    frames, days = [], []
+    for source in sources:
+        frame = source.reset_index() if entity not in source.columns else source
+        frames.append(frame)
+        days.append(day_number(frame[date]))
+
+    if span == "union":
+        first_day = min(day.min() for day in days)
+        last_day = max(day.max() for day in days)
+    elif span == "intersection":
+        first_day = max(day.min() for day in days)
+        last_day = min(day.max() for day in days)
+    else:
+        raise ValueError(f"span must be 'union' or 'intersection', not {span}.")
+    n_days = max(last_day - first_day + 1, 0)
+
+    entities = np.unique(np.concatenate([frame[entity].to_numpy() for frame in frames]))
+    source_metrics = [
+        [
+            column
+            for column in frame.select_dtypes(include=["number", "bool"]).columns
+            if column not in (entity, date)
+        ]
+        for frame in frames
+    ]
+    metrics = [metric for names in source_metrics for metric in names]
+    if len(set(metrics)) < len(metrics):
+        raise ValueError("The sources have metrics with the same name.")
+
+    values = np.full((len(entities) * n_days, len(metrics)), np.nan)
+    column = 0
+    for frame, day, names in zip(frames, days, source_metrics):
+        inside = (day >= first_day) & (day <= last_day)
+        positions = (
+            np.searchsorted(entities, frame[entity].to_numpy()[inside]) * n_days
+            + day[inside]
+            - first_day
+        )
+        if len(np.unique(positions)) < len(positions):
+            raise ValueError(f"A source has several rows per {entity} and day.")
+
+        columns = slice(column, column + len(names))
+        values[positions, columns] = frame[names].to_numpy(dtype=float)[inside]
+        column += len(names)
+
+    return {
+        "values": values.reshape(len(entities), n_days, len(metrics)),
+        "entity": entity,
+        "entities": entities.tolist(),
+        "dates": day_dates(np.arange(first_day, first_day + n_days)),
+        "metrics": metrics,
+    }
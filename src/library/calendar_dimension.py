@@ -0,0 +1,211 @@
+"""Public holidays and summer vacations as a calendar table keyed by region and day.
+
+The holidays are declared in *src/model_specs/holidays.csv*, one row per region, name,
+kind ("public_holiday" or "summer_vacation") and rule. A rule is either\n
+1. a fixed date of every year, e.g. "12-25",\n
+2. a day relative to Easter Sunday of every year, e.g. "easter-2" for Good Friday,\n
+3. a single date, e.g. "2020-05-08", or a range of dates including both ends, e.g.
+   "2020-07-27/2020-09-07".\n
+
+Regions are ISO 3166-1 alpha-2 codes of countries, e.g. "DE", or ISO 3166-2 codes of
+their subdivisions, e.g. "DE-BY". The rows of a country also apply to all of its
+subdivisions.
+
+A kind is declared for a region in the years of its rules, all years for fixed and
+Easter rules and the years of the dates for the other rules. The rows of a declared
+year must list all days of the kind. Flags of a kind are 0 or 1 in the declared years
+of a region and missing in all others, e.g. summer vacations are missing outside of
+the years with declared vacations and for regions without any.
+
+The calendar is a dense array of flags with one row per region and one column per
+day. Days are integers, the number of days since 1970-01-01, so the flags of any
+(region, day) pair are found by an index lookup instead of date logic per row.
+Regions which are not declared have missing flags.
+
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.library.alignment import day_number
+
+KINDS = ["public_holiday", "summer_vacation"]
+
+EASTER_RULE = re.compile(r"easter(?P<offset>[+-]\d+)?")
+FIXED_RULE = re.compile(r"(?P<month>\d{2})-(?P<day>\d{2})")
+
+
+def easter_sunday(year):
+    """Date of Easter Sunday in the Gregorian calendar.
+
+    Args:
+        year (int): year
+
+    Returns:
+        datetime.date: Easter Sunday
+    """
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher)
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return pd.Timestamp(year, month, day + 1).date()
+
+
+def rule_years(rule, years):
+    """Years in which a rule declares its kind.
+
+    Args:
+        rule (str): rule, see the module docstring
+        years (list): years of fixed and Easter rules
+
+    Returns:
+        list: years
+    """
+    rule = rule.strip()
+    if EASTER_RULE.fullmatch(rule) or FIXED_RULE.fullmatch(rule):
+        return list(years)
+    start, _, end = rule.partition("/")
+    return list(range(pd.Timestamp(start).year, pd.Timestamp(end or start).year + 1))
+
+
+def rule_days(rule, years):
+    """Days on which a rule applies.
+
+    Args:
+        rule (str): rule, see the module docstring
+        years (list): years of fixed and Easter rules
+
+    Returns:
+        numpy.ndarray: integer days, see :func:`src.library.alignment.day_number`
+    """
+    rule = rule.strip()
+    easter = EASTER_RULE.fullmatch(rule)
+    if easter is not None:
+        offset = int(easter.group("offset") or 0)
+        dates = [pd.Timestamp(easter_sunday(year)) for year in years]
+        return day_number(dates) + offset
+
+    fixed = FIXED_RULE.fullmatch(rule)
+    if fixed is not None:
+        return day_number([f"{year}-{rule}" for year in years])
+
+    start, _, end = rule.partition("/")
+    first, last = day_number([start, end or start])
+    if last < first:
+        raise ValueError(f"The range {rule} ends before it starts.")
+    return np.arange(first, last + 1)
+
+
+def build_calendar(holidays, start, end):
+    """Calendar table of the flags of all regions and days.
+
+    Args:
+        holidays (pandas.DataFrame): columns "region", "kind" and "rule"
+        start (str): first date of the calendar
+        end (str): last date of the calendar
+
+    Returns:
+        dict: "regions" (list), "first_day" (int) and one array of shape (region, day)
+        with flags 0 or 1 per kind, missing where the kind is not declared for the
+        region and year
+    """
+    first_day, last_day = day_number([start, end])
+    n_days = last_day - first_day + 1
+    years = range(pd.Timestamp(start).year, pd.Timestamp(end).year + 1)
+    day_years = pd.to_datetime(np.arange(first_day, last_day + 1), unit="D").year
+
+    regions = sorted(set(holidays["region"]))
+    position = {region: i for i, region in enumerate(regions)}
+    calendar = {"regions": regions, "first_day": int(first_day)}
+    declared = {}
+    for kind in KINDS:
+        calendar[kind] = np.full((len(regions), n_days), np.nan, dtype=np.float32)
+        declared[kind] = np.zeros((len(regions), n_days), dtype=bool)
+
+    holiday_days = []
+    for holiday in holidays.itertuples(index=False):
+        if holiday.kind not in KINDS:
+            raise ValueError(f"Unknown kind of holiday {holiday.kind}.")
+        days = rule_days(holiday.rule, years) - first_day
+        days = days[(days >= 0) & (days < n_days)]
+        # Holidays of a country apply to its subdivisions
+        targets = [
+            position[region]
+            for region in regions
+            if region == holiday.region or region.startswith(holiday.region + "-")
+        ]
+        in_years = np.isin(day_years, rule_years(holiday.rule, years))
+        declared[holiday.kind][np.ix_(targets, np.flatnonzero(in_years))] = True
+        holiday_days.append((holiday.kind, targets, days))
+
+    for kind in KINDS:
+        calendar[kind][declared[kind]] = 0
+    for kind, targets, days in holiday_days:
+        calendar[kind][np.ix_(targets, days)] = 1
+
+    return calendar
+
+
+def save_calendar(calendar, path):
+    """Save a calendar table to a .npz file.
+
+    Args:
+        calendar (dict): output of :func:`build_calendar`
+        path (pathlib.Path): path of the file
+    """
+    with open(path, "wb") as calendar_file:
+        np.savez_compressed(
+            calendar_file,
+            regions=np.array(calendar["regions"], dtype=str),
+            first_day=calendar["first_day"],
+            **{kind: calendar[kind] for kind in KINDS},
+        )
+
+
+def load_calendar(path):
+    """Load a calendar table from a .npz file.
+
+    Args:
+        path (pathlib.Path): path of the file
+
+    Returns:
+        dict: calendar, see :func:`build_calendar`
+    """
+    with np.load(path, allow_pickle=False) as members:
+        calendar = {kind: members[kind] for kind in KINDS}
+        calendar["regions"] = members["regions"].tolist()
+        calendar["first_day"] = int(members["first_day"])
+    return calendar
+
+
+def calendar_flags(calendar, regions, dates):
+    """Flags of the holidays of observations.
+
+    Args:
+        calendar (dict): output of :func:`build_calendar`
+        regions (array-like): region code of every observation
+        dates (array-like): date of every observation
+
+    Returns:
+        dict: kinds as keys and arrays of flags as values, missing for regions which
+        are not part of the calendar and for days outside of it
+    """
+    region_index = pd.Index(calendar["regions"]).get_indexer(np.asarray(regions))
+    day_index = day_number(dates) - calendar["first_day"]
+    n_days = calendar[KINDS[0]].shape[1]
+    known = (region_index >= 0) & (day_index >= 0) & (day_index < n_days)
+
+    flags = {}
+    for kind in KINDS:
+        values = np.full(len(region_index), np.nan)
+        values[known] = calendar[kind][region_index[known], day_index[known]]
+        flags[kind] = values
+    return flags
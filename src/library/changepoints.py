@@ -0,0 +1,181 @@
+"""Detect changepoints in daily series and turn them into lockdown periods.
+
+Changepoints are found with the pruned exact linear time method (PELT) of Killick,
+Fearnhead and Eckley (2012) for changes in the mean of a possibly multivariate series.
+The cost of a segment is its sum of squared deviations from the segment mean, which is
+evaluated in constant time from cumulative sums, and candidates which can never be the
+last changepoint of an optimal segmentation are pruned. The segments of a country are
+classified as strict or light lockdowns by their mean stringency index.
+
+"""
+import numpy as np
+import pandas as pd
+
+# Mean stringency index of a segment which is at least a light or strict lockdown
+LIGHT_STRINGENCY = 50
+STRICT_STRINGENCY = 70
+
+ORDINALS = ["first", "second", "third", "fourth", "fifth", "sixth", "seventh"]
+
+
+def pelt(signal, penalty, min_size=7):
+    """Find changepoints in the mean of a series with PELT.
+
+    Args:
+        signal (numpy.ndarray): array of shape (n_days,) or (n_days, n_series)
+        penalty (float): cost of an additional changepoint
+        min_size (int): minimal number of days of a segment. Defaults to 7.
+
+    Returns:
+        list: positions at which a new segment starts, in increasing order
+    """
+    signal = np.asarray(signal, dtype=float).reshape(len(signal), -1)
+    n_days = len(signal)
+    zeros = np.zeros((1, signal.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(signal, axis=0)])
+    squares = np.concatenate([zeros, np.cumsum(signal**2, axis=0)])
+
+    def cost(starts, end):
+        lengths = (end - starts)[:, None]
+        segment_sums = sums[end] - sums[starts]
+        segment_squares = squares[end] - squares[starts]
+        return (segment_squares - segment_sums**2 / lengths).sum(axis=1)
+
+    optimal = np.full(n_days + 1, np.inf)
+    optimal[0] = -penalty
+    last_changepoint = np.zeros(n_days + 1, dtype=int)
+    candidates = np.array([0])
+
+    for end in range(min_size, n_days + 1):
+        admissible = end - candidates >= min_size
+        if not admissible.any():
+            continue
+        admissible_costs = optimal[candidates[admissible]] + cost(
+            candidates[admissible], end
+        )
+        best = np.argmin(admissible_costs)
+        optimal[end] = admissible_costs[best] + penalty
+        last_changepoint[end] = candidates[admissible][best]
+
+        # Keep candidates which may still start the last segment of a later optimum
+        keep = ~admissible
+        keep[admissible] = admissible_costs <= optimal[end]
+        candidates = np.append(candidates[keep], end)
+
+    changepoints = []
+    end = n_days
+    while end > 0:
+        end = last_changepoint[end]
+        changepoints.append(end)
+    return sorted(changepoints)[1:]
+
+
+def classify_lockdowns(
+    dates,
+    stringency,
+    changepoints,
+    light_stringency=LIGHT_STRINGENCY,
+    strict_stringency=STRICT_STRINGENCY,
+):
+    """Name the segments with a high mean stringency index as lockdowns.
+
+    Consecutive segments of the same kind are merged. Strict lockdowns are numbered
+    in order, e.g. "first_lockdown" and "second_lockdown", light lockdowns are called
+    "light_lockdown", "second_light_lockdown" and so on.
+
+    Args:
+        dates (pandas.DatetimeIndex): days of the series
+        stringency (numpy.ndarray): stringency index per day
+        changepoints (list): output of pelt
+        light_stringency (float): minimal mean stringency of a light lockdown
+        strict_stringency (float): minimal mean stringency of a strict lockdown
+
+    Returns:
+        dict: lockdowns as keys and their first and last day ("YYYY-MM-DD") as values
+        stored in a list, the format of time_lockdowns.pkl
+    """
+    bounds = [0, *changepoints, len(dates)]
+    periods = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        level = np.nanmean(stringency[start:end])
+        kind = (
+            "strict"
+            if level >= strict_stringency
+            else "light"
+            if level >= light_stringency
+            else None
+        )
+        if periods and periods[-1][0] == kind and periods[-1][2] == start:
+            periods[-1][2] = end
+        else:
+            periods.append([kind, start, end])
+
+    lockdowns = {}
+    counts = {"strict": 0, "light": 0}
+    for kind, start, end in periods:
+        if kind is None:
+            continue
+        counts[kind] += 1
+        lockdowns[period_name(kind, counts[kind])] = [
+            dates[start].strftime("%Y-%m-%d"),
+            dates[end - 1].strftime("%Y-%m-%d"),
+        ]
+
+    return lockdowns
+
+
+def period_name(kind, number):
+    """Name of the number-th lockdown of a kind, e.g. "second_lockdown".
+
+    Args:
+        kind (str): "strict" or "light"
+        number (int): number of the period among the periods of its kind, from 1
+
+    Returns:
+        str: name in the format of time_lockdowns.pkl, periods after the seventh are
+        numbered, e.g. "lockdown_8"
+    """
+    prefix = "lockdown" if kind == "strict" else "light_lockdown"
+    if number > len(ORDINALS):
+        return f"{prefix}_{number}"
+    if kind == "light" and number == 1:
+        return prefix
+    return f"{ORDINALS[number - 1]}_{prefix}"
+
+
+def detect_lockdowns(country_data, variables, penalty, min_size=7):
+    """Detect lockdown periods of one country.
+
+    The variables are standardized, so the penalty is comparable between countries.
+    Days on which a variable is missing are filled with the previous value.
+
+    Args:
+        country_data (pandas.DataFrame): data of one country with (country, date) as
+        index and the variables and "stringency_index" as columns
+        variables (list): variables in which changepoints are searched
+        penalty (float): cost of an additional changepoint
+        min_size (int): minimal number of days of a segment. Defaults to 7.
+
+    Returns:
+        pandas.DataFrame: one row per lockdown with the columns "lockdown", "start" and
+        "end" and the country as index
+    """
+    country = country_data.index.get_level_values("country")[0]
+    data = country_data.droplevel("country").sort_index()
+    data = data.reindex(pd.date_range(data.index.min(), data.index.max()))
+    data = data.ffill().bfill()
+
+    signal = data[variables].to_numpy(dtype=float)
+    scale = signal.std(axis=0)
+    signal = (signal - signal.mean(axis=0)) / np.where(scale > 0, scale, 1)
+
+    changepoints = pelt(signal, penalty=penalty, min_size=min_size)
+    lockdowns = classify_lockdowns(
+        data.index, data["stringency_index"].to_numpy(dtype=float), changepoints
+    )
+
+    return pd.DataFrame(
+        [[name, start, end] for name, (start, end) in lockdowns.items()],
+        columns=["lockdown", "start", "end"],
+        index=pd.Index([country] * len(lockdowns), name="country"),
+    )
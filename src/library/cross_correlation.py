@@ -0,0 +1,108 @@
+"""Cross-correlation functions of many series at once via the FFT.
+
+The correlation of a response x and a driver y at lag k is the Pearson correlation of
+x[t] and y[t - k] over the days t on which both are observed, so a positive lag means
+that the response follows the driver. The correlation of lag k needs six sums over the
+common days, e.g. of x[t] * y[t - k] and of x[t] where y[t - k] is observed. Every sum
+is a cross-correlation of two series in which missing days are zero, and all of them
+are computed for all lags, entities, responses and drivers with one batch of FFTs.
+
+"""
+import numpy as np
+
+
+def standardize(values):
+    """Scale every series of a panel to mean zero and variance one over its days.
+
+    Args:
+        values (numpy.ndarray): array of shape (entity, day, metric), missing days
+            are NaN
+
+    Returns:
+        numpy.ndarray: standardized series, NaN for series without variation
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(values, axis=1, keepdims=True)
+        scale = np.nanstd(values, axis=1, keepdims=True)
+        return (values - mean) / np.where(scale > 0, scale, np.nan)
+
+
+def cross_correlation(responses, drivers, max_lag, min_obs=14):
+    """Cross-correlation functions of all pairs of responses and drivers per entity.
+
+    Args:
+        responses (numpy.ndarray): array of shape (entity, day, response), missing days
+            are NaN
+        drivers (numpy.ndarray): array of shape (entity, day, driver) on the same days
+        max_lag (int): largest lag in days, lags from -max_lag to max_lag are computed
+        min_obs (int): minimal number of common days of a lag. Defaults to 14.
+
+    Returns:
+        numpy.ndarray: correlations of shape (entity, response, driver, lag) where
+        lag runs from -max_lag to max_lag, NaN for lags with less than min_obs common
+        days
+    """
+    from scipy import fft
+
+    n_days = responses.shape[1]
+    n_fft = fft.next_fast_len(n_days + max_lag)
+
+    # Days on the last axis, (entity, response, 1, day) and (entity, 1, driver, day)
+    x = np.moveaxis(standardize(np.asarray(responses, dtype=float)), 1, 2)[:, :, None]
+    y = np.moveaxis(standardize(np.asarray(drivers, dtype=float)), 1, 2)[:, None]
+    x_observed = ~np.isnan(x)
+    y_observed = ~np.isnan(y)
+    x, y = np.where(x_observed, x, 0), np.where(y_observed, y, 0)
+
+    def transform(series):
+        return fft.rfft(series, n=n_fft, axis=-1)
+
+    def correlate(x_transform, y_transform):
+        # Entry k of the circular result is sum_t x[t] * y[t - k], lag -k is at n - k
+        sums = fft.irfft(x_transform * np.conj(y_transform), n=n_fft, axis=-1)
+        return np.concatenate(
+            [sums[..., n_fft - max_lag :], sums[..., : max_lag + 1]], axis=-1
+        )
+
+    x_mask = transform(x_observed.astype(float))
+    y_mask = transform(y_observed.astype(float))
+    x_transform, y_transform = transform(x), transform(y)
+
+    n_common = np.rint(correlate(x_mask, y_mask))
+    x_sum = correlate(x_transform, y_mask)
+    y_sum = correlate(x_mask, y_transform)
+    x_squares = correlate(transform(x**2), y_mask)
+    y_squares = correlate(x_mask, transform(y**2))
+    products = correlate(x_transform, y_transform)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = products - x_sum * y_sum / n_common
+        x_variance = x_squares - x_sum**2 / n_common
+        y_variance = y_squares - y_sum**2 / n_common
+        correlation = covariance / np.sqrt(x_variance * y_variance)
+
+    correlation[n_common < max(min_obs, 2)] = np.nan
+    return np.clip(correlation, -1, 1)
+
+
+def peak_lags(correlation, max_lag, min_lag=None):
+    """Lag with the strongest correlation of every cross-correlation function.
+
+    Args:
+        correlation (numpy.ndarray): output of :func:`cross_correlation`
+        max_lag (int): largest lag of the correlations
+        min_lag (int): smallest lag which is searched. Defaults to None for -max_lag.
+
+    Returns:
+        tuple: peak lags and the correlations at the peak, arrays of shape (entity,
+        response, driver), NaN if a function has no correlation
+    """
+    min_lag = -max_lag if min_lag is None else min_lag
+    searched = correlation[..., min_lag + max_lag :]
+
+    missing = np.isnan(searched).all(axis=-1)
+    position = np.argmax(np.where(np.isnan(searched), -1, np.abs(searched)), axis=-1)
+    peak = np.take_along_axis(searched, position[..., None], axis=-1)[..., 0]
+
+    lag = np.where(missing, np.nan, position + min_lag)
+    return lag, np.where(missing, np.nan, peak)
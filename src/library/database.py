@@ -0,0 +1,191 @@
+"""Publish prepared data sets and estimates to an SQLite database.
+
+Every data set is a table whose primary key is (entity, date), so SQL queries which
+select entities or date ranges are answered from the index. Dates are stored as
+"YYYY-MM-DD" text, which sorts and compares like dates.
+
+Tables are written incrementally. The last day of every entity is kept in the table
+``_watermarks``. An export upserts only the rows of days after the watermark of their
+entity minus a revision window, so its cost grows with the new days instead of the size
+of the table. The window covers the days which change after they were first exported:
+forward moving averages are missing for the last days of a series until the following
+days arrive, and recent figures of the sources are revised. Rows of an existing key are
+updated, so an export can be repeated safely.
+
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from src.library.alignment import day_number
+
+WATERMARKS = "_watermarks"
+
+# Days before the watermark which are exported again, at least the span of the 7-day
+# moving averages
+REVISION_DAYS = 14
+
+
+def connect(path):
+    """Open a database and create the table of watermarks.
+
+    Args:
+        path (pathlib.Path): path to the database file
+
+    Returns:
+        sqlite3.Connection: connection to the database
+    """
+    connection = sqlite3.connect(path)
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS {WATERMARKS} "
+        "(table_name TEXT, entity TEXT, last_day INTEGER, "
+        "PRIMARY KEY (table_name, entity))"
+    )
+    return connection
+
+
+def sql_type(dtype):
+    """SQLite type of a pandas dtype."""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def ensure_table(connection, table, data, keys):
+    """Create a table for a data set or add the columns which it lacks.
+
+    Args:
+        connection (sqlite3.Connection): connection to the database
+        table (str): name of the table
+        data (pandas.DataFrame): data with keys as columns
+        keys (list): columns of the primary key, e.g. ["country", "date"]
+    """
+    columns = ", ".join(
+        f'"{column}" {sql_type(dtype)}' for column, dtype in data.dtypes.items()
+    )
+    primary_key = ", ".join(f'"{key}"' for key in keys)
+    connection.execute(
+        f'CREATE TABLE IF NOT EXISTS "{table}" ({columns}, PRIMARY KEY ({primary_key}))'
+    )
+
+    existing = {row[1] for row in connection.execute(f'PRAGMA table_info("{table}")')}
+    for column, dtype in data.dtypes.items():
+        if column not in existing:
+            connection.execute(
+                f'ALTER TABLE "{table}" ADD COLUMN "{column}" {sql_type(dtype)}'
+            )
+
+
+def upsert(connection, table, data, keys):
+    """Insert rows or update the rows with the same key.
+
+    Args:
+        connection (sqlite3.Connection): connection to the database
+        table (str): name of the table
+        data (pandas.DataFrame): data with keys as columns
+        keys (list): columns of the primary key
+
+    Returns:
+        int: number of rows written
+    """
+    ensure_table(connection, table, data, keys)
+    columns = ", ".join(f'"{column}"' for column in data.columns)
+    placeholders = ", ".join("?" for _ in data.columns)
+    updates = ", ".join(
+        f'"{column}" = excluded."{column}"'
+        for column in data.columns
+        if column not in keys
+    )
+    conflict = ", ".join(f'"{key}"' for key in keys)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+
+    rows = _sql_values(data).itertuples(index=False, name=None)
+    connection.executemany(
+        f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders}) '
+        f"ON CONFLICT ({conflict}) {action}",
+        rows,
+    )
+    return len(data)
+
+
+def export_new_days(
+    connection, table, data, entity=None, date="date", revision_days=REVISION_DAYS
+):
+    """Upsert the days of a data set after the last exported day of every entity.
+
+    The last revision_days days up to the last exported day are upserted again, so
+    values which were missing or revised at the last export are updated.
+
+    Args:
+        connection (sqlite3.Connection): connection to the database
+        table (str): name of the table
+        data (pandas.DataFrame): long format data, entity and date may be columns or
+            index levels
+        entity (str): name of the entity variable. Defaults to None for a data set
+            with one row per day.
+        date (str): name of the date variable. Defaults to "date".
+        revision_days (int): number of exported days which are upserted again.
+            Defaults to REVISION_DAYS.
+
+    Returns:
+        int: number of rows written
+    """
+    keys = [key for key in [entity, date] if key is not None]
+    data = data.reset_index() if any(k not in data.columns for k in keys) else data
+    entities = (
+        data[entity].astype(str).to_numpy()
+        if entity is not None
+        else np.full(len(data), "")
+    )
+    days = day_number(data[date])
+
+    watermarks = dict(
+        connection.execute(
+            f"SELECT entity, last_day FROM {WATERMARKS} WHERE table_name = ?", (table,)
+        ).fetchall()
+    )
+    last_days = pd.Series(entities).map(watermarks).fillna(-np.inf).to_numpy()
+    new = days > last_days - revision_days
+    if not new.any():
+        return 0
+
+    with connection:
+        n_rows = upsert(connection, table, data.loc[new], keys)
+        new_watermarks = (
+            pd.Series(days[new]).groupby(entities[new]).max().astype(int).items()
+        )
+        connection.executemany(
+            f"INSERT INTO {WATERMARKS} VALUES (?, ?, ?) ON CONFLICT "
+            "(table_name, entity) DO UPDATE SET last_day = "
+            "max(last_day, excluded.last_day)",
+            [(table, key, last_day) for key, last_day in new_watermarks],
+        )
+    return n_rows
+
+
+def replace_table(connection, table, data, keys):
+    """Replace all rows of a table, e.g. of estimates which are computed at once.
+
+    Args:
+        connection (sqlite3.Connection): connection to the database
+        table (str): name of the table
+        data (pandas.DataFrame): data with keys as columns
+        keys (list): columns of the primary key
+
+    Returns:
+        int: number of rows written
+    """
+    with connection:
+        connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+        return upsert(connection, table, data, keys)
+
+
+def _sql_values(data):
+    """Convert datetime columns to "YYYY-MM-DD" text, SQLite stores NaN as NULL."""
+    dates = data.select_dtypes(include="datetime").columns
+    return data.assign(
+        **{column: data[column].dt.strftime("%Y-%m-%d") for column in dates}
+    )
@@ -0,0 +1,139 @@
+"""Download the data sources concurrently and read members of zip archives.
+
+All sources are fetched at the same time, with at most ``max_connections`` open
+connections. The body of every response is streamed to disk in chunks, so the size of a
+source does not matter for memory, and written to a temporary file which replaces the
+target only once the download is complete. Interrupted downloads therefore never leave
+a truncated source behind.
+
+Google also publishes its mobility report as a zip archive with one csv file per
+country and year. :func:`concatenate_zip_members` copies selected members of such an
+archive into one csv file without extracting the others.
+
+"""
+import asyncio
+import re
+import shutil
+import urllib.request
+import zipfile
+from pathlib import Path
+
+MAX_CONNECTIONS = 4
+CHUNK_SIZE = 2**20
+
+REGIONAL_REPORT = re.compile(r"\d{4}_(?P<code>[A-Z]{2})_Region_Mobility_Report\.csv")
+
+
+def download_all(downloads, max_connections=MAX_CONNECTIONS, chunk_size=CHUNK_SIZE):
+    """Download several urls concurrently.
+
+    Args:
+        downloads (dict): paths as keys and urls as values
+        max_connections (int): maximum number of open connections. Defaults to
+        MAX_CONNECTIONS.
+        chunk_size (int): number of bytes which are read and written at once. Defaults
+        to CHUNK_SIZE.
+
+    Returns:
+        list: paths of the downloaded files
+    """
+    return asyncio.run(_download_all(downloads, max_connections, chunk_size))
+
+
+async def _download_all(downloads, max_connections, chunk_size):
+    connections = asyncio.Semaphore(max_connections)
+
+    async def download(url, path):
+        async with connections:
+            # urllib blocks, so every download runs in a thread of the event loop
+            return await asyncio.to_thread(stream_to_file, url, path, chunk_size)
+
+    return await asyncio.gather(
+        *[download(url, Path(path)) for path, url in downloads.items()]
+    )
+
+
+def stream_to_file(url, path, chunk_size=CHUNK_SIZE):
+    """Stream the body of a url to a file.
+
+    Args:
+        url (str): url, e.g. "https://..." or "file://..."
+        path (pathlib.Path): path of the file
+        chunk_size (int): number of bytes which are read and written at once. Defaults
+        to CHUNK_SIZE.
+
+    Returns:
+        pathlib.Path: path of the file
+    """
+    path = Path(path)
+    partial_path = path.with_name(path.name + ".part")
+    try:
+        with urllib.request.urlopen(url) as response, open(
+            partial_path, "wb"
+        ) as partial_file:
+            shutil.copyfileobj(response, partial_file, chunk_size)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    partial_path.replace(path)
+    return path
+
+
+def regional_report_members(names, country_codes):
+    """Members of Google's regional mobility report which belong to some countries.
+
+    Args:
+        names (list): names of the members of the archive
+        country_codes (list): ISO 3166-1 alpha-2 codes of the countries
+
+    Returns:
+        list: names of the csv files of the countries, sorted
+    """
+    country_codes = set(country_codes)
+    return sorted(
+        name
+        for name in names
+        if (match := REGIONAL_REPORT.fullmatch(Path(name).name)) is not None
+        and match.group("code") in country_codes
+    )
+
+
+def concatenate_zip_members(archive_path, members, path, chunk_size=CHUNK_SIZE):
+    """Copy csv files in a zip archive into one csv file.
+
+    Only the selected members are decompressed, and they are streamed, not read into
+    memory. The header of the first member is kept, the headers of the others must be
+    equal to it and are skipped.
+
+    Args:
+        archive_path (pathlib.Path): path of the zip archive
+        members (list): names of the csv files in the archive
+        path (pathlib.Path): path of the combined csv file
+        chunk_size (int): number of bytes which are read and written at once. Defaults
+        to CHUNK_SIZE.
+
+    Returns:
+        pathlib.Path: path of the combined csv file
+    """
+    if not members:
+        raise ValueError("At least one member must be selected.")
+
+    header = None
+    with zipfile.ZipFile(archive_path) as archive, open(path, "wb") as combined:
+        for member in members:
+            with archive.open(member) as member_file:
+                member_header = member_file.readline()
+                if header is None:
+                    header = member_header
+                    combined.write(header)
+                elif member_header != header:
+                    raise ValueError(f"The columns of {member} differ from the others.")
+
+                last_byte = member_header[-1:]
+                for chunk in iter(lambda: member_file.read(chunk_size), b""):
+                    combined.write(chunk)
+                    last_byte = chunk[-1:]
+                # The next member must start on a new line
+                if last_byte != b"\n":
+                    combined.write(b"\n")
+    return Path(path)
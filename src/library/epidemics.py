@@ -0,0 +1,220 @@
+"""Derive epidemic covariates for all countries at once from daily case counts.
+
+The new cases of all countries are arranged as a dense (country, day) array, so every
+metric is one array operation over all countries instead of a loop per country:\n
+1. The 7-day incidence per 100,000 inhabitants.\n
+2. The growth rate, the daily log growth of the 7-day average of new cases over a
+   week.\n
+3. The reproduction number R of the renewal equation. The infection pressure of a day
+   is the convolution of the past new cases with the serial interval distribution,
+   i.e. the expected number of new cases if every case caused one infection. R is
+   estimated over a trailing window as the posterior mean of Cori et al. (2013):
+   (a + sum of new cases) / (1 / b + sum of infection pressure) with a gamma prior of
+   shape a and scale b.\n
+
+Negative case counts, which are corrections of earlier reports, are treated as zero.
+
+"""
+import numpy as np
+import pandas as pd
+
+WEEK = 7
+
+# Serial interval of COVID-19 in days, Nishiura et al. (2020)
+SERIAL_INTERVAL_MEAN = 4.7
+SERIAL_INTERVAL_SD = 2.9
+
+# Gamma prior of the reproduction number, Cori et al. (2013)
+PRIOR_SHAPE = 1
+PRIOR_SCALE = 5
+
+
+def serial_interval_kernel(
+    mean=SERIAL_INTERVAL_MEAN, sd=SERIAL_INTERVAL_SD, max_days=21
+):
+    """Discretized gamma distribution of the serial interval.
+
+    Args:
+        mean (float): mean in days. Defaults to SERIAL_INTERVAL_MEAN.
+        sd (float): standard deviation in days. Defaults to SERIAL_INTERVAL_SD.
+        max_days (int): longest serial interval. Defaults to 21.
+
+    Returns:
+        numpy.ndarray: probabilities of a serial interval of 1, ..., max_days days,
+        summing to one
+    """
+    from scipy.stats import gamma
+
+    shape = (mean / sd) ** 2
+    scale = sd**2 / mean
+    edges = np.arange(max_days + 1) + 0.5
+    kernel = np.diff(gamma.cdf(edges, shape, scale=scale))
+    return kernel / kernel.sum()
+
+
+def dense_by_country(data, variables, country="country", date="date"):
+    """Arrange variables of a (country, date) panel as dense arrays.
+
+    Args:
+        data (pandas.DataFrame): panel with country and date as index levels
+        variables (list): variables
+        country (str): name of the country level. Defaults to "country".
+        date (str): name of the date level. Defaults to "date".
+
+    Returns:
+        tuple: dict with variables as keys and arrays of shape (country, day) as values,
+        missing on days without data, the countries and the consecutive dates
+    """
+    countries = data.index.get_level_values(country)
+    dates = pd.DatetimeIndex(data.index.get_level_values(date))
+    country_codes, unique_countries = pd.factorize(countries, sort=True)
+    all_dates = pd.date_range(dates.min(), dates.max(), freq="D")
+    day_codes = (dates - all_dates[0]).days.to_numpy()
+
+    arrays = {}
+    for variable in variables:
+        values = np.full((len(unique_countries), len(all_dates)), np.nan)
+        values[country_codes, day_codes] = data[variable].to_numpy(dtype=float)
+        arrays[variable] = values
+    return arrays, unique_countries, all_dates
+
+
+def incidence_per_100k(new_cases, population, window=WEEK):
+    """Incidence over a trailing window per 100,000 inhabitants.
+
+    Args:
+        new_cases (numpy.ndarray): array of shape (country, day)
+        population (numpy.ndarray): population of every country
+        window (int): number of days. Defaults to 7.
+
+    Returns:
+        numpy.ndarray: array of shape (country, day), missing for the first window - 1
+        days
+    """
+    cases = trailing_sum(np.clip(new_cases, 0, None), window)
+    return cases / np.asarray(population, dtype=float)[:, None] * 100_000
+
+
+def growth_rate(new_cases, window=WEEK):
+    """Daily log growth of the moving average of new cases over a window.
+
+    Args:
+        new_cases (numpy.ndarray): array of shape (country, day)
+        window (int): number of days of the moving average and of the growth.
+        Defaults to 7.
+
+    Returns:
+        numpy.ndarray: array of shape (country, day), missing if the moving average
+        is not positive at both ends
+    """
+    average = trailing_sum(np.clip(new_cases, 0, None), window) / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_average = np.where(average > 0, np.log(average), np.nan)
+    growth = np.full(average.shape, np.nan)
+    growth[:, window:] = (log_average[:, window:] - log_average[:, :-window]) / window
+    return growth
+
+
+def infection_pressure(new_cases, kernel):
+    """Convolution of the past new cases with the serial interval distribution.
+
+    Args:
+        new_cases (numpy.ndarray): array of shape (country, day)
+        kernel (numpy.ndarray): probabilities of a serial interval of 1, 2, ... days
+
+    Returns:
+        numpy.ndarray: array of shape (country, day) whose value on day t is the sum
+        of kernel[k - 1] * new_cases[:, t - k], days before the first are zero
+    """
+    n_countries, n_days = new_cases.shape
+    padded = np.zeros((n_countries, n_days + len(kernel)))
+    padded[:, len(kernel) :] = np.clip(new_cases, 0, None)
+
+    # Window t holds the days t - len(kernel), ..., t - 1 of the cases
+    windows = np.lib.stride_tricks.sliding_window_view(padded, len(kernel), axis=1)
+    return windows[:, :n_days] @ kernel[::-1]
+
+
+def reproduction_number(
+    new_cases,
+    kernel=None,
+    window=WEEK,
+    prior_shape=PRIOR_SHAPE,
+    prior_scale=PRIOR_SCALE,
+):
+    """Reproduction number of the renewal equation over a trailing window.
+
+    Args:
+        new_cases (numpy.ndarray): array of shape (country, day)
+        kernel (numpy.ndarray): serial interval distribution. Defaults to None which
+        uses :func:`serial_interval_kernel`.
+        window (int): number of days over which R is constant. Defaults to 7.
+        prior_shape (float): shape of the gamma prior. Defaults to PRIOR_SHAPE.
+        prior_scale (float): scale of the gamma prior. Defaults to PRIOR_SCALE.
+
+    Returns:
+        numpy.ndarray: array of shape (country, day), missing for the first window - 1
+        days and before the first case of a country
+    """
+    kernel = serial_interval_kernel() if kernel is None else np.asarray(kernel)
+    cases = np.clip(new_cases, 0, None)
+    pressure = trailing_sum(infection_pressure(cases, kernel), window)
+    reproduction = (prior_shape + trailing_sum(cases, window)) / (
+        1 / prior_scale + pressure
+    )
+
+    # Without infection pressure R only reflects the prior
+    reproduction[~(pressure > 0)] = np.nan
+    return reproduction
+
+
+def trailing_sum(values, window):
+    """Sum over a trailing window along the day axis.
+
+    Args:
+        values (numpy.ndarray): array of shape (country, day)
+        window (int): number of days
+
+    Returns:
+        numpy.ndarray: array of the same shape, missing for the first window - 1 days
+        and for windows with missing values
+    """
+    sums = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        sums[:, window - 1 :] = windows.sum(axis=-1)
+    return sums
+
+
+def add_epidemic_metrics(infect_numbers, population, window=WEEK):
+    """Add the epidemic metrics of all countries to the infection numbers.
+
+    Args:
+        infect_numbers (pandas.DataFrame): output of :func:`utils.prepare_infection_data`
+        population (pandas.Series): population with countries as index
+        window (int): number of days of the windows. Defaults to 7.
+
+    Returns:
+        pandas.DataFrame: infect_numbers with the additional columns
+        "incidence_per_100k", "growth_rate" and "reproduction_number"
+    """
+    arrays, countries, dates = dense_by_country(infect_numbers, ["new_cases"])
+    new_cases = arrays["new_cases"]
+    # Missing days do not contribute cases
+    new_cases = np.nan_to_num(new_cases)
+
+    metrics = {
+        "incidence_per_100k": incidence_per_100k(
+            new_cases, population.reindex(countries).to_numpy(), window
+        ),
+        "growth_rate": growth_rate(new_cases, window),
+        "reproduction_number": reproduction_number(new_cases, window=window),
+    }
+
+    index = pd.MultiIndex.from_product(
+        [countries, dates], names=infect_numbers.index.names
+    )
+    dense = pd.DataFrame(
+        {name: values.ravel() for name, values in metrics.items()}, index=index
+    )
+    return infect_numbers.join(dense)
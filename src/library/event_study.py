@@ -0,0 +1,153 @@
+"""Estimate event studies of lockdowns on a panel with a sparse design matrix.
+
+An event study replaces the level dummy of a lockdown by one indicator per day relative
+to its start, from ``leads`` days before to ``lags`` days after it. The day before the
+start has no indicator. Together with one fixed effect per entity the coefficients
+trace the path of the outcome around the start of every lockdown.
+
+Without binning, days outside the window of an event have no indicator of that event
+either, so the coefficients are relative to the day before the start pooled with all
+days outside the window, e.g. the months between two lockdowns. With binned endpoints
+the days before the window share the indicator of the first day of the window and the
+days after it the indicator of the last day. Every day of an entity with the event
+then has one indicator except the day before the start, which is the only reference.
+The coefficients of the endpoints are the average of all days at or beyond them.
+
+Entities without an event have no indicator of it. With one fixed effect per day as
+well, they are controls: the day effects absorb the path which all entities share and
+the indicators measure the deviation of the entities with the event from it. Without
+day effects the entities without an event do not change the coefficients.
+
+The design has one row per entity and day but every row holds at most two fixed effects
+and one indicator per event. It is therefore stored as a sparse matrix, which grows
+with the number of observations instead of observations times columns, and solved
+with the sparse least squares routine :func:`scipy.sparse.linalg.lsqr`.
+
+"""
+import numpy as np
+
+
+def event_time_design(
+    n_entities,
+    n_days,
+    event_starts,
+    leads,
+    lags,
+    reference=-1,
+    bin_endpoints=False,
+    day_effects=False,
+):
+    """Sparse design of entity and day fixed effects and event-time indicators.
+
+    Args:
+        n_entities (int): number of entities
+        n_days (int): number of consecutive days per entity
+        event_starts (dict): names of the events as keys and the day on which the event
+        starts as values, either one day for all entities or an array with one day
+        per entity, negative if an entity has no such event
+        leads (int): number of days before the start with an indicator
+        lags (int): number of days after the start with an indicator
+        reference (int): day relative to the start without indicator. Defaults to -1.
+        bin_endpoints (bool): whether days outside the window get the indicators of
+            its first and last day. Defaults to False.
+        day_effects (bool): whether every day except the first gets a fixed effect.
+            Defaults to False.
+
+    Returns:
+        tuple: design of shape (n_entities * n_days, n_columns) as
+        scipy.sparse.csr_matrix whose rows are ordered by entity and day, and the
+        names of the columns: ("entity", i) and ("day", t) for the fixed effects and
+        (event, k) for the indicators of day k relative to the start of event
+    """
+    from scipy import sparse
+
+    if bin_endpoints and reference in [-leads, lags]:
+        raise ValueError("The reference must not be an endpoint if they are binned.")
+
+    relative_days = [k for k in range(-leads, lags + 1) if k != reference]
+    column_of_relative_day = np.full(leads + lags + 1, -1)
+    column_of_relative_day[np.array(relative_days) + leads] = np.arange(
+        len(relative_days)
+    )
+
+    n_obs = n_entities * n_days
+    entity = np.repeat(np.arange(n_entities), n_days)
+    day = np.tile(np.arange(n_days), n_entities)
+
+    rows = [np.arange(n_obs)]
+    columns = [entity]
+    names = [("entity", i) for i in range(n_entities)]
+    if day_effects:
+        # The first day is absorbed by the entity effects
+        later = day > 0
+        rows.append(np.flatnonzero(later))
+        columns.append(len(names) + day[later] - 1)
+        names += [("day", t) for t in range(1, n_days)]
+    for event, starts in event_starts.items():
+        starts = np.broadcast_to(np.asarray(starts), (n_entities,))
+        relative = day - starts[entity]
+        if bin_endpoints:
+            relative = np.clip(relative, -leads, lags)
+        in_window = (starts[entity] >= 0) & (relative >= -leads) & (relative <= lags)
+        column = np.full(n_obs, -1)
+        column[in_window] = column_of_relative_day[relative[in_window] + leads]
+        observed = column >= 0
+
+        rows.append(np.flatnonzero(observed))
+        columns.append(len(names) + column[observed])
+        names += [(event, k) for k in relative_days]
+
+    rows = np.concatenate(rows)
+    columns = np.concatenate(columns)
+    design = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)), shape=(n_obs, len(names))
+    )
+    return design, names
+
+
+def fit_event_study(design, outcome, atol=1e-10, btol=1e-10):
+    """Least squares estimates of an event study with a sparse design.
+
+    Observations with a missing outcome are dropped. Standard errors assume
+    homoskedastic errors. They need the diagonal of the inverse of X'X, which is
+    computed from X'X with the size of the number of columns, not of the observations.
+
+    Args:
+        design (scipy.sparse.csr_matrix): output of :func:`event_time_design`
+        outcome (numpy.ndarray): outcome in the order of the rows of the design
+        atol (float): tolerance of lsqr. Defaults to 1e-10.
+        btol (float): tolerance of lsqr. Defaults to 1e-10.
+
+    Returns:
+        dict: "params" and "bse" with one entry per column, NaN for columns without
+        observations, "nobs" and "df_resid"
+    """
+    from scipy.sparse.linalg import lsqr
+
+    outcome = np.asarray(outcome, dtype=float)
+    observed = ~np.isnan(outcome)
+    design = design[observed]
+    outcome = outcome[observed]
+
+    # Columns without observations are not identified
+    identified = np.asarray(design.getnnz(axis=0) > 0)
+    design = design[:, identified]
+
+    params = lsqr(design, outcome, atol=atol, btol=btol)[0]
+    residuals = outcome - design @ params
+    df_resid = design.shape[0] - design.shape[1]
+    sigma2 = residuals @ residuals / df_resid
+
+    gram = (design.T @ design).toarray()
+    variance = np.diag(np.linalg.pinv(gram, hermitian=True)) * sigma2
+
+    all_params = np.full(len(identified), np.nan)
+    all_bse = np.full(len(identified), np.nan)
+    all_params[identified] = params
+    all_bse[identified] = np.sqrt(variance)
+    return {
+        "params": all_params,
+        "bse": all_bse,
+        "nobs": design.shape[0],
+        "df_resid": df_resid,
+    }
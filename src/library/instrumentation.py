@@ -0,0 +1,325 @@
+"""Instrument the execution of every task in the project.
+
+This module is a pytask plugin which is registered via the ``pytask`` entry point in
+*setup.py*. For every executed task it records:\n
+1. Wall time and CPU time (including child processes)\n
+2. Peak resident memory while the task was running\n
+3. Bytes of the dependencies (in) and products (out) and, if ``instrumentation_rows``
+   is set in *pytask.ini*, their rows, see :func:`count_file_rows`. Without the option
+   the report has no rows.\n
+
+The records of a run are written to *bld/instrumentation/run_report.json* and
+appended to *bld/instrumentation/run_history.jsonl*, so hot paths can be compared
+across releases. Tasks listed under ``profile_tasks`` in *pytask.ini* are
+additionally run under cProfile and their stats are dumped to
+*bld/instrumentation/profiles*. If tasks are executed in parallel, see
+:mod:`src.library.parallel`, the measurements are taken in the worker. CPU time and
+memory of I/O-bound tasks, which run in threads, are those of the whole process.
+
+"""
+import cProfile
+import json
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.config import BLD
+from src.library.pytask_internals import hookimpl
+
+INSTRUMENTATION = BLD / "instrumentation"
+
+
+@hookimpl
+def pytask_parse_config(config, config_from_file):
+    """Read the instrumentation options from the configuration file."""
+    config["instrumentation"] = config_from_file.get(
+        "instrumentation", "true"
+    ).lower() in ["true", "1"]
+    config["instrumentation_rows"] = config_from_file.get(
+        "instrumentation_rows", "false"
+    ).lower() in ["true", "1"]
+    config["profile_tasks"] = [
+        name.strip()
+        for name in config_from_file.get("profile_tasks", "").replace(",", "\n").split()
+        if name.strip()
+    ]
+
+
+@hookimpl(hookwrapper=True)
+def pytask_execute_task(session, task):
+    """Measure time and memory of a task and profile it if requested.
+
+    If the task is executed by a worker of :mod:`src.library.parallel`, the
+    measurements are taken in the worker instead.
+    """
+    if not session.config.get("instrumentation", True) or is_executed_by_worker(
+        session
+    ):
+        yield
+        return
+
+    measurements = {}
+    with measure_execution(measurements, profile_path(session, task)):
+        yield
+    task.attributes["measurements"] = measurements
+
+
+@hookimpl(tryfirst=True)
+def pytask_execute_task_process_report(session, report):
+    """Complete the measurements of a task with its dependencies and products."""
+    task = report.task
+    measurements = task.attributes.get("measurements")
+    if measurements is None:
+        return
+
+    record = {"task": task.name, **measurements}
+    count_rows = session.config.get("instrumentation_rows", False)
+    for direction, nodes in [("in", task.depends_on), ("out", task.produces)]:
+        paths = [node.path for node in nodes.values() if hasattr(node, "path")]
+        record["bytes_" + direction] = sum(_file_size(path) for path in paths)
+        if count_rows:
+            record["rows_" + direction] = _count_rows(paths)
+
+    task.attributes["instrumentation"] = record
+
+
+def is_executed_by_worker(session):
+    """Whether tasks are executed by the workers of :mod:`src.library.parallel`."""
+    return session.config.get("n_workers", 1) > 1
+
+
+def profile_path(session, task):
+    """Path of the cProfile stats of a task, None if the task is not profiled."""
+    if task.base_name not in session.config.get("profile_tasks", []):
+        return None
+    return INSTRUMENTATION / "profiles" / f"{task.base_name}.prof"
+
+
+@contextmanager
+def measure_execution(measurements, profile_path=None):
+    """Measure the time, memory and I/O of the process while the block runs.
+
+    Args:
+        measurements (dict): dictionary which is filled with "wall_time", "cpu_time",
+        "cpu_time_children", "peak_rss_bytes", "io_read_bytes" and "io_write_bytes"
+        when the block is left
+        profile_path (pathlib.Path): path to which the cProfile stats of the block are
+        dumped. Defaults to None which does not profile.
+    """
+    profiler = cProfile.Profile() if profile_path is not None else None
+
+    _reset_peak_rss()
+    io_start = _read_io_counters()
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield measurements
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        children_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+        io_end = _read_io_counters()
+
+        measurements.update(
+            {
+                "wall_time": wall_time,
+                "cpu_time": cpu_time,
+                "cpu_time_children": (children_end.ru_utime - children_start.ru_utime)
+                + (children_end.ru_stime - children_start.ru_stime),
+                "peak_rss_bytes": _peak_rss(),
+                "io_read_bytes": _difference(io_start, io_end, "rchar"),
+                "io_write_bytes": _difference(io_start, io_end, "wchar"),
+            }
+        )
+
+        if profiler is not None:
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            measurements["profile"] = profile_path.as_posix()
+
+
+@hookimpl
+def pytask_execute_log_end(session, reports):
+    """Write the run report and append it to the run history."""
+    if not session.config.get("instrumentation", True):
+        return
+
+    records = []
+    for report in reports:
+        record = report.task.attributes.get("instrumentation")
+        if record is not None:
+            records.append({**record, "success": report.success})
+
+    if not records:
+        return
+
+    run_report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tasks": records,
+    }
+
+    INSTRUMENTATION.mkdir(parents=True, exist_ok=True)
+    with open(INSTRUMENTATION / "run_report.json", "w") as report_file:
+        json.dump(run_report, report_file, indent=4)
+    with open(INSTRUMENTATION / "run_history.jsonl", "a") as history_file:
+        history_file.write(json.dumps(run_report) + "\n")
+
+
+def count_file_rows(path):
+    """Count the rows of a data file without loading it.
+
+    Rows of a .csv file are its lines without the header. Rows of a .npy array are the
+    product of all but its last axis, e.g. entities times days of a dense panel, which
+    is read from the header. Rows of an .npz archive are those of its largest array,
+    read from the headers of its members. The json sidecar of a dense panel has the
+    rows of the panel and the json index of a partitioned data set the sum of the rows
+    of its partitions, see :mod:`src.library.partitions`. Other files, e.g. pickles,
+    would have to be loaded and are not counted.
+
+    Args:
+        path (pathlib.Path): path to a data file
+
+    Returns:
+        int or None: number of data rows, None if the rows are not known
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+
+    if path.suffix == ".csv":
+        with open(path, "rb") as csv_file:
+            n_lines = sum(
+                chunk.count(b"\n")
+                for chunk in iter(lambda: csv_file.read(2**20), b"")
+            )
+        return max(n_lines - 1, 0)
+
+    if path.suffix == ".npy":
+        import numpy as np
+
+        return _rows_of_shape(np.load(path, mmap_mode="r").shape)
+
+    if path.suffix == ".npz":
+        import zipfile
+
+        import numpy as np
+
+        shapes = []
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                with archive.open(name) as member:
+                    version = np.lib.format.read_magic(member)
+                    read_header = (
+                        np.lib.format.read_array_header_1_0
+                        if version == (1, 0)
+                        else np.lib.format.read_array_header_2_0
+                    )
+                    shapes.append(read_header(member)[0])
+        return max((_rows_of_shape(shape) for shape in shapes), default=None)
+
+    if path.suffix == ".json":
+        with open(path) as json_file:
+            content = json.load(json_file)
+        if not isinstance(content, dict):
+            return None
+        if "entities" in content and "n_days" in content:
+            return len(content["entities"]) * content["n_days"]
+        if "partitions" in content:
+            rows = content.get("rows")
+            if rows is not None:
+                return sum(rows.values())
+            return _sum_rows(
+                [
+                    count_file_rows(path.parent / partition)
+                    for partition in content["partitions"].values()
+                ]
+            )
+
+    return None
+
+
+def _count_rows(paths):
+    """Count the rows of several files, the sidecar of a counted panel only once."""
+    paths = [Path(path) for path in paths]
+    return _sum_rows(
+        [
+            count_file_rows(path)
+            for path in paths
+            if not (path.suffix == ".json" and path.with_suffix(".npy") in paths)
+        ]
+    )
+
+
+def _rows_of_shape(shape):
+    """Rows of an array, all but its last axis, e.g. entities times days."""
+    import numpy as np
+
+    return int(np.prod(shape[:-1])) if len(shape) > 1 else int(np.prod(shape))
+
+
+def _sum_rows(rows):
+    """Sum row counts, ignoring files without tabular data."""
+    rows = [n for n in rows if n is not None]
+    return sum(rows) if rows else None
+
+
+def _file_size(path):
+    return path.stat().st_size if path.is_file() else 0
+
+
+def _reset_peak_rss():
+    """Reset the peak resident memory of the process (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss():
+    """Return the peak resident memory in bytes.
+
+    On Linux this is the peak since the last call of :func:`_reset_peak_rss`, on other
+    platforms it is the high-water mark of the whole process.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _read_io_counters():
+    """Read the I/O counters of the process (Linux only)."""
+    try:
+        with open("/proc/self/io") as io:
+            return {
+                key: int(value)
+                for key, value in (line.split(":") for line in io if ":" in line)
+            }
+    except OSError:
+        return {}
+
+
+def _difference(start, end, key):
+    if key in start and key in end:
+        return end[key] - start[key]
+    return None
@@ -0,0 +1,99 @@
+"""Build distributed-lag covariates without one shifted copy per lag.
+
+The series of all groups, e.g. countries, are written once into a buffer in which every
+group is preceded by max_lag missing values. A sliding window view over this buffer has
+the lags 0 to max_lag of an observation as one row, so no lag is copied. The padding
+makes lags which would reach into the previous group missing, i.e. the lags break at
+group boundaries. The rows of the observations are taken from the view in one step, or
+returned as a view if there is only one group without missing days.
+
+Every observation is written at the position of its day, so days which are missing in
+a group are missing values of the buffer and the lags reaching them are missing
+instead of shifted to the previous observed day.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.alignment import day_number
+
+
+def lag_matrix(values, max_lag, groups=None, days=None):
+    """Lags 0 to max_lag of a series which is sorted by group and day.
+
+    Args:
+        values (numpy.ndarray): series of length n_obs, sorted by group and day
+        max_lag (int): largest lag
+        groups (numpy.ndarray): group of every observation. Defaults to None which
+        treats all observations as one group.
+        days (numpy.ndarray): integer day of every observation, see
+        :func:`src.library.alignment.day_number`. Defaults to None for consecutive
+        days.
+
+    Returns:
+        numpy.ndarray: array of shape (n_obs, max_lag + 1) whose column k is the series
+        lagged by k days, NaN if the lag lies before the first day of the group or on a
+        missing day
+    """
+    values = np.asarray(values, dtype=float)
+    if groups is None:
+        starts = np.array([0])
+    else:
+        groups = np.asarray(groups)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    group_of_obs = np.repeat(
+        np.arange(len(starts)), np.diff(np.r_[starts, len(values)])
+    )
+
+    # Offset of every observation from the first day of its group
+    if days is None:
+        offsets = np.arange(len(values)) - starts[group_of_obs]
+    else:
+        days = np.asarray(days, dtype=np.int64)
+        offsets = days - days[starts][group_of_obs]
+        if (np.diff(offsets)[np.diff(group_of_obs) == 0] <= 0).any():
+            raise ValueError("The days of every group must be sorted and unique.")
+    spans = np.zeros(len(starts), dtype=np.int64)
+    np.maximum.at(spans, group_of_obs, offsets + 1)
+
+    # Day d of group g is at position d + max_lag after the end of the previous group
+    first_positions = np.cumsum(spans + max_lag) - spans
+    positions = first_positions[group_of_obs] + offsets
+    buffer = np.full(int(np.sum(spans + max_lag)), np.nan)
+    buffer[positions] = values
+
+    # Row j of the windows holds buffer[j], ..., buffer[j + max_lag], reversed to lags
+    windows = np.lib.stride_tricks.sliding_window_view(buffer, max_lag + 1)[:, ::-1]
+    if len(starts) == 1 and spans[0] == len(values):
+        return windows
+    return windows[positions - max_lag]
+
+
+def distributed_lag_design(data, variables, max_lag, group=None, date="date"):
+    """Distributed-lag covariates of several variables of a panel.
+
+    Args:
+        data (pandas.DataFrame): panel with one row per group and day, group and date
+        may be columns or index levels. Lags of missing days are missing.
+        variables (list): variables which are lagged
+        max_lag (int): largest lag
+        group (str): name of the group variable. Defaults to None for a single series.
+        date (str): name of the date variable. Defaults to "date".
+
+    Returns:
+        pandas.DataFrame: columns "{variable}_lag{k}" for k = 0, ..., max_lag in the
+        order of the rows of data
+    """
+    keys = [key for key in [group, date] if key is not None]
+    frame = data.reset_index() if any(k not in data.columns for k in keys) else data
+    order = np.lexsort([frame[key].to_numpy() for key in reversed(keys)])
+
+    groups = None if group is None else frame[group].to_numpy()[order]
+    days = day_number(frame[date])[order]
+    design = np.empty((len(frame), len(variables) * (max_lag + 1)))
+    for i, variable in enumerate(variables):
+        lags = lag_matrix(frame[variable].to_numpy()[order], max_lag, groups, days)
+        design[order, i * (max_lag + 1) : (i + 1) * (max_lag + 1)] = lags
+
+    columns = [f"{v}_lag{k}" for v in variables for k in range(max_lag + 1)]
+    return pd.DataFrame(design, index=data.index, columns=columns, copy=False)
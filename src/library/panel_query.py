@@ -0,0 +1,277 @@
+"""Answer queries on the dense panels from memory, optionally over local HTTP.
+
+A query selects entities, metrics and a date range of one of the panels written by
+:mod:`src.data_management.task_create_dense_panels`, optionally smoothed by a trailing
+moving average. The panels are mapped once. Results are kept in a least recently used
+cache which is bounded by the memory of the cached frames, and the latencies of the
+last MAX_LATENCIES queries are recorded. Every query returns a copy of the cached
+frame, so callers may modify their results.
+
+Start a local server with::
+
+    python -m src.library.panel_query --port 8050
+
+and query it with e.g.
+``http://localhost:8050/query?panel=eu_country_level&entities=Germany,France
+&metrics=workplaces_avg_7d&start=2020-03-01&end=2020-06-01&window=7``.
+``http://localhost:8050/latency`` summarizes the latencies of the recorded queries.
+
+"""
+import json
+import threading
+import time
+from collections import deque
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import panel_to_frame
+from src.library.panel_store import slice_panel
+
+# Memory in bytes of the query results which are kept in the cache
+CACHE_BUDGET = 64 * 1024**2
+# Number of queries whose latencies are kept
+MAX_LATENCIES = 100_000
+
+
+class PanelQuery:
+    """Query mapped dense panels and cache the results.
+
+    Args:
+        panel_paths (dict): panel names as keys and paths to the .npy files as values
+        cache_budget (int): memory budget in bytes of the cache. Defaults to
+        CACHE_BUDGET.
+        max_latencies (int): number of queries whose latencies are kept. Defaults to
+        MAX_LATENCIES.
+    """
+
+    def __init__(
+        self, panel_paths, cache_budget=CACHE_BUDGET, max_latencies=MAX_LATENCIES
+    ):
+        self.panels = {
+            name: load_dense_panel(path) for name, path in panel_paths.items()
+        }
+        self.cache_budget = cache_budget
+        self.latencies = deque(maxlen=max_latencies)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def query(
+        self, panel, entities=None, metrics=None, start=None, end=None, window=None
+    ):
+        """Select entities, metrics and a date range of a panel.
+
+        Args:
+            panel (str): name of the panel, e.g. "eu_country_level"
+            entities (list): entities to select. Defaults to None which selects all.
+            metrics (list): metrics to select. Defaults to None which selects all.
+            start (str): first day, e.g. "2020-03-01". Defaults to None.
+            end (str): last day (inclusive). Defaults to None.
+            window (int): length in days of a trailing moving average which is applied
+            to the metrics. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: metrics as columns and (entity, date) as index
+        """
+        return self.query_with_latency(panel, entities, metrics, start, end, window)[0]
+
+    def query_with_latency(
+        self, panel, entities=None, metrics=None, start=None, end=None, window=None
+    ):
+        """Select entities, metrics and a date range of a panel and time the query.
+
+        Args:
+            see :meth:`query`
+
+        Returns:
+            tuple: result of :meth:`query` and the latency record of this query, a dict
+            with "panel", "cache_hit", "rows" and "seconds"
+        """
+        key = (
+            panel,
+            None if entities is None else tuple(entities),
+            None if metrics is None else tuple(metrics),
+            start,
+            end,
+            window,
+        )
+        started = time.perf_counter()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+
+        cache_hit = cached is not None
+        if cache_hit:
+            result = cached[0].copy()
+        else:
+            result = self._evaluate(*key)
+            self._store(key, result.copy())
+
+        latency = {
+            "panel": panel,
+            "cache_hit": cache_hit,
+            "rows": len(result),
+            "seconds": time.perf_counter() - started,
+        }
+        with self._lock:
+            self.latencies.append(latency)
+        return result, latency
+
+    def latency_report(self):
+        """Summarize the latencies of the recorded queries.
+
+        Returns:
+            pandas.DataFrame: number of queries, mean, median and maximum latency in
+            milliseconds for cache hits and misses
+        """
+        with self._lock:
+            records = list(self.latencies)
+        latencies = pd.DataFrame(
+            records, columns=["panel", "cache_hit", "rows", "seconds"]
+        )
+        latencies["milliseconds"] = latencies["seconds"] * 1000
+        return latencies.groupby("cache_hit")["milliseconds"].agg(
+            ["count", "mean", "median", "max"]
+        )
+
+    def _evaluate(self, panel, entities, metrics, start, end, window):
+        mapped = self.panels[panel]
+        if not window or window <= 1:
+            return panel_to_frame(slice_panel(mapped, entities, start, end, metrics))
+
+        # Read window - 1 additional days so the first selected day has a full window
+        first = (
+            None
+            if start is None
+            else pd.Timestamp(start) - pd.Timedelta(days=window - 1)
+        )
+        selection = slice_panel(mapped, entities, first, end, metrics)
+        values = np.lib.stride_tricks.sliding_window_view(
+            np.asarray(selection["values"]), window, axis=1
+        ).mean(axis=-1)
+
+        smoothed = {
+            **selection,
+            "values": values,
+            "dates": selection["dates"][window - 1 :],
+        }
+        if start is not None:
+            smoothed = slice_panel(smoothed, start=start)
+        return panel_to_frame(smoothed)
+
+    def _store(self, key, result):
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size > self.cache_budget:
+            return
+
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = (result, size)
+            self._cache_bytes += size
+            while self._cache_bytes > self.cache_budget:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted_size
+
+
+def serve_panel_queries(panel_query, host="127.0.0.1", port=8050):
+    """Answer queries of a PanelQuery over local HTTP until interrupted.
+
+    GET /query takes the arguments of :meth:`PanelQuery.query` as url parameters,
+    entities and metrics separated by commas, and returns the result as json in the
+    "split" orientation of pandas together with the latency of the query. GET /latency
+    returns the latency report.
+
+    Args:
+        panel_query (PanelQuery): the panels which are served
+        host (str): host name. Defaults to "127.0.0.1".
+        port (int): port. Defaults to 8050.
+    """
+    from http.server import BaseHTTPRequestHandler
+    from http.server import ThreadingHTTPServer
+    from urllib.parse import parse_qs
+    from urllib.parse import urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            arguments = {key: value[0] for key, value in parse_qs(url.query).items()}
+            try:
+                if url.path == "/query":
+                    body = _answer_query(panel_query, arguments)
+                elif url.path == "/latency":
+                    body = (
+                        panel_query.latency_report()
+                        .reset_index()
+                        .to_json(orient="records")
+                    )
+                else:
+                    self.send_error(404)
+                    return
+            except (KeyError, ValueError) as error:
+                self.send_error(400, str(error))
+                return
+
+            content = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    with ThreadingHTTPServer((host, port), Handler) as server:
+        server.serve_forever()
+
+
+def _answer_query(panel_query, arguments):
+    result, latency = panel_query.query_with_latency(
+        arguments["panel"],
+        entities=_split(arguments.get("entities")),
+        metrics=_split(arguments.get("metrics")),
+        start=arguments.get("start"),
+        end=arguments.get("end"),
+        window=int(arguments["window"]) if "window" in arguments else None,
+    )
+    data = json.loads(result.reset_index().to_json(orient="split", date_format="iso"))
+    return json.dumps(
+        {
+            **data,
+            "cache_hit": latency["cache_hit"],
+            "milliseconds": latency["seconds"] * 1000,
+        }
+    )
+
+
+def _split(argument):
+    return None if argument is None else argument.split(",")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.config import BLD
+
+    parser = argparse.ArgumentParser(description="Serve the dense panels locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--panels", type=Path, default=BLD / "data" / "panels")
+    parser.add_argument("--cache-budget", type=int, default=CACHE_BUDGET)
+    cli_arguments = parser.parse_args()
+
+    serve_panel_queries(
+        PanelQuery(
+            {path.stem: path for path in sorted(cli_arguments.panels.glob("*.npy"))},
+            cache_budget=cli_arguments.cache_budget,
+        ),
+        host=cli_arguments.host,
+        port=cli_arguments.port,
+    )
@@ -0,0 +1,171 @@
+"""Store a panel as a dense, memory-mapped (entity x day x metric) array.
+
+The values are written once to a .npy file, the labels of the three axes to a small
+json sidecar with the same name. Mapping the panel reads only the sidecar, slices of
+countries, date ranges and metrics are views into the mapped file and only the pages
+which are actually used are read from disk.
+
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def write_dense_panel(data, entity, metrics, path, date="date", dtype="float64"):
+    """Write a long format data set as dense memory-mapped panel.
+
+    Args:
+        data (pandas.DataFrame): long format data, entity and date may be columns or
+        index levels
+        entity (str): name of the entity variable, e.g. "country"
+        metrics (list): numeric variables which are stored
+        path (pathlib.Path): path to the .npy file, the sidecar is written next to it
+        date (str): name of the date variable. Defaults to "date".
+        dtype (str): "float64" or "float32". Defaults to "float64".
+    """
+    path = Path(path)
+    data = data.reset_index() if entity not in data.columns else data
+
+    entities = np.sort(data[entity].unique())
+    dates = pd.to_datetime(data[date])
+    first_day = dates.min().normalize()
+    n_days = (dates.max().normalize() - first_day).days + 1
+
+    entity_positions = np.searchsorted(entities, data[entity].to_numpy())
+    day_positions = (dates.dt.normalize() - first_day).dt.days.to_numpy()
+
+    values = np.lib.format.open_memmap(
+        path, mode="w+", dtype=dtype, shape=(len(entities), n_days, len(metrics))
+    )
+    values[:] = np.nan
+    values[entity_positions, day_positions, :] = data[metrics].to_numpy(dtype=dtype)
+    values.flush()
+    del values
+
+    _write_sidecar(path, entity, entities.tolist(), first_day, n_days, metrics)
+
+
+def save_dense_panel(panel, path):
+    """Write a panel which is held in memory, e.g. a derived panel.
+
+    Args:
+        panel (dict): panel in the format of load_dense_panel, the dates must be
+        consecutive days
+        path (pathlib.Path): path to the .npy file, the sidecar is written next to it
+    """
+    path = Path(path)
+    np.save(path, np.asarray(panel["values"]))
+    _write_sidecar(
+        path,
+        panel["entity"],
+        list(panel["entities"]),
+        panel["dates"][0],
+        len(panel["dates"]),
+        panel["metrics"],
+    )
+
+
+def load_dense_panel(path, mode="r"):
+    """Map a dense panel without reading its values.
+
+    Args:
+        path (pathlib.Path): path to the .npy file
+        mode (str): mode of :func:`numpy.load` for memory mapping. Defaults to "r".
+
+    Returns:
+        dict: "values" (memory-mapped array of shape (entity, day, metric)), "entity"
+        (name of the entity variable), "entities", "dates" (pandas.DatetimeIndex) and
+        "metrics"
+    """
+    path = Path(path)
+    with open(path.with_suffix(".json")) as sidecar_file:
+        sidecar = json.load(sidecar_file)
+
+    return {
+        "values": np.load(path, mmap_mode=mode),
+        "entity": sidecar["entity"],
+        "entities": sidecar["entities"],
+        "dates": pd.date_range(sidecar["first_day"], periods=sidecar["n_days"]),
+        "metrics": sidecar["metrics"],
+    }
+
+
+def slice_panel(panel, entities=None, start=None, end=None, metrics=None):
+    """Select entities, a date range and metrics of a panel.
+
+    Selections of one entity or metric, of consecutive entities or metrics and of
+    date ranges are views and do not copy any data.
+
+    Args:
+        panel (dict): output of load_dense_panel or slice_panel
+        entities (list): entities to select. Defaults to None which selects all.
+        start (str): first day, e.g. "2020-03-01". Defaults to None.
+        end (str): last day (inclusive). Defaults to None.
+        metrics (list): metrics to select. Defaults to None which selects all.
+
+    Returns:
+        dict: panel with the same keys as the input
+    """
+    entity_selection, entities = _selection(panel["entities"], entities)
+    metric_selection, metrics = _selection(panel["metrics"], metrics)
+
+    dates = panel["dates"]
+    first = 0 if start is None else dates.searchsorted(pd.Timestamp(start))
+    last = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), "right")
+
+    values = panel["values"][entity_selection][:, first:last][:, :, metric_selection]
+
+    return {
+        **panel,
+        "values": values,
+        "entities": entities,
+        "dates": dates[first:last],
+        "metrics": metrics,
+    }
+
+
+def panel_to_frame(panel, dropna=True):
+    """Convert a (sliced) panel to a long data frame.
+
+    Args:
+        panel (dict): output of load_dense_panel or slice_panel
+        dropna (bool): drop days for which all metrics are missing. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: metrics as columns and (entity, date) as index
+    """
+    values = np.asarray(panel["values"])
+    index = pd.MultiIndex.from_product(
+        [panel["entities"], panel["dates"]], names=[panel["entity"], "date"]
+    )
+    data = pd.DataFrame(
+        values.reshape(-1, values.shape[2]), index=index, columns=panel["metrics"]
+    )
+    return data.dropna(how="all") if dropna else data
+
+
+def _selection(labels, selected):
+    """Index which selects labels, a slice if the selected labels are consecutive."""
+    if selected is None:
+        return slice(None), list(labels)
+
+    position = {label: i for i, label in enumerate(labels)}
+    positions = [position[label] for label in selected]
+    if positions and positions == list(range(positions[0], positions[-1] + 1)):
+        return slice(positions[0], positions[0] + len(positions)), list(selected)
+
+    return positions, list(selected)
+
+
+def _write_sidecar(path, entity, entities, first_day, n_days, metrics):
+    sidecar = {
+        "entity": entity,
+        "entities": entities,
+        "first_day": first_day.strftime("%Y-%m-%d"),
+        "n_days": int(n_days),
+        "metrics": list(metrics),
+    }
+    with open(path.with_suffix(".json"), "w") as sidecar_file:
+        json.dump(sidecar, sidecar_file, indent=4, ensure_ascii=False)
@@ -0,0 +1,363 @@
+"""Execute independent tasks of the project in parallel.
+
+This module is a pytask plugin which is registered via the ``pytask`` entry point in
+*setup.py*, like :mod:`src.library.instrumentation`. It replaces the sequential loop
+of pytask by a loop which starts every task as soon as all tasks it depends on are
+finished, so independent branches of the pipeline, e.g. the downloads, the preparation
+of the OWID and stringency data, the plots and the per-outcome table exports, run at
+the same time.
+
+The number of workers is set with ``n_workers`` in *pytask.ini* or ``--n-workers`` on
+the command line, "auto" uses all cores. The default of 1 keeps the sequential loop of
+pytask. Tasks declare what they need with the marker ``resources``:\n
+1. ``@pytask.mark.resources(kind="io")`` for tasks which mostly wait on the network or
+   the disk, e.g. downloads. They run in one of ``io_workers`` threads and do not
+   occupy a worker.\n
+2. ``@pytask.mark.resources(kind="cpu", cpus=n)`` for tasks which compute, e.g. fitting
+   models or drawing plots. They run in a separate process and occupy ``n`` of the
+   workers, at most all of them. Tasks without the marker occupy one worker. A task
+   which waits for workers reserves them, so tasks which wait behind it only start if
+   they do not occupy a worker.\n
+
+Tasks which start their own pool of processes, e.g. with
+:func:`src.library.sharding.map_shards`, declare the size of the pool, so the pipeline
+does not oversubscribe the cores. The number of workers which the scheduler grants a
+task may be smaller and the task sizes its pool with :func:`granted_workers`. If the
+tasks run sequentially, the pool has the declared size, e.g. ``N_WORKERS`` of
+*src/config.py*, which is set by the environment variable COVID_MOBILITY_WORKERS.
+Task functions are not pickled but looked up by name
+in their module, which the process re-imports, so task modules must not depend on state
+created by other tasks at import time. With ``--pdb`` or ``--trace`` tasks are always
+executed sequentially. The private parts of pytask which the loop needs are imported
+from :mod:`src.library.pytask_internals`.
+
+"""
+import importlib.util
+import inspect
+import os
+import pickle
+import sys
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+
+import click
+
+from src.library.instrumentation import is_executed_by_worker
+from src.library.instrumentation import measure_execution
+from src.library.instrumentation import profile_path
+from src.library.pytask_internals import hookimpl
+from src.library.pytask_internals import is_function_task
+from src.library.pytask_internals import report_from_task
+from src.library.pytask_internals import task_function_kwargs
+from src.library.pytask_internals import task_markers
+
+IO_WORKERS = 8
+
+# Environment variable of a worker process with the number of workers of its task
+GRANTED_WORKERS = "COVID_MOBILITY_GRANTED_WORKERS"
+
+
+@hookimpl
+def pytask_extend_command_line_interface(cli):
+    """Add the option for the number of workers to the command line interface."""
+    cli.commands["build"].params.append(
+        click.Option(
+            ["--n-workers"],
+            help="Number of workers for CPU-bound tasks, 'auto' uses all cores.  "
+            "[default: 1]",
+            default=None,
+        )
+    )
+
+
+@hookimpl
+def pytask_parse_config(config, config_from_cli, config_from_file):
+    """Read the options of the parallel execution."""
+    values = (
+        parse_n_workers(config.get("n_workers"))
+        for config in [config_from_cli, config_from_file]
+    )
+    config["n_workers"] = next((value for value in values if value is not None), 1)
+    config["io_workers"] = int(config_from_file.get("io_workers", IO_WORKERS))
+    config["markers"]["resources"] = (
+        "Declare the resources of a task for the parallel execution: kind='io' for "
+        "tasks which mostly wait, kind='cpu' (default) and cpus=n for tasks which "
+        "compute with n processes."
+    )
+
+
+@hookimpl(trylast=True)
+def pytask_post_parse(config):
+    """Execute tasks sequentially if a debugger is attached."""
+    if config.get("pdb") or config.get("trace"):
+        config["n_workers"] = 1
+
+
+def parse_n_workers(value):
+    """Parse the number of workers, "auto" is the number of cores."""
+    if value in [None, "None", "none"]:
+        return None
+    if value == "auto":
+        return os.cpu_count() or 1
+    n_workers = int(value)
+    if n_workers < 1:
+        raise ValueError("n_workers must be 'auto' or an integer of at least 1.")
+    return n_workers
+
+
+def granted_workers(requested):
+    """Number of processes which a running task may start.
+
+    Args:
+        requested (int): number of processes which the task declares
+
+    Returns:
+        int: requested, at most the number of workers which the scheduler granted the
+        task if it runs in a worker process
+    """
+    granted = os.environ.get(GRANTED_WORKERS)
+    return requested if granted is None else max(1, min(requested, int(granted)))
+
+
+def task_resources(task, n_workers):
+    """Kind and number of workers which a task occupies.
+
+    Args:
+        task (_pytask.nodes.MetaTask): task
+        n_workers (int): number of workers
+
+    Returns:
+        tuple: kind ("io" or "cpu") and number of workers, 0 for I/O tasks
+    """
+    markers = task_markers(task, "resources")
+    kwargs = markers[0].kwargs if markers else {}
+    kind = kwargs.get("kind", "cpu")
+    if kind not in ["io", "cpu"]:
+        raise ValueError(f"The resources of {task.name} must be of kind 'io' or 'cpu'.")
+    if kind == "io":
+        return kind, 0
+    return kind, max(1, min(int(kwargs.get("cpus", 1)), n_workers))
+
+
+def admitted_tasks(waiting, workers, free_workers):
+    """Waiting tasks which start now.
+
+    Tasks start in the order in which they wait. A task which needs more workers than
+    are free reserves them: the tasks waiting behind it start only if they occupy no
+    worker, so it starts as soon as the running tasks have finished and is not delayed
+    by smaller tasks which become ready in the meantime.
+
+    Args:
+        waiting (list): names of the waiting tasks, highest priority first
+        workers (dict): names of the tasks as keys and the number of workers which
+            they occupy as values, see :func:`task_resources`
+        free_workers (int): number of free workers
+
+    Returns:
+        list: names of the tasks which start now
+    """
+    admitted = []
+    blocked = False
+    for name in waiting:
+        if workers[name] > free_workers or (blocked and workers[name] > 0):
+            blocked = True
+            continue
+        admitted.append(name)
+        free_workers -= workers[name]
+    return admitted
+
+
+@hookimpl(tryfirst=True)
+def pytask_execute_build(session):
+    """Execute ready tasks in parallel as long as workers are free."""
+    if not is_executed_by_worker(session):
+        return None
+
+    n_workers = session.config["n_workers"]
+    free_workers = n_workers
+    waiting = []
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=n_workers) as processes, ThreadPoolExecutor(
+        max_workers=session.config["io_workers"]
+    ) as threads:
+        session.executors = {"cpu": processes, "io": threads}
+
+        while session.scheduler.is_active() or waiting or running:
+            # Move all ready tasks to the waiting tasks, highest priority first
+            if session.scheduler.is_active() and not session.should_stop:
+                ready = session.scheduler.get_ready(max(len(session.scheduler.dag), 1))
+                waiting.extend(reversed(ready))
+
+            workers = {
+                name: task_resources(session.dag.nodes[name]["task"], n_workers)[1]
+                for name in waiting
+            }
+            for name in admitted_tasks(waiting, workers, free_workers):
+                if session.should_stop:
+                    break
+                waiting.remove(name)
+
+                task = session.dag.nodes[name]["task"]
+                future = _start_task(session, task)
+                if future is None:
+                    session.scheduler.done(name)
+                else:
+                    running[name] = (future, workers[name])
+                    free_workers -= workers[name]
+
+            if session.should_stop:
+                waiting.clear()
+                for future, _ in running.values():
+                    future.cancel()
+                if not running:
+                    break
+
+            if not running:
+                continue
+
+            finished, _ = wait(
+                [future for future, _ in running.values()], return_when=FIRST_COMPLETED
+            )
+            for name, (future, workers) in list(running.items()):
+                if future in finished:
+                    del running[name]
+                    free_workers += workers
+                    task = session.dag.nodes[name]["task"]
+                    _finish_task(session, task, future)
+                    session.scheduler.done(name)
+
+    return True
+
+
+@hookimpl(tryfirst=True)
+def pytask_execute_task(session, task):
+    """Submit a task to the threads or processes and return the future."""
+    if not is_executed_by_worker(session):
+        return None
+
+    kind, workers = task_resources(task, session.config["n_workers"])
+    if not is_function_task(task):
+        kind = "io"
+    instrument = session.config.get("instrumentation", True)
+    profile = profile_path(session, task) if instrument else None
+    if kind == "io":
+        return session.executors["io"].submit(
+            _execute_in_thread, task, instrument, profile
+        )
+
+    target, kwargs = _task_target(task)
+    return session.executors["cpu"].submit(
+        execute_task_function, target, kwargs, instrument, profile, workers
+    )
+
+
+def execute_task_function(target, kwargs, instrument=True, profile=None, workers=1):
+    """Execute the function of a task in a worker process.
+
+    Args:
+        target (callable or tuple): task function, or path of the task module and name
+        of the function for functions which cannot be pickled
+        kwargs (dict): arguments of the function
+        instrument (bool): whether to measure the execution. Defaults to True.
+        profile (pathlib.Path): path for the cProfile stats. Defaults to None.
+        workers (int): number of workers which the task occupies, see
+            :func:`granted_workers`. Defaults to 1.
+
+    Returns:
+        dict: measurements, see :func:`src.library.instrumentation.measure_execution`,
+        None if the execution is not measured
+    """
+    os.environ[GRANTED_WORKERS] = str(workers)
+    function = _load_task_function(*target) if isinstance(target, tuple) else target
+    if not instrument:
+        function(**kwargs)
+        return None
+
+    measurements = {}
+    with measure_execution(measurements, profile):
+        function(**kwargs)
+    return measurements
+
+
+def _start_task(session, task):
+    """Set up and submit a task, return None if it does not run."""
+    session.hook.pytask_execute_task_log_start(session=session, task=task)
+    try:
+        session.hook.pytask_execute_task_setup(session=session, task=task)
+        return session.hook.pytask_execute_task(session=session, task=task)
+    except Exception:
+        report = report_from_task(task, sys.exc_info())
+        _report(session, task, report)
+        return None
+
+
+def _finish_task(session, task, future):
+    """Tear down a finished task and report it."""
+    try:
+        measurements = future.result()
+        if measurements is not None:
+            task.attributes["measurements"] = measurements
+        session.hook.pytask_execute_task_teardown(session=session, task=task)
+    except Exception as error:
+        report = report_from_task(task, (type(error), error, error.__traceback__))
+    else:
+        report = report_from_task(task)
+    _report(session, task, report)
+
+
+def _report(session, task, report):
+    session.hook.pytask_execute_task_process_report(session=session, report=report)
+    session.hook.pytask_execute_task_log_end(session=session, task=task, report=report)
+    session.execution_reports.append(report)
+
+
+def _execute_in_thread(task, instrument, profile):
+    if not instrument:
+        task.execute()
+        return None
+
+    measurements = {}
+    with measure_execution(measurements, profile):
+        task.execute()
+    return measurements
+
+
+def _task_target(task):
+    """Function of a task which can be sent to a process and its arguments.
+
+    Functions defined in task modules are referenced by the path of the module and
+    their name, because pytask does not import task modules as regular modules.
+    Functions which plugins substitute, e.g. to compile LaTeX documents, are pickled.
+    """
+    kwargs = task_function_kwargs(task)
+    function = getattr(task.function, "func", task.function)
+    source = inspect.getsourcefile(inspect.unwrap(function))
+    if source is not None and Path(source).resolve() == Path(task.path).resolve():
+        arguments = {**getattr(task.function, "keywords", {}), **kwargs}
+        return (Path(task.path), function.__name__), arguments
+
+    try:
+        pickle.dumps(task.function)
+    except Exception as error:
+        raise TypeError(
+            f"The function of {task.name} cannot be sent to a process. Declare the "
+            "task with @pytask.mark.resources(kind='io') to run it in a thread."
+        ) from error
+    return task.function, kwargs
+
+
+_TASK_MODULES = {}
+
+
+def _load_task_function(path, name):
+    """Import a task module once per process and return one of its functions."""
+    if path not in _TASK_MODULES:
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _TASK_MODULES[path] = module
+    return getattr(_TASK_MODULES[path], name)
@@ -0,0 +1,207 @@
+"""Read and write data sets which are partitioned by the values of one column.
+
+A partitioned data set is a directory with one file per value of the partitioning
+column, e.g. one file per country. Partitions can be written chunk by chunk from a
+large csv file and read back selectively, so the memory needed to process a data set
+is bounded by its largest partition instead of its total size.
+
+Prepared data sets are written as one pickle per entity which is sorted by entity and
+date. Tasks which need a single country read only its partition, so their I/O is
+proportional to that country instead of the whole data set. If the entities are known
+in advance, the task which writes the partitions declares them as products, so pytask
+rebuilds a partition which was deleted or modified.
+
+"""
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+
+def partition_file_name(key, suffix):
+    """File name of a partition which is safe for arbitrary keys like "Côte d'Ivoire".
+
+    Args:
+        key (str): value of the partitioning column
+        suffix (str): file suffix including the dot, e.g. ".csv"
+
+    Returns:
+        str: file name of the partition
+    """
+    return quote(str(key), safe="") + suffix
+
+
+def partition_paths(directory, keys, suffix=".pkl"):
+    """Paths of the partitions of some keys, e.g. to declare them as products of a task.
+
+    Args:
+        directory (pathlib.Path): directory of the partitions
+        keys (list): values of the partitioning column
+        suffix (str): file suffix including the dot. Defaults to ".pkl".
+
+    Returns:
+        dict: keys as keys and paths to their partitions as values
+    """
+    return {key: Path(directory) / partition_file_name(key, suffix) for key in keys}
+
+
+def chunksize_for_memory_budget(csv_path, memory_budget, n_sample=10_000):
+    """Number of csv rows which can be held in memory within a budget.
+
+    Args:
+        csv_path (pathlib.Path): path to csv file
+        memory_budget (int): memory budget in bytes
+        n_sample (int): number of rows used to estimate the memory per row
+
+    Returns:
+        int: number of rows per chunk
+    """
+    sample = pd.read_csv(csv_path, nrows=n_sample, low_memory=False)
+    bytes_per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    return max(int(memory_budget // bytes_per_row), 1)
+
+
+def partition_csv(csv_path, column, directory, memory_budget, **read_csv_kwargs):
+    """Split a csv file into one csv file per value of a column.
+
+    The file is read in chunks which fit into the memory budget and every chunk is
+    appended to the partitions of the keys it contains, so the whole file is never
+    held in memory.
+
+    Args:
+        csv_path (pathlib.Path): path to csv file
+        column (str): partitioning column
+        directory (pathlib.Path): directory for the partitions
+        memory_budget (int): memory budget in bytes for one chunk
+        **read_csv_kwargs: keyword arguments passed to :func:`pandas.read_csv`
+
+    Returns:
+        dict: partition keys as keys and paths to the partitions as values
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for old_partition in directory.glob("*.csv"):
+        old_partition.unlink()
+
+    chunksize = chunksize_for_memory_budget(csv_path, memory_budget)
+    partitions = {}
+
+    for chunk in pd.read_csv(
+        csv_path, chunksize=chunksize, low_memory=False, **read_csv_kwargs
+    ):
+        for key, partition in chunk.groupby(column, sort=False):
+            path = directory / partition_file_name(key, ".csv")
+            partition.to_csv(path, mode="a", header=key not in partitions, index=False)
+            partitions[key] = path
+
+    return {key: partitions[key] for key in sorted(partitions)}
+
+
+def write_partition_index(partitions, path, rows=None):
+    """Write an index of partitions to a json file.
+
+    Args:
+        partitions (dict): partition keys as keys and paths as values
+        path (pathlib.Path): path to the json file
+        rows (dict): partition keys as keys and their number of rows as values, e.g.
+            for the instrumentation of the pipeline. Defaults to None.
+    """
+    path = Path(path)
+    index = {
+        "partitions": {
+            str(key): Path(partition).relative_to(path.parent).as_posix()
+            for key, partition in partitions.items()
+        }
+    }
+    if rows is not None:
+        index["rows"] = {str(key): int(n_rows) for key, n_rows in rows.items()}
+    with open(path, "w") as index_file:
+        json.dump(index, index_file, indent=4, ensure_ascii=False)
+
+
+def read_partition_index(path):
+    """Read an index of partitions from a json file.
+
+    Args:
+        path (pathlib.Path): path to the json file
+
+    Returns:
+        dict: partition keys as keys and absolute paths as values
+    """
+    path = Path(path)
+    with open(path) as index_file:
+        index = json.load(index_file)
+    return {
+        key: path.parent / partition for key, partition in index["partitions"].items()
+    }
+
+
+def read_partition_rows(path):
+    """Read the number of rows of the partitions from an index.
+
+    Args:
+        path (pathlib.Path): path to the json file
+
+    Returns:
+        dict: partition keys as keys and their number of rows as values, None if the
+        index has no row counts
+    """
+    with open(path) as index_file:
+        return json.load(index_file).get("rows")
+
+
+def write_partitioned(data, column, directory, sort_by=("date",)):
+    """Write a data set as one pickle file per value of a column.
+
+    Every partition is sorted by the partitioning column and ``sort_by``, so rows of
+    one entity are contiguous and ordered by date when the partition is read.
+
+    Args:
+        data (pandas.DataFrame): data with column as column
+        column (str): partitioning column, e.g. "country"
+        directory (pathlib.Path): directory for the partitions
+        sort_by (tuple): columns by which every partition is sorted after column.
+            Defaults to ("date",).
+
+    Returns:
+        dict: partition keys as keys and paths to the partitions as values
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for old_partition in directory.glob("*.pkl"):
+        old_partition.unlink()
+
+    partitions = {}
+    for key, partition in data.groupby(column, sort=True):
+        partition = partition.sort_values([column, *sort_by], kind="stable")
+        path = directory / partition_file_name(key, ".pkl")
+        partition.reset_index(drop=True).to_pickle(path)
+        partitions[key] = path
+
+    return partitions
+
+
+def read_partitions(index_path, keys=None):
+    """Read the partitions of some keys of a partitioned data set.
+
+    Only the files of the requested keys are opened. Partitions are concatenated in
+    the order of the index, which is sorted by key.
+
+    Args:
+        index_path (pathlib.Path): path to the json index of the partitions
+        keys (list): partition keys to read. Defaults to None which reads all.
+
+    Returns:
+        pandas.DataFrame: rows of the requested partitions
+    """
+    index = read_partition_index(index_path)
+    if keys is not None:
+        missing = set(keys) - set(index)
+        if missing:
+            raise KeyError(f"No partitions for {sorted(missing)} in {index_path}.")
+        index = {key: path for key, path in index.items() if key in set(keys)}
+
+    return pd.concat(
+        [pd.read_pickle(path) for path in index.values()], ignore_index=True
+    )
@@ -0,0 +1,49 @@
+"""Private parts of pytask which the plugins of the project use.
+
+The parallel execution of :mod:`src.library.parallel` replaces the execution loop of
+pytask and needs parts of pytask which are not public, e.g. the report of an executed
+task. They are imported only here, so an update of pytask has to be checked against
+this module only. pytask is pinned to PYTASK_VERSION in *environment.yml* and the
+plugins cannot be loaded with a different version.
+
+"""
+from importlib.metadata import version
+
+import pluggy
+from _pytask.mark import get_specific_markers_from_task
+from _pytask.nodes import PythonFunctionTask
+from _pytask.report import ExecutionReport
+
+PYTASK_VERSION = "0.0.16"
+
+# Marker of hook implementations, pytask is not importable while it loads the plugins
+hookimpl = pluggy.HookimplMarker("pytask")
+
+if version("pytask") != PYTASK_VERSION:
+    raise ImportError(
+        f"The plugins of the project are written for pytask {PYTASK_VERSION}, but "
+        f"pytask {version('pytask')} is installed. Install pytask {PYTASK_VERSION} "
+        "or check src/library/pytask_internals.py against the installed version."
+    )
+
+
+def task_markers(task, name):
+    """Markers with a name which are attached to a task."""
+    return get_specific_markers_from_task(task, name)
+
+
+def is_function_task(task):
+    """Whether a task executes a Python function."""
+    return isinstance(task, PythonFunctionTask)
+
+
+def task_function_kwargs(task):
+    """Arguments of the function of a task, i.e. its dependencies and products."""
+    return task._get_kwargs_from_task_for_function()
+
+
+def report_from_task(task, exc_info=None):
+    """Execution report of a task which succeeded or raised an exception."""
+    if exc_info is None:
+        return ExecutionReport.from_task(task)
+    return ExecutionReport.from_task_and_exception(task, exc_info)
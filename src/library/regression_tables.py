@@ -0,0 +1,286 @@
+"""Render regression tables directly from arrays of estimates.
+
+The estimates of all specifications of one dependent variable are stored as arrays
+with one row per specification and one column per covariate, see
+:func:`regression_results_from_fits`. Tables for many dependent variables are rendered
+in one pass as LaTeX, HTML or plain text, the layout follows the Stargazer tables used
+in the paper.
+
+"""
+import numpy as np
+
+NOTE_LEVELS = [0.1, 0.05, 0.01]
+
+STATISTICS = [
+    ("nobs", "Observations"),
+    ("rsquared", "$R^2$"),
+    ("rsquared_adj", "Adjusted $R^2$"),
+    ("resid_std_err", "Residual Std. Error"),
+    ("fvalue", "F Statistic"),
+]
+
+
+def regression_results_from_fits(fits, specifications=None):
+    """Collect the estimates of several fitted models into arrays.
+
+    Args:
+        fits (list): fitted statsmodels regression results, one per specification
+        specifications (list): formulas of the specifications. Defaults to None.
+
+    Returns:
+        dict: "terms" (list of covariates in order of appearance), "params", "bse" and
+        "pvalues" (arrays of shape (n_specifications, n_terms), NaN if a covariate is
+        not part of a specification), "cov_params" (array of shape (n_specifications,
+        n_terms, n_terms)) and the statistics "nobs", "rsquared", "rsquared_adj",
+        "resid_std_err", "fvalue", "f_pvalue" and "df_resid" (arrays of length
+        n_specifications)
+    """
+    terms = list(dict.fromkeys(term for fit in fits for term in fit.params.index))
+    position = {term: i for i, term in enumerate(terms)}
+
+    results = {"terms": terms}
+    for name in ["params", "bse", "pvalues"]:
+        values = np.full((len(fits), len(terms)), np.nan)
+        for i, fit in enumerate(fits):
+            series = getattr(fit, name)
+            values[i, [position[term] for term in series.index]] = series.to_numpy()
+        results[name] = values
+
+    covariance = np.full((len(fits), len(terms), len(terms)), np.nan)
+    for i, fit in enumerate(fits):
+        positions = [position[term] for term in fit.params.index]
+        covariance[i][np.ix_(positions, positions)] = fit.cov_params().to_numpy()
+    results["cov_params"] = covariance
+
+    results["nobs"] = np.array([fit.nobs for fit in fits])
+    results["rsquared"] = np.array([fit.rsquared for fit in fits])
+    results["rsquared_adj"] = np.array([fit.rsquared_adj for fit in fits])
+    results["resid_std_err"] = np.sqrt([fit.scale for fit in fits])
+    results["fvalue"] = np.array([fit.fvalue for fit in fits], dtype=float)
+    results["f_pvalue"] = np.array([fit.f_pvalue for fit in fits], dtype=float)
+    results["df_resid"] = np.array([fit.df_resid for fit in fits], dtype=float)
+    if specifications is not None:
+        results["specifications"] = list(specifications)
+
+    return results
+
+
+def covariate_positions(terms, covariates_order=None):
+    """Positions of the covariates in the order in which they appear in a table.
+
+    Covariates in covariates_order come first and in that order, followed by the
+    remaining covariates in their original order. The intercept is always last.
+
+    Args:
+        terms (list): covariates of the estimates
+        covariates_order (list): preferred order of covariates. Defaults to None.
+
+    Returns:
+        numpy.ndarray: positions of terms in table order
+    """
+    rank = {term: i for i, term in enumerate(covariates_order or [])}
+    n_ranked = len(rank)
+    keys = [
+        (term == "Intercept", rank.get(term, n_ranked), i)
+        for i, term in enumerate(terms)
+    ]
+    return np.array(sorted(range(len(terms)), key=keys.__getitem__), dtype=int)
+
+
+def render_regression_tables(
+    all_results,
+    fmt="latex",
+    covariates_names=None,
+    covariates_order=None,
+    dependent_variable_name="",
+    digits=3,
+):
+    """Render regression tables for several dependent variables.
+
+    Args:
+        all_results (dict): dependent variables as keys and outputs of
+        regression_results_from_fits as values
+        fmt (str): "latex", "html" or "text". Defaults to "latex".
+        covariates_names (dict): covariates as keys and displayed names as values.
+        Defaults to None.
+        covariates_order (list): preferred order of covariates. Defaults to None.
+        dependent_variable_name (str): caption above the model numbers. Defaults to "".
+        digits (int): number of decimals. Defaults to 3.
+
+    Returns:
+        dict: dependent variables as keys and rendered tables as values
+    """
+    renderer = {"latex": _render_latex, "html": _render_html, "text": _render_text}[fmt]
+    covariates_names = covariates_names or {}
+
+    tables = {}
+    for depvar, results in all_results.items():
+        positions = covariate_positions(results["terms"], covariates_order)
+        names = [
+            covariates_names.get(results["terms"][i], results["terms"][i])
+            for i in positions
+        ]
+        cells = _format_cells(results, positions, digits)
+        tables[depvar] = renderer(names, cells, dependent_variable_name)
+
+    return tables
+
+
+def _format_cells(results, positions, digits):
+    """Format estimates and statistics as strings, columns are specifications."""
+    params = results["params"][:, positions].T
+    bse = results["bse"][:, positions].T
+    missing = np.isnan(params)
+
+    cells = {
+        "params": np.where(missing, "", _format_numbers(params, digits)),
+        "stars": np.where(missing, "", _stars(results["pvalues"][:, positions].T)),
+        "bse": np.where(missing, "", "(" + _format_numbers(bse, digits) + ")"),
+        "f_stars": _stars(results["f_pvalue"]),
+    }
+    for name, _ in STATISTICS:
+        cells[name] = (
+            results[name].astype(int).astype(str)
+            if name == "nobs"
+            else _format_numbers(results[name], digits)
+        )
+
+    return cells
+
+
+def _format_numbers(values, digits):
+    return np.char.mod(f"%.{digits}f", np.nan_to_num(values)).astype(object)
+
+
+def _stars(pvalues):
+    n_stars = sum((pvalues < level).astype(int) for level in NOTE_LEVELS)
+    return np.array(["", "*", "**", "***"], dtype=object)[n_stars]
+
+
+def _render_latex(names, cells, dependent_variable_name):
+    n_models = cells["nobs"].shape[0]
+    params = cells["params"] + np.where(
+        cells["params"] == "", "", "$^{" + cells["stars"] + "}$"
+    )
+
+    lines = [
+        "\\begin{tabular}{@{\\extracolsep{5pt}}l" + "c" * n_models + "}",
+        "\\\\[-1.8ex]\\hline",
+        "\\hline \\\\[-1.8ex]",
+        f"& \\multicolumn{{{n_models}}}{{c}}"
+        f"{{\\textit{{{_escape_latex(dependent_variable_name)}}}}} \\",
+        f"\\cr \\cline{{2-{n_models + 1}}}",
+        "\\\\[-1.8ex] & " + " & ".join(f"({i + 1})" for i in range(n_models)) + " \\\\",
+        "\\hline \\\\[-1.8ex]",
+    ]
+    for name, row_params, row_bse in zip(names, params, cells["bse"]):
+        lines.append(f" {_escape_latex(name)} & " + " & ".join(row_params) + " \\\\")
+        lines.append("  & " + " & ".join(row_bse) + " \\\\")
+
+    lines.append("\\hline \\\\[-1.8ex]")
+    for name, label in STATISTICS:
+        values = cells[name]
+        if name == "fvalue":
+            values = values + "$^{" + cells["f_stars"] + "}$"
+        lines.append(f" {label} & " + " & ".join(values) + " \\\\")
+
+    lines += [
+        "\\hline",
+        "\\hline \\\\[-1.8ex]",
+        f"\\textit{{Note:}} & \\multicolumn{{{n_models}}}{{r}}"
+        "{$^{*}$p$<$0.1; $^{**}$p$<$0.05; $^{***}$p$<$0.01} \\\\",
+        "\\end{tabular}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _render_html(names, cells, dependent_variable_name):
+    n_models = cells["nobs"].shape[0]
+    rule = f'<tr><td colspan="{n_models + 1}" style="border-bottom: 1px solid black">'
+    rule += "</td></tr>"
+    params = cells["params"] + np.where(
+        cells["params"] == "", "", "<sup>" + cells["stars"] + "</sup>"
+    )
+
+    lines = [
+        '<table style="text-align:center">',
+        rule,
+        '<tr><td style="text-align:left"></td>'
+        f'<td colspan="{n_models}"><em>{dependent_variable_name}</em></td></tr>',
+        '<tr><td style="text-align:left"></td>'
+        + "".join(f"<td>({i + 1})</td>" for i in range(n_models))
+        + "</tr>",
+        rule,
+    ]
+    for name, row_params, row_bse in zip(names, params, cells["bse"]):
+        lines.append(
+            f'<tr><td style="text-align:left">{name}</td>'
+            + "".join(f"<td>{cell}</td>" for cell in row_params)
+            + "</tr>"
+        )
+        lines.append(
+            '<tr><td style="text-align:left"></td>'
+            + "".join(f"<td>{cell}</td>" for cell in row_bse)
+            + "</tr>"
+        )
+
+    lines.append(rule)
+    for name, label in STATISTICS:
+        values = cells[name]
+        if name == "fvalue":
+            values = values + "<sup>" + cells["f_stars"] + "</sup>"
+        label = label.replace("$R^2$", "R<sup>2</sup>")
+        lines.append(
+            f'<tr><td style="text-align:left">{label}</td>'
+            + "".join(f"<td>{cell}</td>" for cell in values)
+            + "</tr>"
+        )
+
+    lines += [
+        rule,
+        '<tr><td style="text-align:left">Note:</td>'
+        f'<td colspan="{n_models}" style="text-align:right">'
+        "<sup>*</sup>p&lt;0.1; <sup>**</sup>p&lt;0.05; <sup>***</sup>p&lt;0.01"
+        "</td></tr>",
+        "</table>",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _render_text(names, cells, dependent_variable_name):
+    n_models = cells["nobs"].shape[0]
+    params = cells["params"] + cells["stars"]
+    labels = [label.replace("$R^2$", "R2") for _, label in STATISTICS]
+
+    rows = [[""] + [f"({i + 1})" for i in range(n_models)], None]
+    for name, row_params, row_bse in zip(names, params, cells["bse"]):
+        rows.append([name] + list(row_params))
+        rows.append([""] + list(row_bse))
+    rows.append(None)
+    for (name, _), label in zip(STATISTICS, labels):
+        values = cells[name] + cells["f_stars"] if name == "fvalue" else cells[name]
+        rows.append([label] + list(values))
+    rows.append(None)
+    rows.append(["Note: *p<0.1; **p<0.05; ***p<0.01"] + [""] * n_models)
+
+    first_width = max(len(row[0]) for row in rows[:-1] if row is not None)
+    width = max(len(cell) for row in rows if row is not None for cell in row[1:])
+    total_width = first_width + (width + 2) * n_models
+    lines = [dependent_variable_name.center(total_width).rstrip()]
+    lines = lines if dependent_variable_name else []
+    lines.append("=" * total_width)
+    for row in rows:
+        if row is None:
+            lines.append("-" * total_width)
+        else:
+            line = row[0].ljust(first_width)
+            line += "".join(cell.rjust(width + 2) for cell in row[1:])
+            lines.append(line.rstrip())
+    lines.append("=" * total_width)
+    return "\n".join(lines) + "\n"
+
+
+def _escape_latex(text):
+    for character in ["&", "%", "_", "#"]:
+        text = text.replace(character, "\\" + character)
+    return text
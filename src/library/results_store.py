@@ -0,0 +1,181 @@
+"""Store regression estimates as numeric arrays in one compact file.
+
+The store is a numpy .npz archive. For every dependent variable (outcome) it holds the
+specifications, the terms and arrays indexed by (specification, term) for coefficients,
+standard errors and p-values, the covariance matrices of the coefficients indexed by
+(specification, term, term) as well as arrays indexed by specification for the number
+of observations, R² and the other summary statistics. The members of an .npz archive
+are read lazily, so the estimates of one outcome can be loaded without reading the
+others.
+
+"""
+import numpy as np
+import pandas as pd
+
+ARRAYS = [
+    "params",
+    "bse",
+    "pvalues",
+    "cov_params",
+    "nobs",
+    "rsquared",
+    "rsquared_adj",
+    "resid_std_err",
+    "fvalue",
+    "f_pvalue",
+    "df_resid",
+]
+
+LABELS = ["terms", "specifications"]
+
+
+def save_regression_results(all_results, path):
+    """Save the estimates of several outcomes to a results store.
+
+    Args:
+        all_results (dict): outcomes as keys and outputs of
+        :func:`src.library.regression_tables.regression_results_from_fits` as values
+        path (pathlib.Path): path to the .npz file
+    """
+    members = {"outcomes": np.array(list(all_results), dtype=str)}
+    for outcome, results in all_results.items():
+        for name in ARRAYS:
+            members[f"{outcome}/{name}"] = np.asarray(results[name], dtype=float)
+        for name in LABELS:
+            if name in results:
+                members[f"{outcome}/{name}"] = np.array(results[name], dtype=str)
+
+    with open(path, "wb") as store:
+        np.savez_compressed(store, **members)
+
+
+def list_outcomes(path):
+    """List the outcomes in a results store.
+
+    Args:
+        path (pathlib.Path): path to the .npz file
+
+    Returns:
+        list: outcomes in the order in which they were stored
+    """
+    with np.load(path, allow_pickle=False) as store:
+        return store["outcomes"].tolist()
+
+
+def load_regression_results(path, outcomes=None):
+    """Load the estimates of some outcomes from a results store.
+
+    Only the members of the requested outcomes are read from the file.
+
+    Args:
+        path (pathlib.Path): path to the .npz file
+        outcomes (list): outcomes to load. Defaults to None which loads all outcomes.
+
+    Returns:
+        dict: outcomes as keys and estimates in the format of
+        :func:`src.library.regression_tables.regression_results_from_fits` as values
+    """
+    all_results = {}
+    with np.load(path, allow_pickle=False) as store:
+        outcomes = store["outcomes"].tolist() if outcomes is None else outcomes
+        for outcome in outcomes:
+            results = {name: store[f"{outcome}/{name}"] for name in ARRAYS}
+            for name in LABELS:
+                if f"{outcome}/{name}" in store.files:
+                    results[name] = store[f"{outcome}/{name}"].tolist()
+            all_results[outcome] = results
+
+    return all_results
+
+
+def stack_regression_results(results_list):
+    """Stack the estimates of several models of the same outcome.
+
+    Args:
+        results_list (list): estimates of one outcome, e.g. one model each, in the
+        format of :func:`src.library.regression_tables.regression_results_from_fits`
+
+    Returns:
+        dict: estimates of all models with the union of their terms, NaN for terms
+        which are not part of a model
+    """
+    terms = list(
+        dict.fromkeys(term for results in results_list for term in results["terms"])
+    )
+    position = {term: i for i, term in enumerate(terms)}
+
+    stacked = {"terms": terms}
+    for name in ARRAYS:
+        blocks = []
+        for results in results_list:
+            values = np.asarray(results[name], dtype=float)
+            positions = [position[term] for term in results["terms"]]
+            if name == "cov_params":
+                block = np.full((len(values), len(terms), len(terms)), np.nan)
+                rows, columns = np.ix_(positions, positions)
+                block[:, rows, columns] = values
+            elif values.ndim == 2:
+                block = np.full((len(values), len(terms)), np.nan)
+                block[:, positions] = values
+            else:
+                block = values
+            blocks.append(block)
+        stacked[name] = np.concatenate(blocks)
+
+    if all("specifications" in results for results in results_list):
+        stacked["specifications"] = [
+            specification
+            for results in results_list
+            for specification in results["specifications"]
+        ]
+    return stacked
+
+
+def regression_results_to_frames(all_results):
+    """Estimates of several outcomes as long data frames, e.g. for a database.
+
+    Args:
+        all_results (dict): outcomes as keys and estimates in the format of
+        :func:`src.library.regression_tables.regression_results_from_fits` as values
+
+    Returns:
+        tuple: data frame of "params", "bse" and "pvalues" with one row per outcome,
+        specification and term, and data frame of the summary statistics with one row
+        per outcome and specification
+    """
+    estimates, statistics = [], []
+    for outcome, results in all_results.items():
+        n_specifications = len(np.asarray(results["nobs"]))
+        specifications = results.get(
+            "specifications", [str(i) for i in range(n_specifications)]
+        )
+        index = pd.MultiIndex.from_product(
+            [[outcome], specifications, results["terms"]],
+            names=["outcome", "specification", "term"],
+        )
+        estimates.append(
+            pd.DataFrame(
+                {
+                    name: np.asarray(results[name], dtype=float).ravel()
+                    for name in ["params", "bse", "pvalues"]
+                },
+                index=index,
+            )
+        )
+        statistics.append(
+            pd.DataFrame(
+                {
+                    name: np.asarray(results[name], dtype=float)
+                    for name in ARRAYS
+                    if name not in ["params", "bse", "pvalues", "cov_params"]
+                },
+                index=pd.MultiIndex.from_product(
+                    [[outcome], specifications], names=["outcome", "specification"]
+                ),
+            )
+        )
+
+    return (
+        pd.concat(estimates).reset_index(),
+        pd.concat(statistics).reset_index(),
+    )
@@ -0,0 +1,125 @@
+"""Predict outcomes under many policy scenarios from stored regression estimates.
+
+A scenario assigns values to the levers of the lockdown fatigue models, e.g. the
+stringency index and the duration of a lockdown. The design matrix of all scenarios is
+built column by column from the term names of the estimates, e.g.
+"second_lockdown_7days_moving_average_duration:stringency_index_avg_7d" is the product
+of two scenario variables. Predictions and their standard errors are then computed for
+all outcomes, specifications and scenarios in one pass from the stored coefficients and
+their covariance matrices: the prediction of a scenario with design row x is x'b and its
+standard error is the square root of x'Vx.
+
+"""
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+
+POWER = re.compile(r"np\.power\((\w+),\s*(\d+)\)")
+
+
+def scenario_grid(**levers):
+    """All combinations of the values of several levers.
+
+    Args:
+        **levers: names of scenario variables as keywords and their values as lists
+
+    Returns:
+        pandas.DataFrame: one row per scenario and one column per lever
+    """
+    return pd.DataFrame(list(itertools.product(*levers.values())), columns=[*levers])
+
+
+def scenario_design(scenarios, terms, baseline=None):
+    """Design matrix of the terms of a regression for all scenarios.
+
+    Args:
+        scenarios (pandas.DataFrame): one row per scenario, variables as columns
+        terms (list): term names as reported by statsmodels, e.g. "Intercept", "a:b"
+        or "np.power(a, 2)"
+        baseline (dict): values of variables which are not set by the scenarios.
+        Defaults to None.
+
+    Returns:
+        numpy.ndarray: array of shape (n_scenarios, n_terms)
+    """
+    baseline = baseline or {}
+    n_scenarios = len(scenarios)
+
+    def factor(name):
+        if name == "Intercept":
+            return np.ones(n_scenarios)
+        power = POWER.fullmatch(name)
+        if power is not None:
+            return factor(power.group(1)) ** int(power.group(2))
+        if name in scenarios:
+            return scenarios[name].to_numpy(dtype=float)
+        if name in baseline:
+            return np.full(n_scenarios, float(baseline[name]))
+        raise KeyError(f"The scenarios and the baseline do not set {name}.")
+
+    design = np.ones((n_scenarios, len(terms)))
+    for column, term in enumerate(terms):
+        for name in term.split(":"):
+            design[:, column] *= factor(name)
+    return design
+
+
+def predict_scenarios(
+    all_results, scenarios, baseline=None, level=0.95, interval="confidence"
+):
+    """Predictions and bands of all outcomes and specifications for all scenarios.
+
+    The estimates of all outcomes must share their specifications and terms, as the
+    results of :func:`src.analysis.task_regression_analysis.ols_regressions` do.
+    Terms which are not part of a specification do not contribute to its predictions.
+
+    Args:
+        all_results (dict): outcomes as keys and estimates as values, see
+        :func:`src.library.results_store.load_regression_results`
+        scenarios (pandas.DataFrame): one row per scenario, variables as columns
+        baseline (dict): values of variables which are not set by the scenarios.
+        Defaults to None.
+        level (float): coverage of the bands. Defaults to 0.95.
+        interval (str): "confidence" for the band of the expected outcome or
+        "prediction" which also includes the residual variance. Defaults to
+        "confidence".
+
+    Returns:
+        dict: "outcomes", "mean", "se", "lower" and "upper", the last four as arrays of
+        shape (n_outcomes, n_specifications, n_scenarios)
+    """
+    outcomes = [*all_results]
+    terms = all_results[outcomes[0]]["terms"]
+    if any(list(all_results[o]["terms"]) != list(terms) for o in outcomes):
+        raise ValueError("The estimates of all outcomes must have the same terms.")
+    design = scenario_design(scenarios, terms, baseline)
+
+    # Stack the estimates of all outcomes, absent terms have no effect
+    params = np.nan_to_num(np.stack([all_results[o]["params"] for o in outcomes]))
+    covariance = np.nan_to_num(
+        np.stack([all_results[o]["cov_params"] for o in outcomes])
+    )
+
+    mean = np.einsum("nt,ost->osn", design, params)
+    variance = np.einsum(
+        "nt,ostu,nu->osn", design, covariance, design, optimize="greedy"
+    )
+    if interval == "prediction":
+        residual_std = np.stack([all_results[o]["resid_std_err"] for o in outcomes])
+        variance = variance + residual_std[:, :, None] ** 2
+
+    # Critical values of the t distribution of every outcome and specification
+    from scipy.stats import t
+
+    df_resid = np.stack([all_results[o]["df_resid"] for o in outcomes])
+    critical_value = t.ppf(0.5 + level / 2, df_resid)[:, :, None]
+    se = np.sqrt(np.maximum(variance, 0))
+    return {
+        "outcomes": outcomes,
+        "mean": mean,
+        "se": se,
+        "lower": mean - critical_value * se,
+        "upper": mean + critical_value * se,
+    }
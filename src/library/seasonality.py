@@ -0,0 +1,71 @@
+"""Remove the weekly cycle from all series of a dense panel at once.
+
+Every series is decomposed additively into a trend, a weekday profile and a remainder.
+The trend is a centered 7-day moving average. The weekday profile is the mean
+deviation from the trend on each weekday, centered so that it sums to zero over the
+week. The seasonally adjusted series is the original series minus its weekday profile.
+All steps are array operations on the (entity, day, metric) values of the panel, so
+all countries and metrics are decomposed together instead of one series at a time.
+
+"""
+import numpy as np
+
+WEEK = 7
+
+
+def centered_moving_average(values, window=WEEK):
+    """Centered moving average along the day axis.
+
+    Days without a full window, at the edges or next to missing values, are missing.
+
+    Args:
+        values (numpy.ndarray): array of shape (entity, day, metric)
+        window (int): odd number of days. Defaults to 7.
+
+    Returns:
+        numpy.ndarray: array of the same shape as values
+    """
+    half = window // 2
+    trend = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        trend[:, half : values.shape[1] - half] = windows.mean(axis=-1)
+    return trend
+
+
+def weekday_decomposition(values, dates):
+    """Decompose all series of a panel into trend, weekday profile and remainder.
+
+    Args:
+        values (numpy.ndarray): array of shape (entity, day, metric)
+        dates (pandas.DatetimeIndex): consecutive days of the panel
+
+    Returns:
+        dict: "trend", "seasonal" (weekday profile of every day), "remainder" and
+        "adjusted" (values minus seasonal) as arrays of the shape of values and
+        "profile" as array of shape (entity, 7, metric) with Monday first
+    """
+    values = np.asarray(values, dtype=float)
+    trend = centered_moving_average(values)
+    deviation = values - trend
+
+    # One-hot weekdays of shape (day, 7) average the deviations per weekday
+    weekdays = np.eye(WEEK)[np.asarray(dates.weekday)]
+    observed = ~np.isnan(deviation)
+    sums = np.einsum("edm,dw->ewm", np.where(observed, deviation, 0), weekdays)
+    counts = np.einsum("edm,dw->ewm", observed.astype(float), weekdays)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = sums / counts
+        profile_observed = ~np.isnan(profile)
+        profile = profile - np.nansum(profile, axis=1, keepdims=True) / (
+            profile_observed.sum(axis=1, keepdims=True)
+        )
+
+    seasonal = profile[:, np.asarray(dates.weekday), :]
+    return {
+        "trend": trend,
+        "seasonal": seasonal,
+        "remainder": deviation - seasonal,
+        "adjusted": values - seasonal,
+        "profile": profile,
+    }
@@ -0,0 +1,53 @@
+"""Run a preparation step per shard of a data set on a process pool.
+
+Many preparation steps, e.g. moving averages and joins, are independent between
+countries. The data is therefore split into one shard per country, the shards are
+processed on a pool of processes and the results are concatenated in sorted order of
+the shard keys, so the output does not depend on the number of processes.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+
+def split_by_level(data, level):
+    """Split a data frame into shards by the values of an index level.
+
+    Args:
+        data (pandas.DataFrame): data with level in its index
+        level (str): index level which defines the shards
+
+    Returns:
+        dict: values of the level as keys and shards as values
+    """
+    return {key: shard for key, shard in data.groupby(level=level, sort=True)}
+
+
+def map_shards(function, shards, n_workers=1, **kwargs):
+    """Apply a function to every shard and concatenate the results.
+
+    The function must be importable from a module, since it is sent to the worker
+    processes by reference.
+
+    Args:
+        function (callable): takes a shard as first argument and returns a data frame
+        shards (dict): shard keys as keys and data frames as values
+        n_workers (int): number of processes. Defaults to 1 which runs the shards in
+        the current process.
+        **kwargs: keyword arguments passed to function for every shard
+
+    Returns:
+        pandas.DataFrame: results concatenated in sorted order of the shard keys
+    """
+    keys = sorted(shards)
+    apply = partial(function, **kwargs)
+
+    if n_workers > 1 and len(keys) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(keys))) as pool:
+            results = list(pool.map(apply, [shards[key] for key in keys]))
+    else:
+        results = [apply(shards[key]) for key in keys]
+
+    return pd.concat(results)
@@ -0,0 +1,169 @@
+"""Pairwise distances between the trajectories of many entities.
+
+Two distances are computed for all pairs of entities at once:
+
+- the correlation distance 1 - r over the days on which both series are observed, from
+  a handful of matrix products instead of a loop over pairs,
+- the dynamic time warping (DTW) distance within a Sakoe-Chiba band, which allows
+  countries to be compared whose mobility moved alike but a few days apart. The LB_Keogh
+  lower bound of all pairs is computed first. Pairs whose lower bound already exceeds a
+  maximal distance are pruned, the remaining pairs are warped in batches, vectorized
+  over pairs and spread over a pool of processes.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def correlation_matrix(values):
+    """Pearson correlation of all pairs of series over their common days.
+
+    Args:
+        values (numpy.ndarray): array of shape (entity, day), missing days are NaN
+
+    Returns:
+        numpy.ndarray: correlations of shape (entity, entity), NaN if two series have
+        less than two common days or no variation on them
+    """
+    values = np.asarray(values, dtype=float)
+    observed = (~np.isnan(values)).astype(float)
+    filled = np.where(observed > 0, values, 0)
+
+    # Sums over the common days of every pair (i, j), indexed by [i, j]
+    n_common = observed @ observed.T
+    sums = filled @ observed.T
+    squares = (filled**2) @ observed.T
+    products = filled @ filled.T
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = products - sums * sums.T / n_common
+        variance = squares - sums**2 / n_common
+        correlation = covariance / np.sqrt(variance * variance.T)
+
+    correlation[n_common < 2] = np.nan
+    return np.clip(correlation, -1, 1)
+
+
+def standardize_series(values):
+    """Fill gaps within every series and scale it to mean zero and variance one.
+
+    Args:
+        values (numpy.ndarray): array of shape (entity, day), missing days are NaN
+
+    Returns:
+        numpy.ndarray: standardized series, rows without observations stay NaN
+    """
+    filled = pd.DataFrame(values).T.interpolate(limit_direction="both").T.to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.nanstd(filled, axis=1, keepdims=True)
+        return (filled - np.nanmean(filled, axis=1, keepdims=True)) / np.where(
+            scale > 0, scale, 1
+        )
+
+
+def lb_keogh_matrix(values, window, chunk_size=64):
+    """LB_Keogh lower bounds of the DTW distance of all pairs of series.
+
+    Args:
+        values (numpy.ndarray): complete series of shape (entity, day)
+        window (int): half width of the Sakoe-Chiba band in days
+        chunk_size (int): number of series which are compared to all others at once.
+        Defaults to 64.
+
+    Returns:
+        numpy.ndarray: symmetric lower bounds of shape (entity, entity)
+    """
+    padded = np.pad(values, ((0, 0), (window, window)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * window + 1, axis=1)
+    upper = windows.max(axis=-1)
+    lower = windows.min(axis=-1)
+
+    # Squared excess of series i over the envelope of series j, indexed by [i, j],
+    # for chunks of series i to bound the memory of the (i, j, day) differences
+    bounds = np.empty((len(values), len(values)))
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start : start + chunk_size, None, :]
+        above = np.maximum(chunk - upper[None, :, :], 0)
+        below = np.maximum(lower[None, :, :] - chunk, 0)
+        bounds[start : start + chunk_size] = np.sqrt(
+            (above**2 + below**2).sum(axis=-1)
+        )
+    return np.maximum(bounds, bounds.T)
+
+
+def dtw_distances(x, y, window):
+    """DTW distances of many pairs of series, vectorized over pairs.
+
+    Args:
+        x (numpy.ndarray): complete series of shape (pair, day)
+        y (numpy.ndarray): complete series of shape (pair, day)
+        window (int): half width of the Sakoe-Chiba band in days
+
+    Returns:
+        numpy.ndarray: square roots of the minimal sums of squared differences along a
+        warping path, one per pair
+    """
+    n_pairs, n_days = x.shape
+    previous = np.full((n_pairs, n_days + 1), np.inf)
+    previous[:, 0] = 0
+    for i in range(1, n_days + 1):
+        current = np.full((n_pairs, n_days + 1), np.inf)
+        for j in range(max(1, i - window), min(n_days, i + window) + 1):
+            cost = (x[:, i - 1] - y[:, j - 1]) ** 2
+            current[:, j] = cost + np.minimum(
+                np.minimum(previous[:, j - 1], previous[:, j]), current[:, j - 1]
+            )
+        previous = current
+    return np.sqrt(previous[:, n_days])
+
+
+def dtw_matrix(values, window, max_distance=None, n_workers=1, batch_size=256):
+    """DTW distances of all pairs of series with lower bound pruning.
+
+    Args:
+        values (numpy.ndarray): complete series of shape (entity, day), see
+        standardize_series
+        window (int): half width of the Sakoe-Chiba band in days
+        max_distance (float): pairs whose LB_Keogh lower bound exceeds max_distance are
+        not warped and get an infinite distance. Defaults to None which warps all
+        pairs.
+        n_workers (int): number of processes. Defaults to 1.
+        batch_size (int): number of pairs which are warped together. Defaults to 256.
+
+    Returns:
+        numpy.ndarray: symmetric distances of shape (entity, entity), NaN for series
+        without observations
+    """
+    values = np.asarray(values, dtype=float)
+    n_entities = len(values)
+    distances = np.zeros((n_entities, n_entities))
+
+    first, second = np.triu_indices(n_entities, k=1)
+    complete = ~np.isnan(values).any(axis=1)
+    warped = complete[first] & complete[second]
+    if max_distance is not None:
+        bounds = lb_keogh_matrix(np.where(complete[:, None], values, 0), window)
+        warped &= bounds[first, second] <= max_distance
+        distances[first, second] = np.inf
+
+    pairs = np.flatnonzero(warped)
+    batches = [pairs[i : i + batch_size] for i in range(0, len(pairs), batch_size)]
+    arguments = [
+        (values[first[batch]], values[second[batch]], window) for batch in batches
+    ]
+    if n_workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(batches))) as pool:
+            results = list(pool.map(dtw_distances, *zip(*arguments)))
+    else:
+        results = [dtw_distances(*argument) for argument in arguments]
+
+    for batch, result in zip(batches, results):
+        distances[first[batch], second[batch]] = result
+
+    distances = np.triu(distances, k=1)
+    distances = distances + distances.T
+    distances[~complete, :] = np.nan
+    distances[:, ~complete] = np.nan
+    return distances
@@ -0,0 +1,170 @@
+"""Keep compressed, versioned snapshots of the raw data sources.
+
+Every download of a source is compressed into a snapshot named
+``{stem}-{time}-{hash}{suffix}``, where time is the UTC time of the download and hash
+the start of the SHA-256 digest of the uncompressed content, e.g.
+"owid_data-20210301T120000Z-3f2a9c1b0d4e.csv.zst". A download whose content equals an
+existing snapshot reuses that snapshot. The current version is published under a fixed
+path as a hard link to the snapshot, so it takes no additional disk space.
+
+The codec is chosen by the suffix, zstd for ".zst" and gzip for ".gz". Both are read by
+:func:`pandas.read_csv`, which infers the compression from the suffix and decompresses
+while it parses. zstd decompresses much faster than gzip, so ingest is about as fast as
+from the uncompressed file.
+
+A retention policy keeps the most recent snapshots of every source up to a number of
+snapshots and a total size.
+
+"""
+import gzip
+import hashlib
+import os
+import shutil
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+
+CHUNK_SIZE = 2**20
+COMPRESSION_LEVEL = 9
+HASH_LENGTH = 12
+
+
+def compressed_writer(file, suffix, level=COMPRESSION_LEVEL):
+    """Writer which compresses into an open binary file.
+
+    Args:
+        file (file object): binary file opened for writing
+        suffix (str): ".zst" for zstd or ".gz" for gzip
+        level (int): compression level. Defaults to COMPRESSION_LEVEL.
+
+    Returns:
+        file object: binary writer, closing it finishes the compressed stream
+    """
+    if suffix == ".zst":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level).stream_writer(file, closefd=False)
+    if suffix == ".gz":
+        return gzip.GzipFile(fileobj=file, mode="wb", compresslevel=min(level, 9))
+    raise ValueError(f"Unknown compression suffix {suffix}.")
+
+
+def write_snapshot(
+    path,
+    directory,
+    suffix=".zst",
+    level=COMPRESSION_LEVEL,
+    chunk_size=CHUNK_SIZE,
+    time=None,
+):
+    """Compress a raw file into a versioned snapshot.
+
+    The file is compressed and hashed in one pass over chunks of chunk_size bytes.
+
+    Args:
+        path (pathlib.Path): path of the raw file, e.g. "google_data.csv"
+        directory (pathlib.Path): directory of the snapshots
+        suffix (str): ".zst" for zstd or ".gz" for gzip. Defaults to ".zst".
+        level (int): compression level. Defaults to COMPRESSION_LEVEL.
+        chunk_size (int): number of bytes which are read at once. Defaults to
+            CHUNK_SIZE.
+        time (datetime.datetime): time of the version. Defaults to None for now.
+
+    Returns:
+        pathlib.Path: path of the new snapshot or of the existing snapshot with the
+        same content
+    """
+    path, directory = Path(path), Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = path.name.split(".")[0]
+    temporary = directory / f"{path.name}{suffix}.part"
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as source, open(temporary, "wb") as target:
+        with compressed_writer(target, suffix, level) as writer:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                digest.update(chunk)
+                writer.write(chunk)
+    content_hash = digest.hexdigest()[:HASH_LENGTH]
+
+    existing = list(directory.glob(f"{stem}-*-{content_hash}{path.suffix}{suffix}"))
+    if existing:
+        temporary.unlink()
+        # Reusing a snapshot makes it the most recent one for the retention policy
+        os.utime(existing[0])
+        return existing[0]
+
+    time = datetime.now(timezone.utc) if time is None else time
+    snapshot = directory / (
+        f"{stem}-{time:%Y%m%dT%H%M%SZ}-{content_hash}{path.suffix}{suffix}"
+    )
+    os.replace(temporary, snapshot)
+    return snapshot
+
+
+def list_snapshots(directory, stem):
+    """Snapshots of a source from the oldest to the most recent.
+
+    Args:
+        directory (pathlib.Path): directory of the snapshots
+        stem (str): name of the source, e.g. "google_data"
+
+    Returns:
+        list: paths of the snapshots
+    """
+    snapshots = [
+        path
+        for path in Path(directory).glob(f"{stem}-*")
+        if not path.name.endswith(".part")
+    ]
+    return sorted(snapshots, key=lambda path: (path.stat().st_mtime, path.name))
+
+
+def publish_snapshot(snapshot, path):
+    """Make a snapshot the current version of a source.
+
+    The current version is a hard link to the snapshot or a copy where hard links are
+    not supported. It replaces the previous version atomically.
+
+    Args:
+        snapshot (pathlib.Path): path of the snapshot
+        path (pathlib.Path): fixed path of the current version, e.g.
+            "google_data.csv.zst"
+    """
+    path = Path(path)
+    temporary = path.with_name(path.name + ".part")
+    temporary.unlink(missing_ok=True)
+    try:
+        os.link(snapshot, temporary)
+    except OSError:
+        shutil.copyfile(snapshot, temporary)
+    os.replace(temporary, path)
+
+
+def apply_retention(directory, stem, keep, max_bytes=None):
+    """Delete the oldest snapshots of a source beyond a number and a total size.
+
+    The most recent snapshot is always kept.
+
+    Args:
+        directory (pathlib.Path): directory of the snapshots
+        stem (str): name of the source, e.g. "google_data"
+        keep (int): maximum number of snapshots
+        max_bytes (int): maximum total size of the snapshots. Defaults to None for no
+            limit.
+
+    Returns:
+        list: paths of the deleted snapshots
+    """
+    snapshots = list_snapshots(directory, stem)
+    sizes = [snapshot.stat().st_size for snapshot in snapshots]
+
+    deleted = []
+    while len(snapshots) > 1 and (
+        len(snapshots) > keep or (max_bytes is not None and sum(sizes) > max_bytes)
+    ):
+        snapshot = snapshots.pop(0)
+        sizes.pop(0)
+        snapshot.unlink()
+        deleted.append(snapshot)
+    return deleted
@@ -0,0 +1,138 @@
+"""Read regression specifications from a declarative text file.
+
+The file is an ini file with a section "dependent_variables" whose option "variables"
+lists the dependent variables, one per line, and one section "specification:<name>"
+with the option "formula" per specification, see
+*src/model_specs/regression_specifications.ini*. Every pair of a dependent variable
+and a specification is one model. The optional section "event_study" sets the
+lockdowns and the window of the event study, the optional section "distributed_lags"
+the lagged variables and the largest lag of the distributed-lag models. The key of a
+model is a hash of its normalized formula, so that files named by the key only change
+if the model itself changes. Two specifications with the same normalized formula would
+be the same model and raise an error.
+
+"""
+import configparser
+import hashlib
+
+SPECIFICATION_PREFIX = "specification:"
+
+
+def read_specifications(path):
+    """Read dependent variables and specifications from a specification file.
+
+    Args:
+        path (pathlib.Path): path to the ini file
+
+    Returns:
+        dict: "dependent_variables" (list), "specifications" (dict with the names of
+        the specifications as keys and formulas as values, in the order of the file)
+        "event_study" (dict with "events" (list), "leads" and "lags" (int)) and
+        "distributed_lags" (dict with "variables" (list) and "max_lag" (int)), None
+        if the file has no such section
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    with open(path) as specification_file:
+        parser.read_file(specification_file)
+
+    event_study = None
+    if parser.has_section("event_study"):
+        event_study = {
+            "events": parser["event_study"]["events"].split(),
+            "leads": parser["event_study"].getint("leads"),
+            "lags": parser["event_study"].getint("lags"),
+        }
+
+    distributed_lags = None
+    if parser.has_section("distributed_lags"):
+        distributed_lags = {
+            "variables": parser["distributed_lags"]["variables"].split(),
+            "max_lag": parser["distributed_lags"].getint("max_lag"),
+        }
+
+    specifications = {
+        section[len(SPECIFICATION_PREFIX) :]: " ".join(
+            parser[section]["formula"].split()
+        )
+        for section in parser.sections()
+        if section.startswith(SPECIFICATION_PREFIX)
+    }
+    names_of_formulas = {}
+    for name, formula in specifications.items():
+        duplicate = names_of_formulas.setdefault(normalize_formula(formula), name)
+        if duplicate != name:
+            raise ValueError(
+                f"The specifications {duplicate} and {name} have the same formula."
+            )
+
+    return {
+        "dependent_variables": parser["dependent_variables"]["variables"].split(),
+        "specifications": specifications,
+        "event_study": event_study,
+        "distributed_lags": distributed_lags,
+    }
+
+
+def normalize_formula(formula):
+    """Normalize the right hand side of a formula.
+
+    The formula is expanded into its terms by patsy, e.g. "b * c" into "b", "c" and
+    "b:c". The factors of every term and the terms are sorted, so formulas which differ
+    only in formatting, in the order of their terms or in the way interactions are
+    written are equal. The intercept is the term "1".
+
+    Args:
+        formula (str): right hand side of a patsy formula, e.g. "a + b * c"
+
+    Returns:
+        str: normalized formula, e.g. "1+a+b+b:c+c"
+    """
+    from patsy import ModelDesc
+
+    terms = {
+        ":".join(sorted(factor.name() for factor in term.factors)) or "1"
+        for term in ModelDesc.from_formula(formula).rhs_termlist
+    }
+    return "+".join(sorted(terms))
+
+
+def sample_formula(formulas):
+    """Right hand side whose complete cases are the common sample of several formulas.
+
+    The formula is the sum of the factors of all formulas, e.g. "a + b" for "a" and
+    "a * b", so a row is complete for it if it is complete for every formula.
+
+    Args:
+        formulas (list): right hand sides of patsy formulas
+
+    Returns:
+        str: normalized formula, see :func:`normalize_formula`
+    """
+    from patsy import ModelDesc
+
+    factors = {
+        factor.name()
+        for formula in formulas
+        for term in ModelDesc.from_formula(formula).rhs_termlist
+        for factor in term.factors
+    }
+    return normalize_formula(" + ".join(sorted(factors)) or "1")
+
+
+def model_key(dependent_variable, formula, sample=None):
+    """Key of a model which only changes if the model changes.
+
+    Args:
+        dependent_variable (str): dependent variable
+        formula (str): right hand side of the formula
+        sample (str): right hand side of a formula whose complete cases are the
+            sample of the model, see :func:`sample_formula`. Defaults to None which
+            is the complete cases of the model itself.
+
+    Returns:
+        str: 12 hexadecimal digits
+    """
+    normalized = dependent_variable + "~" + normalize_formula(formula)
+    if sample is not None:
+        normalized += "|" + normalize_formula(sample)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:12]
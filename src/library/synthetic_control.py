@@ -0,0 +1,219 @@
+"""Synthetic control estimates with in-space placebos.
+
+The synthetic control of a treated entity is the convex combination of donor entities,
+i.e. non-negative weights which sum to one, whose path is closest to the treated entity
+before the treatment. Its path after the treatment is the counterfactual and the gap
+between both the effect. Every donor is in turn treated as if it was treated (in-space
+placebo). The rank of the treated entity among the ratios of post- to pre-treatment
+root mean squared gaps gives a permutation p-value.
+
+The weights solve a least squares problem on the simplex, which is solved with
+accelerated projected gradient steps. The steps only need the Gram matrix of the donors
+and the projection onto the simplex. The weights of one metric are the starting point
+for the next metric of the same entity, since the donors which resemble an entity are
+mostly the same for all metrics. The placebos are independent and run on a pool of
+processes.
+
+With fewer days before the treatment than donors the weights can fit almost any path,
+so the pre-treatment gaps are close to zero and the ratios are meaningless. The study
+requires at least MIN_PRE_DAYS_PER_DONOR days before the treatment per donor.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MIN_PRE_DAYS_PER_DONOR = 2
+
+
+def project_to_simplex(vector):
+    """Euclidean projection onto the simplex of non-negative weights summing to one.
+
+    Args:
+        vector (numpy.ndarray): vector of length n
+
+    Returns:
+        numpy.ndarray: closest vector with non-negative entries which sum to one
+    """
+    descending = np.sort(vector)[::-1]
+    cumulative = np.cumsum(descending) - 1
+    positive = descending - cumulative / np.arange(1, len(vector) + 1) > 0
+    rho = np.flatnonzero(positive)[-1]
+    return np.maximum(vector - cumulative[rho] / (rho + 1), 0)
+
+
+def simplex_least_squares(design, target, initial=None, max_iter=10_000, tol=1e-8):
+    """Weights on the simplex which minimize the squared distance to a target.
+
+    The iterations stop once the Frank-Wolfe duality gap, an upper bound of the
+    distance of the objective to its minimum, is below tol times the squared norm of
+    the target.
+
+    Args:
+        design (numpy.ndarray): donors as columns, shape (day, donor)
+        target (numpy.ndarray): series of length day
+        initial (numpy.ndarray): starting weights. Defaults to None for equal weights.
+        max_iter (int): maximal number of iterations. Defaults to 10_000.
+        tol (float): relative tolerance of the duality gap. Defaults to 1e-8.
+
+    Returns:
+        tuple: weights and the number of iterations
+    """
+    n_donors = design.shape[1]
+    gram = design.T @ design
+    linear = design.T @ target
+    lipschitz = np.linalg.eigvalsh(gram)[-1]
+    threshold = tol * max(target @ target, 1.0)
+
+    weights = project_to_simplex(
+        np.full(n_donors, 1 / n_donors) if initial is None else np.asarray(initial)
+    )
+    if lipschitz <= 0:
+        return weights, 0
+
+    # FISTA: gradient steps from an extrapolation of the last two iterates
+    extrapolation, momentum = weights, 1.0
+    for iteration in range(max_iter):
+        gradient = gram @ weights - linear
+        if gradient @ weights - gradient.min() <= threshold:
+            return weights, iteration
+
+        step = gram @ extrapolation - linear
+        new_weights = project_to_simplex(extrapolation - step / lipschitz)
+        new_momentum = (1 + np.sqrt(1 + 4 * momentum**2)) / 2
+        extrapolation = new_weights + (momentum - 1) / new_momentum * (
+            new_weights - weights
+        )
+        # Restart the momentum once it points uphill
+        if step @ (new_weights - weights) > 0:
+            extrapolation, new_momentum = new_weights, 1.0
+        weights, momentum = new_weights, new_momentum
+    return weights, max_iter
+
+
+def synthetic_control(values, treated, donors, pre_days):
+    """Synthetic control of one entity for all metrics of a panel.
+
+    Donors with missing days before the treatment are left out for a metric.
+
+    Args:
+        values (numpy.ndarray): panel of shape (entity, day, metric)
+        treated (int): position of the treated entity
+        donors (list): positions of the donor entities
+        pre_days (int): number of days before the treatment
+
+    Returns:
+        dict: "weights" of shape (metric, entity), zero for entities which are not
+        donors, "synthetic" path and "gap" of shape (metric, day) and "iterations" per
+        metric
+    """
+    n_entities, n_days, n_metrics = values.shape
+    donors = np.asarray(donors)
+    weights = np.zeros((n_metrics, n_entities))
+    synthetic = np.full((n_metrics, n_days), np.nan)
+    iterations = np.zeros(n_metrics, dtype=int)
+
+    initial = np.full(n_entities, 1 / len(donors))
+    for metric in range(n_metrics):
+        target = values[treated, :, metric]
+        pool = donors[~np.isnan(values[donors, :pre_days, metric]).any(axis=1)]
+        if np.isnan(target[:pre_days]).any() or len(pool) == 0:
+            continue
+
+        design = values[pool, :, metric].T
+        # Warm start from the weights of the previous metric
+        weights[metric, pool], iterations[metric] = simplex_least_squares(
+            design[:pre_days], target[:pre_days], initial=initial[pool]
+        )
+        initial = weights[metric]
+
+        used = weights[metric, pool] > 0
+        synthetic[metric] = np.where(
+            np.isnan(design[:, used]).any(axis=1),
+            np.nan,
+            np.nan_to_num(design) @ weights[metric, pool],
+        )
+
+    return {
+        "weights": weights,
+        "synthetic": synthetic,
+        "gap": values[treated].T - synthetic,
+        "iterations": iterations,
+    }
+
+
+def placebo_study(values, treated, pre_days, post_days=None, n_workers=1):
+    """Synthetic controls of a treated entity and of all donors as placebos.
+
+    The donor pool of the treated entity are all other entities. A placebo is fit on
+    all entities except itself and the treated entity. The series must not contain
+    days after the treatment in the days before it, e.g. through forward moving
+    averages.
+
+    Args:
+        values (numpy.ndarray): panel of shape (entity, day, metric)
+        treated (int): position of the treated entity
+        pre_days (int): number of days before the treatment
+        post_days (int): number of days after the treatment which enter the
+            post-treatment fit. Defaults to None for all days.
+        n_workers (int): number of processes. Defaults to 1.
+
+    Returns:
+        dict: arrays of all entities, the treated one included: "weights" of shape
+        (entity, metric, entity), "synthetic", "gap" of shape (entity, metric, day),
+        "iterations" of shape (entity, metric), "pre_rmspe", "post_rmspe" and "ratio"
+        of shape (entity, metric) and "p_value" of the treated entity per metric
+    """
+    values = np.asarray(values, dtype=float)
+    n_entities = len(values)
+    others = [i for i in range(n_entities) if i != treated]
+    if pre_days < MIN_PRE_DAYS_PER_DONOR * len(others):
+        raise ValueError(
+            f"{pre_days} days before the treatment are too few for {len(others)} "
+            f"donors, at least {MIN_PRE_DAYS_PER_DONOR * len(others)} are required."
+        )
+    arguments = [(values, treated, others, pre_days)] + [
+        (values, placebo, [i for i in others if i != placebo], pre_days)
+        for placebo in others
+    ]
+
+    if n_workers > 1:
+        chunksize = -(-len(arguments) // n_workers)
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(
+                pool.map(synthetic_control, *zip(*arguments), chunksize=chunksize)
+            )
+    else:
+        results = [synthetic_control(*argument) for argument in arguments]
+
+    # Results in the order of the entities
+    order = np.argsort([treated, *others])
+    study = {
+        name: np.stack([results[i][name] for i in order])
+        for name in ["weights", "synthetic", "gap", "iterations"]
+    }
+
+    end = None if post_days is None else pre_days + post_days
+    study["pre_rmspe"] = _rmspe(study["gap"][:, :, :pre_days])
+    study["post_rmspe"] = _rmspe(study["gap"][:, :, pre_days:end])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        study["ratio"] = study["post_rmspe"] / study["pre_rmspe"]
+
+    # Share of entities whose ratio is at least as large as the one of the treated
+    ratio = study["ratio"]
+    observed = ~np.isnan(ratio)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_value = np.sum((ratio >= ratio[treated]) & observed, axis=0) / np.sum(
+            observed, axis=0
+        )
+    study["p_value"] = np.where(observed[treated], p_value, np.nan)
+    return study
+
+
+def _rmspe(gap):
+    """Root mean squared gap over the observed days of the last axis."""
+    observed = ~np.isnan(gap)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sqrt(
+            np.where(observed, gap, 0) ** 2 @ np.ones(gap.shape[-1]) / observed.sum(-1)
+        )
@@ -0,0 +1,71 @@
+"""
+This task proposes lockdown periods for every european country from changepoints in
+its stringency index and mobility.
+
+The detected periods are stored per country in the format of time_lockdowns.pkl,
+i.e. {country: {lockdown: [first day, last day]}}, so the periods of a country can be
+passed to prepare_regression_data instead of the hand-typed German periods.
+
+"""
+import pandas as pd
+import pytask
+
+from src.config import BLD
+from src.config import N_WORKERS
+from src.config import SRC
+from src.library.changepoints import detect_lockdowns
+from src.library.parallel import granted_workers
+from src.library.partitions import read_partitions
+from src.library.sharding import map_shards
+from src.library.sharding import split_by_level
+
+# Series in which changepoints are searched, standardized per country
+changepoint_variables = [
+    "stringency_index",
+    "workplaces_avg_7d",
+    "retail_and_recreation_avg_7d",
+    "transit_stations_avg_7d",
+    "residential_avg_7d",
+]
+
+# Cost of an additional changepoint per series and minimal length of a period in days
+PENALTY_PER_VARIABLE = 15
+MIN_DAYS = 14
+
+
+@pytask.mark.resources(cpus=N_WORKERS)
+@pytask.mark.depends_on(
+    {
+        "eu_country_level": BLD / "data" / "eu_country_level" / "partitions.json",
+        "stringency": SRC / "original_data" / "stringency_index_data.csv",
+    }
+)
+@pytask.mark.produces(BLD / "data" / "detected_lockdowns.pkl")
+def task_detect_lockdowns(depends_on, produces):
+    mobility = read_partitions(depends_on["eu_country_level"])
+    mobility["date"] = pd.to_datetime(mobility["date"])
+    mobility = mobility.set_index(["country", "date"])
+
+    stringency = pd.read_csv(
+        depends_on["stringency"], usecols=["country", "date", "stringency_index"]
+    )
+    stringency["date"] = pd.to_datetime(stringency["date"])
+    stringency = stringency.set_index(["country", "date"])
+
+    data = mobility.join(stringency, how="inner")[changepoint_variables]
+
+    # Every country is searched on its own shard of the process pool
+    lockdowns = map_shards(
+        detect_lockdowns,
+        split_by_level(data, "country"),
+        n_workers=granted_workers(N_WORKERS),
+        variables=changepoint_variables,
+        penalty=PENALTY_PER_VARIABLE * len(changepoint_variables),
+        min_size=MIN_DAYS,
+    )
+
+    detected_lockdowns = {
+        country: {row.lockdown: [row.start, row.end] for row in periods.itertuples()}
+        for country, periods in lockdowns.groupby(level="country")
+    }
+    pd.to_pickle(detected_lockdowns, produces)
@@ -1,5 +1,7 @@
 """
-This file defines the relevant model specifications for the regression analysis.
+This file defines the lockdown periods and the names of the covariates for the
+regression analysis. The regression models themselves are declared in
+*src/model_specs/regression_specifications.ini*.
 """
 import pickle
 
@@ -13,7 +15,6 @@ from src.config import SRC
 @pytask.mark.produces(
     {
         "time_lockdowns": SRC / "model_specs" / "time_lockdowns.pkl",
-        "regression_models": SRC / "model_specs" / "regression_models.pkl",
         "regression_variable_names": SRC
         / "model_specs"
         / "regression_variable_names.pkl",
@@ -28,69 +29,6 @@ def task_define_regression_specifications(depends_on, produces):
         "light_lockdown": ["2020-10-15", "2020-12-15"],
     }
 
-    # Define dependent variables
-    depvars = [
-        "workplaces_avg_7d",
-        "retail_and_recreation_avg_7d",
-        "grocery_and_pharmacy_avg_7d",
-        "transit_stations_avg_7d",
-        "residential_avg_7d",
-    ]
-
-    # Set up model specifications
-    model_baseline = """
-    first_lockdown_7days_moving_average +
-    second_lockdown_7days_moving_average
-    + first_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    """
-
-    model_lockdown_interaction = """
-    first_lockdown_7days_moving_average * stringency_index_avg_7d
-    + first_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    """
-    model_light_lockdown = """
-    first_lockdown_7days_moving_average * stringency_index_avg_7d
-    + first_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + light_lockdown_7days_moving_average + light_lockdown_7days_moving_average
-    """
-
-    model_cases = """
-    first_lockdown_7days_moving_average * stringency_index_avg_7d
-    + first_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + light_lockdown_7days_moving_average + light_lockdown_7days_moving_average_duration
-    + new_cases_avg_7d
-    """
-
-    model_cases_cubic = """
-    first_lockdown_7days_moving_average * stringency_index_avg_7d
-    + first_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average * stringency_index_avg_7d
-    + second_lockdown_7days_moving_average_duration * stringency_index_avg_7d
-    + light_lockdown_7days_moving_average + light_lockdown_7days_moving_average_duration
-    + new_cases_avg_7d
-    + np.power(new_cases_avg_7d,2)
-    + np.power(new_cases_avg_7d,3)
-    """
-
-    # Create regression model dictionary
-    dict_regression_models = {}
-
-    for depvar in depvars:
-        dict_regression_models[depvar] = [
-            model_baseline,
-            model_lockdown_interaction,
-            model_light_lockdown,
-            model_cases,
-            model_cases_cubic,
-        ]
-
     # Create dictionary with formatted names
     naming_dict = {
         "first_lockdown_7days_moving_average_duration:stringency_index_avg_7d": "1st Lockdown Duration x Stringency",
@@ -107,14 +45,14 @@ def task_define_regression_specifications(depends_on, produces):
         "new_cases_avg_7d": "New cases",
         "np.power(new_cases_avg_7d, 2)": "New Cases Squared",
         "np.power(new_cases_avg_7d, 3)": "New Cases Cubic",
+        "incidence_per_100k": "7-Day Incidence per 100k",
+        "growth_rate": "Growth Rate of Cases",
+        "reproduction_number": "Reproduction Number",
     }
 
     # Export everything to pickle format
     file_time_lockdowns = open(produces["time_lockdowns"], "wb")
     pickle.dump(dict_time_lockdowns, file_time_lockdowns)
 
-    file_regression_models = open(produces["regression_models"], "wb")
-    pickle.dump(dict_regression_models, file_regression_models)
-
     file_variable_names = open(produces["regression_variable_names"], "wb")
     pickle.dump(naming_dict, file_variable_names)
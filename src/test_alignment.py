@@ -0,0 +1,79 @@
+"""Test whether sources with different date representations are aligned on one grid.
+
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.library.alignment import align_sources
+from src.library.alignment import day_dates
+from src.library.alignment import day_number
+
+
+def test_day_number_round_trip():
+    dates = pd.to_datetime(["2020-02-29", "2021-01-01"])
+    np.testing.assert_array_equal(day_number(dates), [18321, 18628])
+    pd.testing.assert_index_equal(day_dates(day_number(dates)), dates)
+
+
+def test_align_sources():
+    mobility, infections, stringency = generate_sources()
+    panel = align_sources([mobility, infections, stringency], entity="country")
+
+    assert panel["entities"] == ["Austria", "Germany"]
+    assert panel["metrics"] == ["workplaces", "new_cases", "stringency_index"]
+    pd.testing.assert_index_equal(
+        panel["dates"], pd.date_range("2020-03-01", "2020-03-04"), check_names=False
+    )
+    np.testing.assert_array_equal(
+        panel["values"][1],
+        [[1, 10, np.nan], [2, 20, 50], [3, np.nan, 60], [np.nan] * 3],
+    )
+    np.testing.assert_array_equal(panel["values"][0, 3], [4, np.nan, np.nan])
+
+
+def test_align_sources_intersection():
+    mobility, _, stringency = generate_sources()
+    panel = align_sources([mobility, stringency], "country", span="intersection")
+    pd.testing.assert_index_equal(
+        panel["dates"], pd.date_range("2020-03-02", "2020-03-03"), check_names=False
+    )
+    np.testing.assert_array_equal(panel["values"][1, :, 1], [50, 60])
+
+
+def test_align_sources_duplicate_rows():
+    mobility = generate_sources()[0]
+    with pytest.raises(ValueError):
+        align_sources([pd.concat([mobility, mobility])], entity="country")
+
+
+def generate_sources():
+    """Mobility with datetime64, infections with strings and stringency with
+    datetime.date objects as dates."""
+    mobility = pd.DataFrame(
+        {
+            "country": ["Germany", "Germany", "Germany", "Austria"],
+            "date": pd.to_datetime(
+                ["2020-03-01", "2020-03-02", "2020-03-03", "2020-03-04"]
+            ),
+            "workplaces": [1.0, 2.0, 3.0, 4.0],
+            "place_id": ["a", "a", "a", "b"],
+        }
+    )
+    infections = pd.DataFrame(
+        {
+            "country": ["Germany", "Germany"],
+            "date": ["2020-03-02", "2020-03-01"],
+            "new_cases": [20, 10],
+        }
+    ).set_index(["country", "date"])
+    stringency = pd.DataFrame(
+        {
+            "country": ["Germany", "Germany"],
+            "date": [datetime.date(2020, 3, 2), datetime.date(2020, 3, 3)],
+            "stringency_index": [50.0, 60.0],
+        }
+    )
+    return mobility, infections, stringency
@@ -0,0 +1,87 @@
+"""Test whether holiday rules are expanded correctly and flags are found by region and day.
+
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.config import SRC
+from src.library.calendar_dimension import build_calendar
+from src.library.calendar_dimension import calendar_flags
+from src.library.calendar_dimension import day_number
+from src.library.calendar_dimension import easter_sunday
+from src.library.calendar_dimension import load_calendar
+from src.library.calendar_dimension import save_calendar
+
+
+def test_easter_sunday():
+    assert easter_sunday(2020) == datetime.date(2020, 4, 12)
+    assert easter_sunday(2021) == datetime.date(2021, 4, 4)
+    assert easter_sunday(2022) == datetime.date(2022, 4, 17)
+
+
+def test_day_number():
+    np.testing.assert_array_equal(day_number(["1970-01-01", "2020-03-01"]), [0, 18322])
+
+
+def test_calendar_flags(tmp_path):
+    holidays = pd.DataFrame(
+        [
+            ("DE", "public_holiday", "easter-2"),
+            ("DE-BY", "public_holiday", "01-06"),
+            ("DE-BY", "summer_vacation", "2020-07-27/2020-09-07"),
+            ("DE-BE", "public_holiday", "2020-05-08"),
+        ],
+        columns=["region", "kind", "rule"],
+    )
+    save_calendar(
+        build_calendar(holidays, "2020-01-01", "2021-12-31"), tmp_path / "calendar.npz"
+    )
+    calendar = load_calendar(tmp_path / "calendar.npz")
+
+    regions = ["DE", "DE-BY", "DE-BE", "DE-BY", "DE-BY", "DE-BE", "AT", "DE", "DE-BY"]
+    dates = [
+        "2020-04-10",
+        "2021-04-02",
+        "2020-05-08",
+        "2021-01-06",
+        "2020-09-07",
+        "2021-05-08",
+        "2020-04-10",
+        "2023-04-07",
+        "2020-09-08",
+    ]
+    flags = calendar_flags(calendar, regions, pd.to_datetime(dates))
+
+    np.testing.assert_array_equal(
+        flags["public_holiday"], [1, 1, 1, 1, 0, 0, np.nan, np.nan, 0]
+    )
+    # Summer vacations are only declared for Bavaria in 2020
+    np.testing.assert_array_equal(
+        flags["summer_vacation"],
+        [np.nan, np.nan, np.nan, np.nan, 1, np.nan, np.nan, np.nan, 0],
+    )
+
+
+def test_holiday_file():
+    holidays = pd.read_csv(SRC / "model_specs" / "holidays.csv", dtype=str)
+    calendar = build_calendar(holidays, "2020-01-01", "2021-12-31")
+
+    flags = calendar_flags(
+        calendar,
+        ["DE-NW", "DE-SN", "DE-SN"],
+        ["2020-06-11", "2020-06-11", "2020-11-18"],
+    )
+    # Corpus Christi is a holiday in North Rhine-Westphalia only
+    np.testing.assert_array_equal(flags["public_holiday"], [1, 0, 1])
+
+    calendar = build_calendar(holidays, "2020-01-01", "2022-12-31")
+    flags = calendar_flags(
+        calendar,
+        ["DE-BY", "DE-BY", "DE-BY", "FR"],
+        ["2021-08-02", "2021-12-26", "2022-08-01", "2021-08-02"],
+    )
+    # Summer vacations are declared for German states in 2020 and 2021 only
+    np.testing.assert_array_equal(flags["summer_vacation"], [1, 0, np.nan, np.nan])
+    np.testing.assert_array_equal(flags["public_holiday"], [0, 1, 0, 0])
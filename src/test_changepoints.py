@@ -0,0 +1,56 @@
+"""Test whether PELT finds changes in the mean and segments are named as lockdowns.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.changepoints import classify_lockdowns
+from src.library.changepoints import pelt
+
+
+def test_pelt_finds_steps():
+    rng = np.random.default_rng(0)
+    signal = np.concatenate([np.zeros(30), np.full(60, 3.0), np.zeros(50)])
+    signal = signal + rng.normal(0, 0.3, len(signal))
+
+    assert pelt(signal, penalty=10, min_size=14) == [30, 90]
+    assert pelt(np.column_stack([signal, signal]), penalty=10, min_size=14) == [30, 90]
+
+
+def test_pelt_respects_min_size():
+    signal = np.concatenate([np.zeros(20), np.full(5, 10.0), np.zeros(20)])
+
+    assert pelt(signal, penalty=1, min_size=7) == [18, 25]
+
+
+def test_classify_lockdowns():
+    dates = pd.date_range("2020-03-01", periods=60)
+    stringency = np.repeat([20.0, 80.0, 75.0, 55.0, 85.0, 10.0], 10)
+
+    lockdowns = classify_lockdowns(dates, stringency, [10, 20, 30, 40, 50])
+    assert lockdowns == {
+        "first_lockdown": ["2020-03-11", "2020-03-30"],
+        "light_lockdown": ["2020-03-31", "2020-04-09"],
+        "second_lockdown": ["2020-04-10", "2020-04-19"],
+    }
+
+
+def test_classify_many_lockdowns():
+    dates = pd.date_range("2020-03-01", periods=200)
+    stringency = np.tile([80.0, 10.0], 10).repeat(10)
+
+    lockdowns = classify_lockdowns(dates, stringency, list(range(10, 200, 10)))
+
+    assert list(lockdowns) == [
+        "first_lockdown",
+        "second_lockdown",
+        "third_lockdown",
+        "fourth_lockdown",
+        "fifth_lockdown",
+        "sixth_lockdown",
+        "seventh_lockdown",
+        "lockdown_8",
+        "lockdown_9",
+        "lockdown_10",
+    ]
+    assert lockdowns["lockdown_10"] == ["2020-08-28", "2020-09-06"]
@@ -0,0 +1,47 @@
+"""Test whether the FFT cross-correlations equal correlations of shifted series.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.cross_correlation import cross_correlation
+from src.library.cross_correlation import peak_lags
+
+
+def test_cross_correlation_equals_shifted_correlation():
+    responses, drivers = generate_input()
+    correlation = cross_correlation(responses, drivers, max_lag=10, min_obs=2)
+
+    assert correlation.shape == (2, 2, 2, 21)
+    for entity, response, driver in np.ndindex(correlation.shape[:3]):
+        for lag in range(-10, 11):
+            expected = pd.Series(responses[entity, :, response]).corr(
+                pd.Series(drivers[entity, :, driver]).shift(lag)
+            )
+            np.testing.assert_allclose(
+                correlation[entity, response, driver, lag + 10], expected, atol=1e-10
+            )
+
+
+def test_peak_lags():
+    responses, drivers = generate_input()
+    correlation = cross_correlation(responses, drivers, max_lag=10)
+    lag, peak = peak_lags(correlation, max_lag=10, min_lag=0)
+
+    # Response 0 follows driver 0 after 3 days, response 1 follows driver 1 inversely
+    np.testing.assert_array_equal(lag[:, 0, 0], [3, 3])
+    np.testing.assert_array_equal(lag[:, 1, 1], [7, 7])
+    assert (peak[:, 0, 0] > 0.9).all() and (peak[:, 1, 1] < -0.9).all()
+
+
+def generate_input():
+    rng = np.random.default_rng(0)
+    drivers = rng.normal(size=(2, 100, 2)).cumsum(axis=1)
+    responses = np.stack(
+        [np.roll(drivers[:, :, 0], 3, axis=1), -np.roll(drivers[:, :, 1], 7, axis=1)],
+        axis=2,
+    )
+    responses += rng.normal(scale=0.1, size=responses.shape)
+    responses[0, 20:30, 0] = np.nan
+    drivers[1, 60:65, 1] = np.nan
+    return responses, drivers
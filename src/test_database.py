@@ -0,0 +1,81 @@
+"""Test whether exports upsert new days only and queries use the (entity, date) index.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.database import connect
+from src.library.database import export_new_days
+from src.library.database import replace_table
+
+
+def test_export_new_days(tmp_path):
+    data = generate_input()
+    connection = connect(tmp_path / "test.sqlite")
+
+    assert export_new_days(connection, "mobility", data.iloc[:4], entity="country") == 4
+    # Days which were exported already are skipped, a new day of Austria is appended
+    assert (
+        export_new_days(connection, "mobility", data, entity="country", revision_days=0)
+        == 1
+    )
+
+    result = pd.read_sql(
+        "SELECT * FROM mobility ORDER BY country, date", connection, parse_dates="date"
+    )
+    expected = data.sort_values(["country", "date"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM mobility "
+        "WHERE country = 'Germany' AND date >= '2020-03-02'"
+    ).fetchall()
+    assert "USING INDEX" in plan[0][-1]
+
+
+def test_export_new_days_updates_revised_days(tmp_path):
+    data = generate_input()
+    connection = connect(tmp_path / "test.sqlite")
+    export_new_days(connection, "mobility", data.iloc[:4], entity="country")
+
+    # The missing value of Austria on the first day is filled by the next export
+    data.loc[1, "workplaces"] = 2.0
+    assert export_new_days(connection, "mobility", data, entity="country") == 5
+    result = connection.execute(
+        "SELECT workplaces FROM mobility WHERE country = 'Austria' ORDER BY date"
+    ).fetchall()
+    assert result == [(2.0,), (4.0,), (5.0,)]
+
+    # Only the last exported day of every country is in a window of one day
+    data.loc[1, "workplaces"] = 7.0
+    assert (
+        export_new_days(connection, "mobility", data, entity="country", revision_days=1)
+        == 2
+    )
+    assert connection.execute(
+        "SELECT workplaces FROM mobility WHERE country = 'Austria' AND "
+        "date = '2020-03-01'"
+    ).fetchall() == [(2.0,)]
+
+
+def test_replace_table_updates_rows(tmp_path):
+    connection = connect(tmp_path / "test.sqlite")
+    estimates = pd.DataFrame({"term": ["a", "b"], "params": [1.0, 2.0]})
+    replace_table(connection, "estimates", estimates, keys=["term"])
+    estimates = pd.DataFrame({"term": ["a"], "params": [3.0]})
+    replace_table(connection, "estimates", estimates, keys=["term"])
+
+    assert connection.execute("SELECT * FROM estimates").fetchall() == [("a", 3.0)]
+
+
+def generate_input():
+    return pd.DataFrame(
+        {
+            "country": ["Germany", "Austria", "Germany", "Austria", "Austria"],
+            "date": pd.to_datetime(
+                ["2020-03-01", "2020-03-01", "2020-03-02", "2020-03-02", "2020-03-03"]
+            ),
+            "workplaces": [1.0, np.nan, 3.0, 4.0, 5.0],
+            "weekend": [1, 1, 0, 0, 0],
+        }
+    )
@@ -0,0 +1,63 @@
+"""Test whether sources are downloaded completely and zip members are combined correctly.
+
+"""
+import zipfile
+
+import pandas as pd
+import pytest
+
+from src.library.downloads import concatenate_zip_members
+from src.library.downloads import download_all
+from src.library.downloads import regional_report_members
+
+
+def test_download_all(tmp_path):
+    sources = {}
+    for name in ["google", "owid", "stringency"]:
+        source = tmp_path / f"{name}_source.csv"
+        source.write_bytes(name.encode() * 10_000)
+        sources[tmp_path / f"{name}.csv"] = source.as_uri()
+
+    paths = download_all(sources, max_connections=2, chunk_size=1024)
+
+    assert paths == list(sources)
+    for path, url in sources.items():
+        assert path.read_bytes() == (tmp_path / url.rsplit("/", 1)[1]).read_bytes()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_download_all_failure(tmp_path):
+    with pytest.raises(OSError):
+        download_all({tmp_path / "data.csv": (tmp_path / "missing.csv").as_uri()})
+    assert not list(tmp_path.iterdir())
+
+
+def test_regional_report_members():
+    names = [
+        "2020_AT_Region_Mobility_Report.csv",
+        "2021_AT_Region_Mobility_Report.csv",
+        "2020_US_Region_Mobility_Report.csv",
+        "2020_DE_Region_Mobility_Report.csv",
+        "README.txt",
+    ]
+    assert regional_report_members(names, ["DE", "AT"]) == [
+        "2020_AT_Region_Mobility_Report.csv",
+        "2020_DE_Region_Mobility_Report.csv",
+        "2021_AT_Region_Mobility_Report.csv",
+    ]
+
+
+def test_concatenate_zip_members(tmp_path):
+    archive_path = tmp_path / "regional.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("2020_AT.csv", "country,value\nAustria,1\nAustria,2")
+        archive.writestr("2020_US.csv", "country,value\nUnited States,3\n")
+        archive.writestr("2021_AT.csv", "country,value\nAustria,4\n")
+
+    path = concatenate_zip_members(
+        archive_path, ["2020_AT.csv", "2021_AT.csv"], tmp_path / "data.csv"
+    )
+
+    data = pd.read_csv(path)
+    assert data["country"].eq("Austria").all()
+    assert data["value"].tolist() == [1, 2, 4]
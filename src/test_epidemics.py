@@ -0,0 +1,75 @@
+"""Test whether the epidemic metrics of all countries are computed correctly at once.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.epidemics import add_epidemic_metrics
+from src.library.epidemics import growth_rate
+from src.library.epidemics import infection_pressure
+from src.library.epidemics import reproduction_number
+from src.library.epidemics import serial_interval_kernel
+
+
+def test_serial_interval_kernel():
+    kernel = serial_interval_kernel()
+    assert np.isclose(kernel.sum(), 1)
+    assert np.isclose(kernel @ np.arange(1, len(kernel) + 1), 4.7, atol=0.1)
+
+
+def test_growth_rate_exponential():
+    new_cases = np.exp(np.array([[0.1], [-0.05]]) * np.arange(40))
+    growth = growth_rate(new_cases)
+
+    assert np.isnan(growth[:, :13]).all()
+    np.testing.assert_allclose(growth[0, 13:], 0.1)
+    np.testing.assert_allclose(growth[1, 13:], -0.05)
+
+
+def test_infection_pressure_loop():
+    rng = np.random.default_rng(0)
+    new_cases = rng.poisson(50, size=(3, 60)).astype(float)
+    kernel = serial_interval_kernel(max_days=10)
+
+    expected = np.zeros(new_cases.shape)
+    for t in range(new_cases.shape[1]):
+        for k in range(1, len(kernel) + 1):
+            if t - k >= 0:
+                expected[:, t] += kernel[k - 1] * new_cases[:, t - k]
+
+    np.testing.assert_allclose(infection_pressure(new_cases, kernel), expected)
+
+
+def test_reproduction_number_renewal_process():
+    kernel = serial_interval_kernel()
+    n_days = 120
+    new_cases = np.zeros((2, n_days))
+    new_cases[:, 0] = 1000
+    for t in range(1, n_days):
+        r = np.array([1.2, 0.9]) if t < 60 else np.array([0.8, 1.1])
+        new_cases[:, t] = r * infection_pressure(new_cases[:, : t + 1], kernel)[:, t]
+
+    reproduction = reproduction_number(new_cases, kernel)
+
+    np.testing.assert_allclose(reproduction[:, 40], [1.2, 0.9], rtol=0.01)
+    np.testing.assert_allclose(reproduction[:, 100], [0.8, 1.1], rtol=0.01)
+
+
+def test_add_epidemic_metrics():
+    dates = pd.date_range("2020-03-01", periods=20)
+    index = pd.MultiIndex.from_product(
+        [["Germany", "Austria"], dates], names=["country", "date"]
+    )
+    infect_numbers = pd.DataFrame(
+        {"new_cases": np.r_[np.full(20, 100.0), np.full(20, 10.0)]}, index=index
+    )
+    population = pd.Series({"Austria": 1e6, "Germany": 2e6})
+
+    result = add_epidemic_metrics(infect_numbers, population)
+
+    assert result.index.equals(infect_numbers.index)
+    np.testing.assert_allclose(
+        result.loc["Germany", "incidence_per_100k"].iloc[6:], 35.0
+    )
+    np.testing.assert_allclose(result.loc["Austria", "incidence_per_100k"].iloc[6:], 7)
+    np.testing.assert_allclose(result["growth_rate"].dropna(), 0)
@@ -0,0 +1,101 @@
+"""Test whether the sparse event study equals OLS with a dense design.
+
+"""
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from src.library.event_study import event_time_design
+from src.library.event_study import fit_event_study
+
+
+def test_event_time_design_indicators():
+    design, names = event_time_design(
+        n_entities=2, n_days=6, event_starts={"lockdown": [2, -1]}, leads=1, lags=2
+    )
+    dense = design.toarray()
+
+    assert names[2:] == [("lockdown", 0), ("lockdown", 1), ("lockdown", 2)]
+    assert design.shape == (12, 5)
+    # Entity 0 starts on day 2: day 1 is the reference, days 2 to 4 have indicators
+    np.testing.assert_array_equal(dense[:6, 2:], np.eye(6, 3, k=-2))
+    # Entity 1 has no lockdown
+    np.testing.assert_array_equal(dense[6:, 2:], 0)
+
+
+def test_fit_event_study_equals_dense_ols():
+    rng = np.random.default_rng(0)
+    n_entities, n_days = 8, 60
+    starts = {"first": rng.integers(10, 30, n_entities), "second": 45}
+    design, names = event_time_design(n_entities, n_days, starts, leads=5, lags=10)
+
+    effects = np.where(
+        [name[0] != "entity" and name[1] >= 0 for name in names], -3.0, 0.0
+    )
+    outcome = design @ effects + rng.normal(size=design.shape[0])
+    outcome[rng.choice(len(outcome), 20, replace=False)] = np.nan
+
+    result = fit_event_study(design, outcome)
+
+    observed = ~np.isnan(outcome)
+    dense = design.toarray()[observed]
+    identified = dense.any(axis=0)
+    expected = sm.OLS(outcome[observed], dense[:, identified]).fit()
+    np.testing.assert_allclose(result["params"][identified], expected.params, atol=1e-6)
+    np.testing.assert_allclose(result["bse"][identified], expected.bse, rtol=1e-6)
+    assert result["nobs"] == expected.nobs
+    assert np.isnan(result["params"][~identified]).all()
+
+
+def test_event_time_design_bins_endpoints():
+    design, names = event_time_design(
+        n_entities=1,
+        n_days=8,
+        event_starts={"lockdown": 4},
+        leads=2,
+        lags=1,
+        bin_endpoints=True,
+    )
+    dense = design.toarray()[:, 1:]
+
+    assert names[1:] == [("lockdown", -2), ("lockdown", 0), ("lockdown", 1)]
+    # Days 0 to 2 are at or before day -2, day 3 is the reference, days 5 to 7 are
+    # at or after day 1
+    expected = np.array(
+        [[1, 0, 0], [1, 0, 0], [1, 0, 0], [0, 0, 0], [0, 1, 0], [0, 0, 1], [0, 0, 1]]
+        + [[0, 0, 1]]
+    )
+    np.testing.assert_array_equal(dense, expected)
+
+    with pytest.raises(ValueError, match="endpoint"):
+        event_time_design(1, 8, {"lockdown": 4}, leads=1, lags=1, bin_endpoints=True)
+
+
+def test_event_study_with_day_effects_uses_controls():
+    rng = np.random.default_rng(0)
+    n_entities, n_days = 6, 80
+    # Four entities start the lockdown on different days, two never start it
+    starts = {"lockdown": [20, 30, 40, 50, -1, -1]}
+    design, names = event_time_design(
+        n_entities,
+        n_days,
+        starts,
+        leads=5,
+        lags=10,
+        bin_endpoints=True,
+        day_effects=True,
+    )
+
+    assert [name for name in names if name[0] == "day"][0] == ("day", 1)
+    assert design.shape == (n_entities * n_days, n_entities + n_days - 1 + 15)
+    # All entities share a path on the same calendar days
+    common = np.tile(np.cumsum(rng.normal(size=n_days)), n_entities)
+    effects = np.array([-3.0 if name == ("lockdown", 0) else 0.0 for name in names])
+    outcome = common + design @ effects + rng.normal(scale=0.01, size=len(common))
+
+    result = fit_event_study(design, outcome)
+
+    indicators = [name[0] == "lockdown" for name in names]
+    np.testing.assert_allclose(
+        result["params"][indicators], effects[indicators], atol=0.05
+    )
@@ -0,0 +1,71 @@
+"""Test whether collecting the task modules stays fast.
+
+Task modules are imported during collection, so they must not import the heavy
+dependencies which are only needed when a task is executed.
+
+"""
+import json
+import subprocess
+import sys
+
+from src.config import ROOT
+from src.config import SRC
+
+# Budget in seconds for importing all task modules in a fresh interpreter
+IMPORT_TIME_BUDGET = 3.0
+
+HEAVY_MODULES = [
+    "bs4",
+    "estimagic",
+    "matplotlib",
+    "ordered_set",
+    "requests",
+    "seaborn",
+    "selenium",
+    "stargazer",
+    "statsmodels",
+]
+
+IMPORT_SCRIPT = """
+import importlib
+import json
+import sys
+import time
+
+start = time.perf_counter()
+for module in {modules}:
+    importlib.import_module(module)
+duration = time.perf_counter() - start
+
+loaded = sorted({{name.split(".")[0] for name in sys.modules}})
+print(json.dumps({{"duration": duration, "loaded": loaded}}))
+"""
+
+
+def test_task_modules_import_lazily():
+    result = import_task_modules()
+    assert not set(HEAVY_MODULES).intersection(result["loaded"])
+
+
+def test_task_modules_import_time_budget():
+    result = import_task_modules()
+    assert result["duration"] < IMPORT_TIME_BUDGET
+
+
+def import_task_modules():
+    modules = [
+        ".".join(path.relative_to(ROOT).with_suffix("").parts)
+        for path in sorted(SRC.rglob("task_*.py"))
+    ]
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; sys.path[:0] = [{str(ROOT)!r}, {str(SRC)!r}]"
+            + IMPORT_SCRIPT.format(modules=modules),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(output.stdout.splitlines()[-1])
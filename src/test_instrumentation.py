@@ -0,0 +1,104 @@
+"""Test whether the instrumentation plugin reports the tasks of a build.
+
+"""
+import json
+import textwrap
+
+import numpy as np
+import pandas as pd
+import pytask
+import pytest
+
+import src.library.instrumentation as instrumentation
+from src.library.instrumentation import count_file_rows
+from src.library.panel_store import write_dense_panel
+from src.library.partitions import write_partition_index
+from src.library.partitions import write_partitioned
+
+TASKS = """
+import numpy as np
+import pytask
+
+
+@pytask.mark.produces({"csv": "data.csv", "npy": "panel.npy"})
+def task_create_data(produces):
+    produces["csv"].write_text("a,b\\n1,2\\n3,4\\n5,6\\n")
+    np.save(produces["npy"], np.zeros((2, 5, 3)))
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "INSTRUMENTATION", tmp_path / "report")
+    tmp_path.joinpath("task_example.py").write_text(textwrap.dedent(TASKS))
+    return tmp_path
+
+
+@pytest.mark.parametrize("rows, expected", [("", None), ("true", 13)])
+def test_run_report(project, rows, expected):
+    project.joinpath("pytask.ini").write_text(
+        f"[pytask]\ninstrumentation_rows = {rows}\n" if rows else "[pytask]\n"
+    )
+    session = pytask.main({"paths": project})
+    assert session.exit_code == 0
+    assert session.config["instrumentation_rows"] is bool(rows)
+
+    with open(project / "report" / "run_report.json") as report_file:
+        (record,) = json.load(report_file)["tasks"]
+    assert record["task"].endswith("task_create_data")
+    assert record["success"]
+    assert record["wall_time"] >= 0 and record["peak_rss_bytes"] > 0
+    assert record["bytes_out"] == sum(
+        project.joinpath(name).stat().st_size for name in ["data.csv", "panel.npy"]
+    )
+    assert record.get("rows_out") == expected
+    assert ("rows_in" in record) is bool(rows)
+
+    history = project.joinpath("report", "run_history.jsonl").read_text()
+    assert len(history.splitlines()) == 1
+
+
+def test_instrumentation_disabled(project):
+    project.joinpath("pytask.ini").write_text("[pytask]\ninstrumentation = false\n")
+    session = pytask.main({"paths": project})
+
+    assert session.exit_code == 0
+    assert not project.joinpath("report").exists()
+
+
+def test_count_file_rows(tmp_path):
+    pd.DataFrame({"a": range(4)}).to_csv(tmp_path / "data.csv", index=False)
+    np.save(tmp_path / "panel.npy", np.zeros((3, 7, 2)))
+    np.save(tmp_path / "series.npy", np.zeros(5))
+    pd.DataFrame({"a": range(4)}).to_pickle(tmp_path / "data.pkl")
+
+    assert count_file_rows(tmp_path / "data.csv") == 4
+    assert count_file_rows(tmp_path / "panel.npy") == 21
+    assert count_file_rows(tmp_path / "series.npy") == 5
+    # Pickles are not loaded to count their rows
+    assert count_file_rows(tmp_path / "data.pkl") is None
+    assert count_file_rows(tmp_path / "missing.csv") is None
+
+
+def test_count_file_rows_from_headers_and_indices(tmp_path):
+    np.savez_compressed(tmp_path / "arrays.npz", a=np.zeros((4, 3, 2)), b=np.zeros(5))
+    data = pd.DataFrame(
+        {
+            "country": ["Austria"] * 3 + ["Germany"] * 2,
+            "date": pd.date_range("2020-03-01", periods=5),
+            "a": range(5),
+        }
+    )
+    write_dense_panel(data, "country", ["a"], tmp_path / "panel.npy")
+    partitions = write_partitioned(data, "country", tmp_path / "partitions")
+    write_partition_index(
+        partitions, tmp_path / "partitions.json", rows=data.groupby("country").size()
+    )
+    write_partition_index(partitions, tmp_path / "without_rows.json")
+
+    assert count_file_rows(tmp_path / "arrays.npz") == 12
+    # The panel has every day of the data for both countries, like the array
+    assert count_file_rows(tmp_path / "panel.json") == 10
+    assert count_file_rows(tmp_path / "panel.npy") == 10
+    assert count_file_rows(tmp_path / "partitions.json") == 5
+    assert count_file_rows(tmp_path / "without_rows.json") is None
@@ -0,0 +1,60 @@
+"""Test whether distributed lags equal shifted series and break at group boundaries.
+
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.library.lags import distributed_lag_design
+from src.library.lags import lag_matrix
+
+
+def test_lag_matrix_single_group_is_view():
+    values = np.arange(6.0)
+    lags = lag_matrix(values, max_lag=2)
+
+    assert not lags.flags.owndata
+    np.testing.assert_array_equal(lags[:, 1], [np.nan, 0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(lags[:, 2], [np.nan, np.nan, 0, 1, 2, 3])
+
+
+def test_distributed_lag_design_equals_grouped_shift():
+    data = generate_input()
+    design = distributed_lag_design(data, ["x"], max_lag=3, group="country")
+
+    by_date = data.sort_values(["country", "date"])
+    expected = pd.concat(
+        [by_date.groupby("country")["x"].shift(k) for k in range(4)], axis=1
+    ).loc[data.index]
+    np.testing.assert_array_equal(design.to_numpy(), expected.to_numpy())
+
+
+def test_distributed_lag_design_with_missing_days():
+    data = generate_input()
+    data = data.loc[~((data["country"] == "Germany") & (data["x"] == 4.0))]
+    design = distributed_lag_design(data, ["x"], max_lag=2, group="country")
+
+    # Germany misses 2020-03-03, lags reaching it are missing instead of shifted
+    germany = data.loc[data["country"] == "Germany"].sort_values("date").index
+    np.testing.assert_array_equal(
+        design.loc[germany].to_numpy(),
+        [[0, np.nan, np.nan], [1, 0, np.nan], [9, np.nan, 1], [16, 9, np.nan]],
+    )
+
+
+def test_lag_matrix_requires_unique_days():
+    with pytest.raises(ValueError, match="sorted and unique"):
+        lag_matrix(np.arange(3.0), 1, days=np.array([0, 1, 1]))
+
+
+def generate_input():
+    """Unsorted panel of two countries with 5 and 3 days."""
+    data = pd.DataFrame(
+        {
+            "country": ["Germany"] * 5 + ["Austria"] * 3,
+            "date": list(pd.date_range("2020-03-01", periods=5))
+            + list(pd.date_range("2020-03-01", periods=3)),
+            "x": np.arange(8.0) ** 2,
+        }
+    )
+    return data.sample(frac=1, random_state=1)
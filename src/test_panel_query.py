@@ -0,0 +1,87 @@
+"""Test whether panel queries are smoothed correctly and repeated queries are cached.
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.library.panel_query import PanelQuery
+from src.library.panel_store import write_dense_panel
+
+
+def test_query_moving_average(tmp_path):
+    panel_query = generate_panel_query(tmp_path)
+    result = panel_query.query(
+        "panel", ["Germany"], ["a"], start="2020-03-05", end="2020-03-08", window=3
+    )
+
+    expected = pd.Series(np.arange(10.0)).rolling(3).mean().iloc[4:8]
+    np.testing.assert_array_equal(result["a"].to_numpy(), expected.to_numpy())
+    assert result.index.get_level_values("date")[0] == pd.Timestamp("2020-03-05")
+
+
+def test_query_cache(tmp_path):
+    panel_query = generate_panel_query(tmp_path)
+    first = panel_query.query("panel", ["Austria"], start="2020-03-02")
+    second = panel_query.query("panel", ["Austria"], start="2020-03-02")
+
+    pd.testing.assert_frame_equal(first, second)
+    assert [latency["cache_hit"] for latency in panel_query.latencies] == [False, True]
+
+
+def test_query_cache_returns_copies(tmp_path):
+    panel_query = generate_panel_query(tmp_path)
+    first = panel_query.query("panel", ["Austria"], ["a"])
+    expected = first.copy()
+    first["c"] = 1.0
+    first.iloc[0, 0] = np.nan
+
+    second = panel_query.query("panel", ["Austria"], ["a"])
+    second.fillna(0, inplace=True)
+    third = panel_query.query("panel", ["Austria"], ["a"])
+
+    pd.testing.assert_frame_equal(third, expected)
+    assert panel_query.latencies[-1]["cache_hit"]
+    assert panel_query._cache_bytes == int(
+        expected.memory_usage(index=True, deep=True).sum()
+    )
+
+
+def test_query_cache_eviction(tmp_path):
+    panel_query = generate_panel_query(tmp_path, cache_budget=1)
+    panel_query.query("panel", ["Austria"])
+    panel_query.query("panel", ["Austria"])
+
+    assert [latency["cache_hit"] for latency in panel_query.latencies] == [False, False]
+
+
+def test_query_with_latency_in_threads(tmp_path):
+    panel_query = generate_panel_query(tmp_path, max_latencies=50)
+    starts = [f"2020-03-{day:02d}" for day in range(1, 11)] * 10
+
+    def query(start):
+        return panel_query.query_with_latency("panel", ["Germany"], start=start)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(query, starts))
+
+    # Every query gets the record of its own result
+    for result, latency in answers:
+        assert latency["rows"] == len(result)
+    assert sorted({latency["rows"] for _, latency in answers}) == list(range(1, 11))
+    assert len(panel_query.latencies) == 50
+    assert panel_query.latency_report()["count"].sum() == 50
+
+
+def generate_panel_query(tmp_path, **kwargs):
+    data = pd.DataFrame(
+        {
+            "country": ["Germany"] * 10 + ["Austria"] * 10,
+            "date": list(pd.date_range("2020-03-01", periods=10)) * 2,
+            "a": np.arange(20.0),
+            "b": np.arange(20.0) ** 2,
+        }
+    )
+    write_dense_panel(data, "country", ["a", "b"], tmp_path / "panel.npy")
+    return PanelQuery({"panel": tmp_path / "panel.npy"}, **kwargs)
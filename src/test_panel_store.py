@@ -0,0 +1,42 @@
+"""Test whether long data sets survive the dense panel store and slices are views.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.panel_store import load_dense_panel
+from src.library.panel_store import panel_to_frame
+from src.library.panel_store import slice_panel
+from src.library.panel_store import write_dense_panel
+
+
+def test_dense_panel_round_trip(tmp_path):
+    data = generate_input()
+    write_dense_panel(data, "country", ["a", "b"], tmp_path / "panel.npy")
+    panel = load_dense_panel(tmp_path / "panel.npy")
+
+    assert panel["values"].shape == (2, 4, 2)
+    expected = data.set_index(["country", "date"]).sort_index()
+    pd.testing.assert_frame_equal(panel_to_frame(panel), expected, check_freq=False)
+
+
+def test_slice_panel_is_view(tmp_path):
+    write_dense_panel(generate_input(), "country", ["a", "b"], tmp_path / "panel.npy")
+    panel = load_dense_panel(tmp_path / "panel.npy")
+
+    sliced = slice_panel(panel, ["Germany"], "2020-03-02", "2020-03-03", ["b"])
+    assert np.shares_memory(sliced["values"], panel["values"])
+    np.testing.assert_array_equal(sliced["values"][0, :, 0], [np.nan, 6.0])
+
+
+def generate_input():
+    return pd.DataFrame(
+        {
+            "country": ["Germany", "Germany", "Austria", "Germany", "Austria"],
+            "date": pd.to_datetime(
+                ["2020-03-01", "2020-03-03", "2020-03-01", "2020-03-04", "2020-03-02"]
+            ),
+            "a": [1.0, 2.0, 3.0, 4.0, 5.0],
+            "b": [np.nan, 6.0, 7.0, 8.0, 9.0],
+        }
+    )
@@ -0,0 +1,117 @@
+"""Test whether independent tasks are executed in parallel and in dependency order.
+
+"""
+import textwrap
+
+import pytask
+import pytest
+
+from src.library.parallel import admitted_tasks
+from src.library.parallel import GRANTED_WORKERS
+from src.library.parallel import granted_workers
+from src.library.parallel import parse_n_workers
+
+TASKS = """
+import time
+from pathlib import Path
+
+import pytask
+
+
+@pytask.mark.resources(kind="io")
+@pytask.mark.produces("download.txt")
+def task_download(produces):
+    time.sleep(0.2)
+    produces.write_text("data")
+
+
+@pytask.mark.parametrize(
+    "depends_on, produces, outcome",
+    [("download.txt", f"table_{outcome}.txt", outcome) for outcome in ["a", "b"]],
+)
+def task_export_table(depends_on, produces, outcome):
+    produces.write_text(depends_on.read_text() + outcome)
+"""
+
+
+def test_parallel_build(tmp_path):
+    tmp_path.joinpath("pytask.ini").write_text(
+        "[pytask]\ninstrumentation = false\nn_workers = 2\n"
+    )
+    tmp_path.joinpath("task_example.py").write_text(textwrap.dedent(TASKS))
+
+    session = pytask.main({"paths": tmp_path})
+
+    assert session.exit_code == 0
+    assert session.config["n_workers"] == 2
+    assert len(session.execution_reports) == 3
+    assert tmp_path.joinpath("table_a.txt").read_text() == "dataa"
+    assert tmp_path.joinpath("table_b.txt").read_text() == "datab"
+
+
+def test_parallel_build_failure(tmp_path):
+    tmp_path.joinpath("pytask.ini").write_text(
+        "[pytask]\ninstrumentation = false\nn_workers = 2\n"
+    )
+    tmp_path.joinpath("task_example.py").write_text(
+        textwrap.dedent(TASKS).replace('produces.write_text("data")', "1 / 0")
+    )
+
+    session = pytask.main({"paths": tmp_path})
+
+    assert session.exit_code == 1
+    assert not tmp_path.joinpath("table_a.txt").exists()
+    assert [report.success for report in session.execution_reports] == [False] * 3
+
+
+def test_tasks_start_granted_workers(tmp_path):
+    tmp_path.joinpath("pytask.ini").write_text(
+        "[pytask]\ninstrumentation = false\nn_workers = 2\n"
+    )
+    tmp_path.joinpath("task_example.py").write_text(
+        textwrap.dedent(
+            """
+            import pytask
+
+            from src.library.parallel import granted_workers
+
+
+            @pytask.mark.resources(cpus=4)
+            @pytask.mark.produces("workers.txt")
+            def task_pool(produces):
+                produces.write_text(str(granted_workers(4)))
+            """
+        )
+    )
+
+    session = pytask.main({"paths": tmp_path})
+
+    assert session.exit_code == 0
+    # The task declares 4 processes, the scheduler grants all 2 workers
+    assert tmp_path.joinpath("workers.txt").read_text() == "2"
+
+
+def test_waiting_task_reserves_workers():
+    workers = {"small_1": 1, "big": 2, "small_2": 1, "download": 0}
+    waiting = ["small_1", "big", "small_2", "download"]
+
+    # small_2 would leave the big task waiting for another worker
+    assert admitted_tasks(waiting, workers, free_workers=2) == ["small_1", "download"]
+    assert admitted_tasks(waiting[1:], workers, free_workers=1) == ["download"]
+    assert admitted_tasks(waiting[1:], workers, free_workers=2) == ["big", "download"]
+
+
+def test_granted_workers_without_scheduler(monkeypatch):
+    monkeypatch.delenv(GRANTED_WORKERS, raising=False)
+    assert granted_workers(3) == 3
+    monkeypatch.setenv(GRANTED_WORKERS, "2")
+    assert granted_workers(3) == 2
+    assert granted_workers(1) == 1
+
+
+@pytest.mark.parametrize(
+    "value, expected", [("1", 1), ("3", 3), (None, None), ("auto", None)]
+)
+def test_parse_n_workers(value, expected):
+    n_workers = parse_n_workers(value)
+    assert n_workers == expected or (value == "auto" and n_workers >= 1)
@@ -0,0 +1,82 @@
+"""Test whether partitioned data sets are sorted and only requested partitions are read.
+
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.library.partitions import chunksize_for_memory_budget
+from src.library.partitions import partition_csv
+from src.library.partitions import partition_paths
+from src.library.partitions import read_partition_index
+from src.library.partitions import read_partitions
+from src.library.partitions import write_partition_index
+from src.library.partitions import write_partitioned
+
+
+def test_partitions_are_sorted(tmp_path):
+    data = generate_input()
+    partitions = write_partitioned(data, "country", tmp_path / "partitions")
+    write_partition_index(partitions, tmp_path / "partitions" / "partitions.json")
+
+    assert sorted(partitions) == ["Austria", "Côte d'Ivoire", "Germany"]
+    # The paths which a task declares as products are the ones which are written
+    assert partition_paths(tmp_path / "partitions", partitions) == partitions
+    result = read_partitions(tmp_path / "partitions" / "partitions.json")
+    expected = data.sort_values(["country", "date"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_read_partitions_opens_requested_keys_only(tmp_path):
+    partitions = write_partitioned(generate_input(), "country", tmp_path)
+    write_partition_index(partitions, tmp_path / "partitions.json")
+    partitions["Austria"].unlink()
+
+    germany = read_partitions(tmp_path / "partitions.json", keys=["Germany"])
+    assert germany["country"].unique().tolist() == ["Germany"]
+    assert germany["date"].is_monotonic_increasing
+
+    with pytest.raises(KeyError):
+        read_partitions(tmp_path / "partitions.json", keys=["France"])
+
+
+def test_partition_csv_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            "country": rng.choice(["Germany", "Austria", "Côte d'Ivoire"], 500),
+            "date": pd.date_range("2020-01-01", periods=500).strftime("%Y-%m-%d"),
+            "a": rng.normal(size=500),
+        }
+    )
+    data.to_csv(tmp_path / "data.csv", index=False)
+    directory = tmp_path / "partitions"
+    directory.mkdir()
+    directory.joinpath("France.csv").write_text("stale")
+
+    # The budget holds a few dozen rows, so the file is read in many chunks
+    memory_budget = 4_000
+    assert chunksize_for_memory_budget(tmp_path / "data.csv", memory_budget) < 100
+    partitions = partition_csv(
+        tmp_path / "data.csv", "country", directory, memory_budget
+    )
+    write_partition_index(partitions, directory / "partitions.json")
+
+    assert [*partitions] == ["Austria", "Côte d'Ivoire", "Germany"]
+    assert not directory.joinpath("France.csv").exists()
+    index = read_partition_index(directory / "partitions.json")
+    for key, path in index.items():
+        expected = data.loc[data["country"] == key].reset_index(drop=True)
+        pd.testing.assert_frame_equal(pd.read_csv(path), expected)
+
+
+def generate_input():
+    return pd.DataFrame(
+        {
+            "country": ["Germany", "Austria", "Germany", "Côte d'Ivoire", "Austria"],
+            "date": pd.to_datetime(
+                ["2020-03-03", "2020-03-02", "2020-03-01", "2020-03-01", "2020-03-01"]
+            ),
+            "a": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
@@ -0,0 +1,43 @@
+"""Test whether regression tables are ordered, renamed and starred correctly.
+
+"""
+import numpy as np
+
+from src.library.regression_tables import covariate_positions
+from src.library.regression_tables import render_regression_tables
+
+
+def test_covariate_positions():
+    positions = covariate_positions(
+        ["Intercept", "a", "b", "a:b", "c"], covariates_order=["a:b", "x", "a"]
+    )
+    np.testing.assert_array_equal(positions, [3, 1, 2, 4, 0])
+
+
+def test_render_regression_tables_text():
+    tables = render_regression_tables(
+        {"y": generate_results()},
+        fmt="text",
+        covariates_names={"a": "Alpha"},
+        covariates_order=["b", "a"],
+    )
+    rows = [row.split() for row in tables["y"].splitlines()]
+    assert rows[3] == ["b", "-0.500*"]
+    assert rows[5] == ["Alpha", "1.000***", "2.000"]
+    assert rows[7] == ["Intercept", "0.100", "0.200**"]
+    assert rows[10] == ["Observations", "100", "100"]
+
+
+def generate_results():
+    return {
+        "terms": ["Intercept", "a", "b"],
+        "params": np.array([[0.1, 1.0, np.nan], [0.2, 2.0, -0.5]]),
+        "bse": np.array([[0.1, 0.1, np.nan], [0.1, 1.5, 0.3]]),
+        "pvalues": np.array([[0.3, 0.001, np.nan], [0.04, 0.2, 0.09]]),
+        "nobs": np.array([100.0, 100.0]),
+        "rsquared": np.array([0.5, 0.6]),
+        "rsquared_adj": np.array([0.49, 0.58]),
+        "resid_std_err": np.array([1.0, 0.9]),
+        "fvalue": np.array([10.0, 12.0]),
+        "f_pvalue": np.array([0.001, 0.001]),
+    }
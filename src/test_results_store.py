@@ -0,0 +1,72 @@
+"""Test whether regression estimates are stored and loaded without loss.
+
+"""
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+from src.library.regression_tables import regression_results_from_fits
+from src.library.results_store import list_outcomes
+from src.library.results_store import load_regression_results
+from src.library.results_store import save_regression_results
+from src.library.results_store import stack_regression_results
+
+SPECIFICATIONS = {"y": ["y ~ a", "y ~ a + b"], "z": ["z ~ a", "z ~ a + b"]}
+
+
+def test_results_store_round_trip(tmp_path):
+    data = generate_input()
+    fits = {
+        outcome: [smf.ols(specification, data).fit() for specification in formulas]
+        for outcome, formulas in SPECIFICATIONS.items()
+    }
+    save_regression_results(
+        {
+            outcome: regression_results_from_fits(models, SPECIFICATIONS[outcome])
+            for outcome, models in fits.items()
+        },
+        tmp_path / "results.npz",
+    )
+
+    assert list_outcomes(tmp_path / "results.npz") == ["y", "z"]
+    loaded = load_regression_results(tmp_path / "results.npz", outcomes=["z"])
+    assert [*loaded] == ["z"]
+    results = loaded["z"]
+    assert results["terms"] == ["Intercept", "a", "b"]
+    assert results["specifications"] == SPECIFICATIONS["z"]
+    for i, fit in enumerate(fits["z"]):
+        positions = [results["terms"].index(term) for term in fit.params.index]
+        for name in ["params", "bse", "pvalues"]:
+            np.testing.assert_allclose(
+                results[name][i, positions], getattr(fit, name).to_numpy()
+            )
+        np.testing.assert_allclose(
+            results["cov_params"][i][np.ix_(positions, positions)],
+            fit.cov_params().to_numpy(),
+        )
+        assert results["nobs"][i] == fit.nobs
+        np.testing.assert_allclose(results["rsquared"][i], fit.rsquared)
+    assert np.isnan(results["params"][0, 2])
+
+
+def test_stack_regression_results_unions_terms():
+    data = generate_input()
+    stacked = stack_regression_results(
+        [
+            regression_results_from_fits([smf.ols("y ~ b", data).fit()], ["y ~ b"]),
+            regression_results_from_fits([smf.ols("y ~ a", data).fit()], ["y ~ a"]),
+        ]
+    )
+
+    assert stacked["terms"] == ["Intercept", "b", "a"]
+    assert stacked["specifications"] == ["y ~ b", "y ~ a"]
+    assert np.isnan(stacked["params"][[0, 1], [2, 1]]).all()
+    assert stacked["cov_params"].shape == (2, 3, 3)
+
+
+def generate_input():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"a": rng.normal(size=50), "b": rng.normal(size=50)})
+    data["y"] = 1 + 2 * data["a"] - data["b"] + rng.normal(size=50)
+    data["z"] = 0.5 * data["a"] + rng.normal(size=50)
+    return data
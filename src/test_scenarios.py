@@ -0,0 +1,46 @@
+"""Test whether scenario design matrices and predictions follow the term names.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.scenarios import predict_scenarios
+from src.library.scenarios import scenario_design
+from src.library.scenarios import scenario_grid
+
+
+def test_scenario_design():
+    scenarios = scenario_grid(a=[1.0, 2.0], b=[0.0, 3.0])
+    design = scenario_design(
+        scenarios, ["Intercept", "a", "a:b", "np.power(c, 2)"], baseline={"c": 3.0}
+    )
+
+    expected = np.array(
+        [[1, 1, 0, 9], [1, 1, 3, 9], [1, 2, 0, 9], [1, 2, 6, 9]], dtype=float
+    )
+    np.testing.assert_array_equal(design, expected)
+
+
+def test_predict_scenarios():
+    scenarios = pd.DataFrame({"a": [0.0, 1.0, 2.0]})
+    predictions = predict_scenarios({"y": generate_results()}, scenarios)
+
+    # The first specification does not contain a
+    np.testing.assert_allclose(predictions["mean"][0, 0], [1.0, 1.0, 1.0])
+    np.testing.assert_allclose(predictions["mean"][0, 1], [1.0, 3.0, 5.0])
+    np.testing.assert_allclose(
+        predictions["se"][0, 1] ** 2, [0.04, 0.04 + 0.01 + 0.01, 0.04 + 0.02 + 0.04]
+    )
+    assert (predictions["lower"] < predictions["mean"]).all()
+
+
+def generate_results():
+    return {
+        "terms": ["Intercept", "a"],
+        "params": np.array([[1.0, np.nan], [1.0, 2.0]]),
+        "cov_params": np.array(
+            [[[0.04, np.nan], [np.nan, np.nan]], [[0.04, 0.005], [0.005, 0.01]]]
+        ),
+        "resid_std_err": np.array([1.0, 1.0]),
+        "df_resid": np.array([100.0, 99.0]),
+    }
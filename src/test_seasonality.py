@@ -0,0 +1,44 @@
+"""Test whether the weekday profile is recovered for all series of a panel at once.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.seasonality import weekday_decomposition
+
+
+def test_weekday_decomposition():
+    dates = pd.date_range("2020-03-02", periods=56)
+    profile = np.array([1.0, 2.0, 0.0, -1.0, 3.0, -2.0, -3.0])
+    values = generate_input(dates, profile)
+
+    decomposition = weekday_decomposition(values, dates)
+
+    np.testing.assert_allclose(decomposition["profile"][0, :, 0], profile)
+    np.testing.assert_allclose(decomposition["profile"][1, :, 1], 2 * profile)
+    np.testing.assert_allclose(decomposition["adjusted"][0, :, 0], np.arange(56.0))
+    assert np.isnan(decomposition["trend"][:, [0, 1, 2, -3, -2, -1]]).all()
+
+
+def test_weekday_decomposition_missing_days():
+    dates = pd.date_range("2020-03-02", periods=56)
+    profile = np.array([1.0, 2.0, 0.0, -1.0, 3.0, -2.0, -3.0])
+    values = generate_input(dates, profile)
+    values[0, 20, 0] = np.nan
+
+    decomposition = weekday_decomposition(values, dates)
+
+    np.testing.assert_allclose(decomposition["profile"][0, :, 0], profile)
+    assert np.isnan(decomposition["adjusted"][0, 20, 0])
+
+
+def generate_input(dates, profile):
+    """Linear trends plus a weekday profile for 2 entities and 2 metrics."""
+    trend = np.arange(len(dates), dtype=float)
+    seasonal = profile[dates.weekday]
+    values = np.empty((2, len(dates), 2))
+    values[0, :, 0] = trend + seasonal
+    values[0, :, 1] = -trend
+    values[1, :, 0] = 5.0
+    values[1, :, 1] = 0.5 * trend + 2 * seasonal
+    return values
@@ -0,0 +1,57 @@
+"""Test whether sharded preparation equals preparing the sorted data at once.
+
+"""
+import numpy as np
+import pandas as pd
+from utils import prepare_country_level_data
+
+from src.library.sharding import map_shards
+from src.library.sharding import split_by_level
+
+metrics = [
+    "retail_and_recreation",
+    "grocery_and_pharmacy",
+    "parks",
+    "transit_stations",
+    "workplaces",
+    "residential",
+]
+
+
+def test_map_shards_of_unsorted_data():
+    data, infect_numbers = generate_input()
+    shards = split_by_level(data.sample(frac=1, random_state=0), "country")
+
+    sequential = map_shards(
+        prepare_country_level_data, shards, infect_numbers=infect_numbers
+    )
+    parallel = map_shards(
+        prepare_country_level_data, shards, n_workers=2, infect_numbers=infect_numbers
+    )
+
+    pd.testing.assert_frame_equal(parallel, sequential)
+    assert sequential.index.is_monotonic_increasing
+    expected = (
+        data.loc["Germany", "workplaces"][::-1].rolling(7).mean()[::-1].to_numpy()
+    )
+    np.testing.assert_allclose(
+        sequential.loc["Germany", "workplaces_avg_7d"].to_numpy(), expected
+    )
+    assert sequential["new_cases"].notna().all()
+
+
+def generate_input():
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [["Austria", "Germany"], pd.date_range("2020-03-01", periods=20)],
+        names=["country", "date"],
+    )
+    data = pd.DataFrame(rng.normal(size=(40, 6)), index=index, columns=metrics)
+    data = data.assign(
+        sub_region_1="country",
+        sub_region_2="nan",
+        metro_area="nan",
+        iso_3166_2_code="nan",
+    )
+    infect_numbers = pd.DataFrame({"new_cases": np.arange(40.0)}, index=index)
+    return data, infect_numbers
@@ -0,0 +1,53 @@
+"""Test whether pairwise correlations and DTW distances match their definitions.
+
+"""
+import numpy as np
+import pandas as pd
+
+from src.library.similarity import correlation_matrix
+from src.library.similarity import dtw_matrix
+from src.library.similarity import lb_keogh_matrix
+
+
+def test_correlation_matrix_missing_days():
+    values = generate_input()
+    values[1, 3] = np.nan
+
+    expected = pd.DataFrame(values.T).corr().to_numpy()
+    np.testing.assert_allclose(correlation_matrix(values), expected)
+
+
+def test_dtw_matrix():
+    values = generate_input()
+    expected = np.array([[dtw_loop(x, y, window=3) for y in values] for x in values])
+
+    np.testing.assert_allclose(dtw_matrix(values, window=3), expected)
+    assert (lb_keogh_matrix(values, window=3) <= expected + 1e-12).all()
+
+
+def test_dtw_matrix_pruning():
+    values = generate_input()
+    expected = dtw_matrix(values, window=3)
+    max_distance = np.median(expected[expected > 0])
+
+    pruned = dtw_matrix(values, window=3, max_distance=max_distance, batch_size=2)
+    warped = np.isfinite(pruned)
+    np.testing.assert_allclose(pruned[warped], expected[warped])
+    assert (expected[~warped] > max_distance).all()
+
+
+def dtw_loop(x, y, window):
+    n_days = len(x)
+    cumulated = np.full((n_days + 1, n_days + 1), np.inf)
+    cumulated[0, 0] = 0
+    for i in range(1, n_days + 1):
+        for j in range(max(1, i - window), min(n_days, i + window) + 1):
+            cumulated[i, j] = (x[i - 1] - y[j - 1]) ** 2 + min(
+                cumulated[i - 1, j - 1], cumulated[i - 1, j], cumulated[i, j - 1]
+            )
+    return np.sqrt(cumulated[n_days, n_days])
+
+
+def generate_input():
+    rng = np.random.default_rng(0)
+    return np.cumsum(rng.normal(size=(6, 30)), axis=1)
@@ -0,0 +1,76 @@
+"""Test whether raw files are stored as versioned snapshots and old ones are deleted.
+
+"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.library.snapshots import apply_retention
+from src.library.snapshots import list_snapshots
+from src.library.snapshots import publish_snapshot
+from src.library.snapshots import write_snapshot
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".zst"])
+def test_snapshot_round_trip(tmp_path, suffix):
+    if suffix == ".zst":
+        pytest.importorskip("zstandard")
+    data = generate_input()
+    data.to_csv(tmp_path / "owid_data.csv", index=False)
+
+    snapshot = write_snapshot(
+        tmp_path / "owid_data.csv",
+        tmp_path / "snapshots",
+        suffix=suffix,
+        chunk_size=16,
+        time=datetime(2021, 3, 1, 12),
+    )
+    assert snapshot.name.startswith("owid_data-20210301T120000Z-")
+    assert snapshot.name.endswith(".csv" + suffix)
+
+    publish_snapshot(snapshot, tmp_path / f"owid_data.csv{suffix}")
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / f"owid_data.csv{suffix}"), data
+    )
+
+
+def test_same_content_reuses_snapshot(tmp_path):
+    generate_input().to_csv(tmp_path / "owid_data.csv", index=False)
+    first = write_snapshot(tmp_path / "owid_data.csv", tmp_path, suffix=".gz")
+    second = write_snapshot(tmp_path / "owid_data.csv", tmp_path, suffix=".gz")
+
+    assert first == second
+    assert list_snapshots(tmp_path, "owid_data") == [first]
+
+
+def test_apply_retention(tmp_path):
+    data = generate_input()
+    for i in range(4):
+        data.assign(new_cases=data["new_cases"] + i).to_csv(
+            tmp_path / "owid_data.csv", index=False
+        )
+        write_snapshot(
+            tmp_path / "owid_data.csv",
+            tmp_path / "snapshots",
+            suffix=".gz",
+            time=datetime(2021, 3, 1 + i),
+        )
+    snapshots = list_snapshots(tmp_path / "snapshots", "owid_data")
+
+    deleted = apply_retention(tmp_path / "snapshots", "owid_data", keep=3)
+    assert deleted == snapshots[:1]
+
+    # The most recent snapshot is kept even if it exceeds the size limit
+    apply_retention(tmp_path / "snapshots", "owid_data", keep=3, max_bytes=1)
+    assert list_snapshots(tmp_path / "snapshots", "owid_data") == snapshots[-1:]
+
+
+def generate_input():
+    return pd.DataFrame(
+        {
+            "location": ["Germany", "Germany", "Austria"],
+            "date": ["2020-03-01", "2020-03-02", "2020-03-01"],
+            "new_cases": [10.0, 20.0, 5.0],
+        }
+    )
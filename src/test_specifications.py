@@ -0,0 +1,65 @@
+"""Test whether specifications are read in order and keyed by their normalized formula.
+
+"""
+import pytest
+
+from src.config import SRC
+from src.library.specifications import model_key
+from src.library.specifications import normalize_formula
+from src.library.specifications import read_specifications
+from src.library.specifications import sample_formula
+
+
+def test_read_specifications():
+    specifications = read_specifications(
+        SRC / "model_specs" / "regression_specifications.ini"
+    )
+
+    assert specifications["dependent_variables"][0] == "workplaces_avg_7d"
+    assert len(specifications["dependent_variables"]) == 5
+    assert [*specifications["specifications"]] == [
+        "baseline",
+        "lockdown_interaction",
+        "light_lockdown",
+        "cases",
+        "cases_cubic",
+        "epidemic",
+    ]
+    assert "\n" not in specifications["specifications"]["baseline"]
+    assert specifications["event_study"]["events"][0] == "first_lockdown"
+    assert isinstance(specifications["event_study"]["leads"], int)
+    assert specifications["distributed_lags"]["max_lag"] == 28
+
+
+def test_model_key():
+    key = model_key("y", "a + b * c")
+
+    assert model_key("y", "b * c\n    +  a") == key
+    assert model_key("y", "a + b * c + a") == key
+    assert model_key("y", "a + b:c") != key
+    assert model_key("z", "a + b * c") != key
+    assert model_key("y", "a + b + c + c:b") == key
+    assert model_key("y", "a + b * c - 1") != key
+    assert model_key("y", "a + b * c", sample="a + b + c") != key
+
+
+def test_sample_formula():
+    sample = sample_formula(["a + b * c", "a + np.power(d, 2)", "a"])
+
+    assert sample == "1+a+b+c+np.power(d, 2)"
+    assert sample_formula(["b * c + a", "np.power(d,2) + a"]) == sample
+
+
+def test_normalize_formula_keeps_calls():
+    assert normalize_formula("np.log(x+1) + I(a + b)") == "1+I(a + b)+np.log(x + 1)"
+
+
+def test_read_specifications_rejects_duplicates(tmp_path):
+    path = tmp_path / "specifications.ini"
+    path.write_text(
+        "[dependent_variables]\nvariables = y\n"
+        "[specification:first]\nformula = a + b * c\n"
+        "[specification:second]\nformula = b * c + a\n"
+    )
+    with pytest.raises(ValueError, match="first and second"):
+        read_specifications(path)
@@ -0,0 +1,96 @@
+"""Test the least squares weights on the simplex and the placebo study.
+
+"""
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from src.library.synthetic_control import placebo_study
+from src.library.synthetic_control import project_to_simplex
+from src.library.synthetic_control import simplex_least_squares
+
+
+def test_project_to_simplex():
+    rng = np.random.default_rng(0)
+    for vector in rng.normal(size=(20, 5)) * 3:
+        projection = project_to_simplex(vector)
+        assert (projection >= 0).all()
+        np.testing.assert_allclose(projection.sum(), 1)
+
+    np.testing.assert_allclose(
+        project_to_simplex(np.array([0.2, 0.3, 0.5])), [0.2, 0.3, 0.5]
+    )
+    np.testing.assert_allclose(
+        project_to_simplex(np.array([3.0, 0.0, -1.0])), [1, 0, 0]
+    )
+
+
+def test_simplex_least_squares_equals_constrained_minimum():
+    rng = np.random.default_rng(1)
+    design = rng.normal(size=(60, 8)).cumsum(axis=0)
+    target = rng.normal(size=60).cumsum()
+    weights, _ = simplex_least_squares(design, target, tol=1e-12)
+
+    expected = minimize(
+        lambda w: np.sum((design @ w - target) ** 2),
+        np.full(8, 1 / 8),
+        bounds=[(0, 1)] * 8,
+        constraints={"type": "eq", "fun": lambda w: w.sum() - 1},
+        method="SLSQP",
+        options={"ftol": 1e-14, "maxiter": 1000},
+    ).x
+    np.testing.assert_allclose(weights, expected, atol=1e-5)
+
+
+def test_simplex_least_squares_recovers_weights_and_warm_start():
+    rng = np.random.default_rng(2)
+    design = rng.normal(size=(80, 6)).cumsum(axis=0)
+    true = np.array([0.5, 0.3, 0.2, 0, 0, 0])
+    weights, iterations = simplex_least_squares(design, design @ true)
+    np.testing.assert_allclose(weights, true, atol=1e-4)
+
+    _, warm_iterations = simplex_least_squares(design, design @ true, initial=weights)
+    assert warm_iterations <= iterations
+
+
+def test_placebo_study_detects_effect():
+    values, treated = generate_panel()
+    study = placebo_study(values, treated, pre_days=60, post_days=20)
+
+    assert study["weights"].shape == (8, 2, 8)
+    np.testing.assert_allclose(study["weights"].sum(axis=-1), 1)
+    assert (study["weights"][np.arange(8), :, np.arange(8)] == 0).all()
+    # The treated entity is no donor of the placebos
+    assert (np.delete(study["weights"], treated, axis=0)[:, :, treated] == 0).all()
+    np.testing.assert_allclose(study["p_value"], 1 / 8)
+    assert (study["gap"][treated, :, 60:80] > 5).all()
+
+
+def test_placebo_study_in_parallel_equals_sequential():
+    values, treated = generate_panel()
+    values[3, :10, 1] = np.nan
+    sequential = placebo_study(values, treated, pre_days=60)
+    parallel = placebo_study(values, treated, pre_days=60, n_workers=2)
+
+    for name, array in sequential.items():
+        np.testing.assert_array_equal(parallel[name], array)
+    # Entity 3 misses days before the treatment in metric 1
+    assert np.isnan(sequential["ratio"][3, 1])
+    assert (sequential["weights"][:, 1, 3] == 0).all()
+
+
+def generate_panel():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(8, 100, 2)).cumsum(axis=1)
+    treated = 2
+    values[treated] = (
+        0.4 * values[0] + 0.6 * values[5] + rng.normal(size=(100, 2)) * 0.1
+    )
+    values[treated, 60:] += 10
+    return values, treated
+
+
+def test_placebo_study_requires_pre_treatment_days():
+    values, treated = generate_panel()
+    with pytest.raises(ValueError, match="too few"):
+        placebo_study(values, treated, pre_days=10)
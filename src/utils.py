@@ -1,6 +1,5 @@
-from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
+import pandas as pd
 
 
 def create_date(data, date_name="date"):
@@ -15,20 +14,18 @@ def create_date(data, date_name="date"):
     """
 
     out = data.rename(columns={date_name: "date_str"})
-    out["date"] = list(map(lambda x: datetime.strptime(x, "%Y-%m-%d"), out["date_str"]))
+    # Parse all dates at once, the variables below are vectorized on datetime64
+    out["date"] = pd.to_datetime(out["date_str"], format="%Y-%m-%d")
 
-    out["weekday"] = list(map(lambda x: x.weekday(), out["date"]))
-    out["weekday"] = out["weekday"].replace(
+    out["weekday"] = out["date"].dt.dayofweek.map(
         {0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"}
     )
 
-    out["day"] = list(map(lambda x: x.day, out["date"]))
-    out["week"] = list(map(lambda x: x.week, out["date"]))
-    out["weekend"] = list(
-        map(lambda x: int(x), (out["weekday"] == "Sat") | (out["weekday"] == "Sun"))
-    )
-    out["month"] = list(map(lambda x: x.month, out["date"]))
-    out["year"] = list(map(lambda x: x.year, out["date"]))
+    out["day"] = out["date"].dt.day
+    out["week"] = out["date"].dt.isocalendar().week.astype(np.int64)
+    out["weekend"] = (out["date"].dt.dayofweek >= 5).astype(int)
+    out["month"] = out["date"].dt.month
+    out["year"] = out["date"].dt.year
 
     return out
 
@@ -79,6 +76,123 @@ def create_moving_average(data, varlist, grouping_var, kind="backward", time=7):
     out = out.sort_index()
     return out
 
+
+def clean_google_data(google_data):
+    """Clean and format the Google mobility data
+
+    Args:
+        google_data (pandas.DataFrame): Google mobility data as downloaded
+
+    Returns:
+        pandas.DataFrame: formatted data with date variables and (country, date) as
+        index
+    """
+    data = google_data.copy()
+
+    # Replace NaN with "country" in "sub_region_1" column
+    data["sub_region_1"] = data["sub_region_1"].replace(np.nan, "country")
+
+    # Rename variables
+    data.columns = map(
+        lambda x: x.replace("_percent_change_from_baseline", ""), data.columns
+    )
+    data.rename(columns={"country_region": "country"}, inplace=True)
+
+    # Drop census_fips_code because contains only NaN's and the index of the download
+    data = data.drop(["census_fips_code", "Unnamed: 0"], axis=1, errors="ignore")
+
+    # Change datatypes of some columns to string
+    data[
+        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code", "place_id"]
+    ] = data[
+        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code", "place_id"]
+    ].astype(
+        str
+    )
+
+    # Create date variables
+    data = create_date(data)
+
+    # Use MultiIndex for better overview
+    data = data.set_index(["country", "date"])
+    data = data.drop("date_str", axis=1)
+
+    return data
+
+
+def prepare_infection_data(owid_data):
+    """Format the OWID infection numbers and add their 7-day moving average
+
+    Args:
+        owid_data (pandas.DataFrame): OWID data as downloaded
+
+    Returns:
+        pandas.DataFrame: total and new cases with (country, date) as index
+    """
+    # Rename location to country
+    infect_numbers = owid_data.rename(columns={"location": "country"})
+
+    # Take only columns we need (so far)
+    infect_numbers = infect_numbers.loc[
+        :, ("country", "date", "total_cases", "new_cases")
+    ]
+
+    # Make date a datetime object
+    infect_numbers["date"] = pd.to_datetime(infect_numbers["date"], format="%Y-%m-%d")
+
+    # Use MultiIndex for better overview
+    infect_numbers = infect_numbers.set_index(["country", "date"])
+
+    # Generate 7-day simple moving average
+    infect_numbers = create_moving_average(
+        infect_numbers, ["new_cases"], "country", kind="forward", time=7
+    )
+
+    return infect_numbers
+
+
+def prepare_country_level_data(data, infect_numbers):
+    """Create the country level mobility data and join the infection numbers
+
+    Args:
+        data (pandas.DataFrame): output of clean_google_data, may contain one or several
+        countries
+        infect_numbers (pandas.DataFrame): output of prepare_infection_data
+
+    Returns:
+        pandas.DataFrame: country level mobility with 7-day moving averages and
+        infection numbers, sorted by country and date
+    """
+    country_level_data = data[data["sub_region_1"] == "country"]
+    country_level_data = country_level_data.loc[
+        country_level_data["metro_area"] == "nan",
+    ]
+    country_level_data = country_level_data.drop(
+        ["sub_region_1", "sub_region_2", "metro_area", "iso_3166_2_code"], axis=1
+    )
+
+    # The moving averages run over consecutive rows, sort them by country and date
+    country_level_data = country_level_data.sort_index()
+
+    # Create moving average
+    country_level_data = create_moving_average(
+        country_level_data,
+        [
+            "retail_and_recreation",
+            "grocery_and_pharmacy",
+            "parks",
+            "transit_stations",
+            "workplaces",
+            "residential",
+        ],
+        "country",
+        kind="forward",
+    )
+
+    # Join the two datasets
+    return country_level_data.join(infect_numbers)
+
+
 def mobility_plot(data_set, var_list_moving_avg, titles, colors, group_var, fig_width=20, fig_height=40):
     """Creating multiple plots in one figure for a given data frame, titles and colors have to be defined
     before using the function
@@ -89,6 +203,10 @@ def mobility_plot(data_set, var_list_moving_avg, titles, colors, group_var, fig_
         fig_width (int, optional): Define figure width. Defaults to 20.
         fig_height (int, optional): Define figure height. Defaults to 40.
     """
+    # Plotting libraries are heavy, import them only when a figure is created
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     num_plots = len(titles)
     fig, ax = plt.subplots(num_plots, 1, figsize=(fig_width, fig_height))
 
@@ -107,4 +225,4 @@ def mobility_plot(data_set, var_list_moving_avg, titles, colors, group_var, fig_
         ylim_max = data_set.loc[:, var_list_moving_avg[i]].max() + 10
         ax[i].set_ylim(ylim_min, ylim_max)
         ax[i].spines["right"].set_visible(False)
-        ax[i].spines["top"].set_visible(False)
\ No newline at end of file
+        ax[i].spines["top"].set_visible(False)